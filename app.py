@@ -17,7 +17,7 @@ def create_app():
     )
     
     # Register blueprints
-    from routes import auth, trend, content, media, analytics, admin, profile,media_type,ai_script
+    from routes import auth, trend, content, media, analytics, admin, profile,media_type,ai_script,ai_jobs
     app.register_blueprint(auth.bp)
     app.register_blueprint(trend.bp)
     app.register_blueprint(content.bp)
@@ -27,6 +27,15 @@ def create_app():
     app.register_blueprint(profile.bp)
     app.register_blueprint(media_type.bp)
     app.register_blueprint(ai_script.bp)
+    app.register_blueprint(ai_jobs.bp)
+
+    # Trend harvester in this process only when HARVESTER_ENABLED is set; otherwise `flask trend harvest`
+    from services.trend_harvester import init_harvester
+    init_harvester(app)
+
+    # AI job workers in this process only when AI_JOBS_WORKERS is set; otherwise `flask ai_jobs worker`
+    from services.ai_jobs import init_job_pool
+    init_job_pool(app)
     return app
 
 if __name__ == '__main__':
@@ -4,19 +4,29 @@ import jwt
 from bson import ObjectId
 from extensions import mongo
 
+def get_token_user():
+    """
+    (user, None) for the request's bearer token, or (None, 401 response).
+    For routes where only some requests need authentication.
+    """
+    token = request.headers.get('Authorization')
+    if not token:
+        return None, (jsonify({'message': 'Token is missing'}), 401)
+    try:
+        data = jwt.decode(token.split(" ")[1], current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
+        current_user = mongo.db.users.find_one({'_id': ObjectId(data['user_id'])})
+        if not current_user:
+            return None, (jsonify({'message': 'User not found'}), 401)
+    except Exception as e:
+        return None, (jsonify({'message': 'Token is invalid', 'error': str(e)}), 401)
+    return current_user, None
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token:
-            return jsonify({'message': 'Token is missing'}), 401
-        try:
-            data = jwt.decode(token.split(" ")[1], current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
-            current_user = mongo.db.users.find_one({'_id': ObjectId(data['user_id'])})
-            if not current_user:
-                return jsonify({'message': 'User not found'}), 401
-        except Exception as e:
-            return jsonify({'message': 'Token is invalid', 'error': str(e)}), 401
+        current_user, error = get_token_user()
+        if error:
+            return error
         return f(current_user, *args, **kwargs)
     return decorated
 
@@ -0,0 +1,99 @@
+"""
+Benchmark: view-count and thumbnail parsing, legacy routes/trend.py helpers vs
+utils/parsing over 100k SearchAPI-style inputs.
+
+Run from the repo root: python -B -m benchmarks.bench_parsing
+"""
+import ast
+import random
+import time
+from utils.parsing import parse_views, parse_views_batch, parse_duration_batch, parse_thumbnail
+
+N = 100_000
+
+
+def legacy_clean_views_count(views_text):
+    """clean_views_count as it was in routes/trend.py."""
+    if isinstance(views_text, (int, float)):
+        return int(views_text)
+    if not isinstance(views_text, str):
+        return 0
+    views_text = views_text.upper().replace('VIEWS', '').strip()
+    try:
+        if 'K' in views_text:
+            return int(float(views_text.replace('K', '')) * 1000)
+        elif 'M' in views_text:
+            return int(float(views_text.replace('M', '')) * 1000000)
+        elif 'B' in views_text:
+            return int(float(views_text.replace('B', '')) * 1000000000)
+        else:
+            number = ''.join(filter(str.isdigit, views_text))
+            return int(number) if number else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def legacy_parse_thumbnail(thumbnail):
+    """parse_thumbnail as it was inside validate_video_data."""
+    if isinstance(thumbnail, str):
+        try:
+            return ast.literal_eval(thumbnail)
+        except (SyntaxError, ValueError):
+            return {"static": thumbnail, "rich": thumbnail}
+    return thumbnail
+
+
+def make_inputs(n):
+    rng = random.Random(42)
+    views = []
+    for _ in range(n):
+        kind = rng.randrange(5)
+        if kind == 0:
+            views.append(f"{rng.randint(1, 999)}.{rng.randint(0, 9)}K views")
+        elif kind == 1:
+            views.append(f"{rng.randint(1, 999):,} views")
+        elif kind == 2:
+            views.append(f"{rng.randint(1, 99)},{rng.randint(0, 9)} Mio. Aufrufe")
+        elif kind == 3:
+            views.append(f"{rng.randint(1, 99)}.{rng.randint(0, 9)}M views")
+        else:
+            views.append(rng.choice(["No views", f"{rng.randint(1, 999):,},{rng.randint(0, 999):03d} views"]))
+    thumbnails = [
+        f"{{'static': 'https://i.ytimg.com/vi/{i}/hq720.jpg', 'rich': 'https://i.ytimg.com/an_webp/{i}/mqdefault.webp'}}"
+        if i % 2 else f"https://i.ytimg.com/vi/{i}/hq720.jpg"
+        for i in range(n)
+    ]
+    lengths = [f"{rng.randint(0, 59)}:{rng.randint(0, 59):02d}" for _ in range(n)]
+    return views, thumbnails, lengths
+
+
+def bench(name, func, repeat=5):
+    # Best of several runs, so one noisy run does not decide the comparison
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    print(f"{name:<34} {elapsed * 1000:9.1f} ms")
+    return elapsed, result
+
+
+if __name__ == "__main__":
+    views, thumbnails, lengths = make_inputs(N)
+    print(f"{N:,} inputs")
+
+    legacy_time, legacy = bench("legacy clean_views_count", lambda: [legacy_clean_views_count(v) for v in views])
+    new_time, parsed = bench("parse_views_batch", lambda: parse_views_batch(views))
+    print(f"{'speed-up':<34} {legacy_time / new_time:9.1f}x")
+    wrong = sum(1 for v, a, b in zip(views, legacy, parsed) if a != b)
+    print(f"{'inputs the legacy parser disagrees on':<34} {wrong:9,}")
+    mismatched = sum(1 for v, b in zip(views, parsed) if parse_views(v) != b)
+    print(f"{'batch results != parse_views':<34} {mismatched:9,}")
+    for sample in ("1,2 Mio. Aufrufe", "1,234,567 views", "1.2K views", "No views"):
+        print(f"  {sample!r:<22} legacy={legacy_clean_views_count(sample):>10,}  new={parse_views(sample):>10,}")
+
+    legacy_time, _ = bench("legacy thumbnail literal_eval", lambda: [legacy_parse_thumbnail(t) for t in thumbnails])
+    new_time, _ = bench("parse_thumbnail", lambda: [parse_thumbnail(t) for t in thumbnails])
+    print(f"{'speed-up':<34} {legacy_time / new_time:9.1f}x")
+
+    bench("parse_duration_batch", lambda: parse_duration_batch(lengths))
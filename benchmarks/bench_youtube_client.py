@@ -0,0 +1,51 @@
+"""
+Micro-benchmark: per-request cost of preparing a YouTube videos().list call
+with a freshly built client (old behaviour) vs the shared client.
+No network is used; requests are built but not executed.
+
+Run from the repo root: python -m benchmarks.bench_youtube_client
+"""
+import time
+import googleapiclient.discovery
+from services.youtube_client import get_youtube_client, get_discovery_document
+
+API_KEY = "benchmark-key"
+ITERATIONS = 50
+
+
+def prepare(youtube):
+    return youtube.videos().list(
+        part="snippet,statistics",
+        chart="mostPopular",
+        regionCode="IN",
+        maxResults=50
+    )
+
+
+def per_request_build():
+    # What init_youtube used to do on every call
+    youtube = googleapiclient.discovery.build("youtube", "v3", developerKey=API_KEY)
+    return prepare(youtube)
+
+
+def shared_client():
+    return prepare(get_youtube_client(API_KEY))
+
+
+def bench(name, func, iterations=ITERATIONS):
+    func()  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    per_call_ms = (time.perf_counter() - start) * 1000 / iterations
+    print(f"{name:<20} {per_call_ms:8.3f} ms/request")
+    return per_call_ms
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    get_discovery_document()
+    print(f"{'discovery load':<20} {(time.perf_counter() - start) * 1000:8.3f} ms (once per process)")
+    before = bench("build per request", per_request_build)
+    after = bench("shared client", shared_client)
+    print(f"speed-up: {before / after:.0f}x")
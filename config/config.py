@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -28,5 +29,76 @@ class Config:
     #SerpApi
     SERPAPI_API_URL = os.getenv('SERPAPI_API_URL', 'https://serpapi.com/search.json')
     SERPAPI_KEY = os.getenv('SERPAPI_KEY', 'daca004806da580c4d05e4215c27e046af3c743b1162bb2b65c30cc6b1e5f04c')
+    SERPAPI_ACCOUNT_URL = os.getenv('SERPAPI_ACCOUNT_URL', 'https://serpapi.com/account.json')
+    #Outbound HTTP client shared by all upstream integrations (seconds)
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 15))
+    HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', 100))
+    HTTP_MAX_KEEPALIVE = int(os.getenv('HTTP_MAX_KEEPALIVE', 20))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', 30))
+    HTTP_HTTP2 = os.getenv('HTTP_HTTP2', 'true').lower() == 'true'
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+    HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', 0.25))
+    HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', 4))
+    HTTP_USER_AGENT = os.getenv('HTTP_USER_AGENT', 'smcps-backend/1.0')
+    #Trend fetch cache (seconds / entries)
+    TREND_CACHE_TTL = int(os.getenv('TREND_CACHE_TTL', 300))
+    TREND_CACHE_STALE_TTL = int(os.getenv('TREND_CACHE_STALE_TTL', 900))
+    TREND_CACHE_MAX_ENTRIES = int(os.getenv('TREND_CACHE_MAX_ENTRIES', 256))
+    TREND_STATS_CACHE_TTL = int(os.getenv('TREND_STATS_CACHE_TTL', 60))
+    #Generated script cache: in-process LRU (seconds / entries) in front of Mongo (seconds)
+    SCRIPT_CACHE_TTL = int(os.getenv('SCRIPT_CACHE_TTL', 3600))
+    SCRIPT_CACHE_MAX_ENTRIES = int(os.getenv('SCRIPT_CACHE_MAX_ENTRIES', 512))
+    SCRIPT_CACHE_STORE_TTL = int(os.getenv('SCRIPT_CACHE_STORE_TTL', 7 * 86400))
+    #Concurrent model calls for POST /api/media/ai (shared by all requests)
+    AI_PIPELINE_MAX_WORKERS = int(os.getenv('AI_PIPELINE_MAX_WORKERS', 8))
+    #Default script generation mode: 'separate' (script, sentiment, QC calls) or 'combined' (one JSON call)
+    AI_GENERATION_MODE = os.getenv('AI_GENERATION_MODE', 'separate')
+    #Async AI jobs (async=true on AI endpoints); workers poll the ai_jobs collection.
+    #Workers run in `flask ai_jobs worker`; AI_JOBS_WORKERS > 0 also runs them in the web process
+    AI_JOBS_WORKERS = int(os.getenv('AI_JOBS_WORKERS', 0))
+    AI_JOBS_MAX_ATTEMPTS = int(os.getenv('AI_JOBS_MAX_ATTEMPTS', 3))
+    AI_JOBS_POLL_SECONDS = float(os.getenv('AI_JOBS_POLL_SECONDS', 1))
+    AI_JOBS_LEASE_SECONDS = int(os.getenv('AI_JOBS_LEASE_SECONDS', 300))
+    AI_JOBS_BACKOFF_BASE = float(os.getenv('AI_JOBS_BACKOFF_BASE', 2))
+    AI_JOBS_BACKOFF_MAX = float(os.getenv('AI_JOBS_BACKOFF_MAX', 60))
+    AI_JOBS_RESULT_TTL = int(os.getenv('AI_JOBS_RESULT_TTL', 7 * 86400))
+    #Batch script generation (POST /api/content/batch); concurrency halves on model 429s and recovers
+    CONTENT_BATCH_MAX_BRIEFS = int(os.getenv('CONTENT_BATCH_MAX_BRIEFS', 100))
+    CONTENT_BATCH_CONCURRENCY = int(os.getenv('CONTENT_BATCH_CONCURRENCY', 8))
+    CONTENT_BATCH_MAX_RETRIES = int(os.getenv('CONTENT_BATCH_MAX_RETRIES', 5))
+    CONTENT_BATCH_BACKOFF_BASE = float(os.getenv('CONTENT_BATCH_BACKOFF_BASE', 1))
+    CONTENT_BATCH_BACKOFF_MAX = float(os.getenv('CONTENT_BATCH_BACKOFF_MAX', 30))
+    #Bulk trend edits (PATCH /api/trends/bulk)
+    TREND_BULK_MAX_UPDATES = int(os.getenv('TREND_BULK_MAX_UPDATES', 5000))
+    #Background trend harvester; runs in `flask trend harvest`, HARVESTER_ENABLED also runs it in the web process
+    HARVESTER_ENABLED = os.getenv('HARVESTER_ENABLED', 'false').lower() == 'true'
+    HARVESTER_CATEGORIES = [c.strip() for c in os.getenv('HARVESTER_CATEGORIES', 'gaming,music,sports,news,comedy,education,technology,entertainment').split(',') if c.strip()]
+    HARVESTER_REGIONS = [r.strip() for r in os.getenv('HARVESTER_REGIONS', 'IN,US,GB,CA,AU,DE').split(',') if r.strip()]
+    HARVESTER_INTERVAL_SECONDS = int(os.getenv('HARVESTER_INTERVAL_SECONDS', 900))
+    HARVESTER_JITTER_SECONDS = int(os.getenv('HARVESTER_JITTER_SECONDS', 60))
+    # When true, trend read endpoints only serve harvested data and never call upstream
+    TRENDS_PRECOMPUTED_ONLY = os.getenv('TRENDS_PRECOMPUTED_ONLY', 'false').lower() == 'true'
+    #Batch trend fetch (POST /api/trends/batch)
+    TREND_BATCH_MAX_WORKERS = int(os.getenv('TREND_BATCH_MAX_WORKERS', 8))
+    TREND_BATCH_TIMEOUT = int(os.getenv('TREND_BATCH_TIMEOUT', 30))
+    #Trend scoring (sort=score); weights is a JSON object merged over the defaults,
+    #candidates are the newest matching trends (responses report when the cap was hit)
+    TREND_SCORE_WEIGHTS = json.loads(os.getenv('TREND_SCORE_WEIGHTS', '{}'))
+    TREND_SCORE_MAX_CANDIDATES = int(os.getenv('TREND_SCORE_MAX_CANDIDATES', 500000))
+    #Near-duplicate trend clustering (MinHash/LSH); threshold is the estimated Jaccard similarity
+    TREND_DEDUP_ENABLED = os.getenv('TREND_DEDUP_ENABLED', 'true').lower() == 'true'
+    TREND_DEDUP_THRESHOLD = float(os.getenv('TREND_DEDUP_THRESHOLD', 0.7))
+    #Instagram hashtag fetches: reuse a result fetched within this many seconds (0 disables)
+    INSTAGRAM_REUSE_SECONDS = int(os.getenv('INSTAGRAM_REUSE_SECONDS', 300))
+    INSTAGRAM_FETCH_TIMEOUT = int(os.getenv('INSTAGRAM_FETCH_TIMEOUT', 15))
+    #Instagram bulk refresh (POST /api/trends/ig/refresh); rate/burst should match the SerpAPI plan
+    INSTAGRAM_REFRESH_RATE_PER_SECOND = float(os.getenv('INSTAGRAM_REFRESH_RATE_PER_SECOND', 5))
+    INSTAGRAM_REFRESH_BURST = int(os.getenv('INSTAGRAM_REFRESH_BURST', 10))
+    INSTAGRAM_REFRESH_MAX_WORKERS = int(os.getenv('INSTAGRAM_REFRESH_MAX_WORKERS', 8))
+    INSTAGRAM_REFRESH_MAX_WAIT_SECONDS = int(os.getenv('INSTAGRAM_REFRESH_MAX_WAIT_SECONDS', 1800))
+    INSTAGRAM_REFRESH_MAX_HASHTAGS = int(os.getenv('INSTAGRAM_REFRESH_MAX_HASHTAGS', 5000))
+    INSTAGRAM_REFRESH_QUOTA_RESERVE = int(os.getenv('INSTAGRAM_REFRESH_QUOTA_RESERVE', 100))
+    INSTAGRAM_REFRESH_INTERVAL_SECONDS = int(os.getenv('INSTAGRAM_REFRESH_INTERVAL_SECONDS', 0))  # 0 disables the scheduled job
 
 
@@ -28,6 +28,7 @@ class Content:
         self.qc_status = 'pending'
         self.qc_feedback = []
         self.storyboard = None
+        self.generated_script = None
 
     def to_dict(self):
         return {
@@ -45,5 +46,6 @@ class Content:
             'status': self.status,
             'qc_status': self.qc_status,
             'qc_feedback': self.qc_feedback,
-            'storyboard': self.storyboard
+            'storyboard': self.storyboard,
+            'generated_script': self.generated_script
         }
@@ -8,8 +8,11 @@ class Trend:
         self.engagement_metrics = engagement_metrics
         self.sentiment_score = sentiment_score
         self.created_at = datetime.utcnow()
+        self.last_seen_at = self.created_at
         self.status = 'active'
         self.roi_potential = None
+        self.cluster_id = None  # Shared by near-duplicate titles
+        self.cluster_rep = True  # First video seen in its cluster
 
     def to_dict(self):
         return {
@@ -18,31 +21,49 @@ class Trend:
             'engagement_metrics': self.engagement_metrics,
             'sentiment_score': self.sentiment_score,
             'created_at': self.created_at,
+            'last_seen_at': self.last_seen_at,
             'status': self.status,
-            'roi_potential': self.roi_potential
+            'roi_potential': self.roi_potential,
+            'cluster_id': self.cluster_id,
+            'cluster_rep': self.cluster_rep
         }
     
 
 class InstagramTrend:
-    def __init__(self, hashtag, data, sentiment_score=None):
+    def __init__(self, hashtag, data=None, sentiment_score=None, posts=None, links=None, counts=None, raw_id=None,
+                 fetched_at=None):
         self.hashtag = hashtag  # The hashtag for the trend (e.g., #trending)
-        self.data = data  # The data fetched from Instagram API
+        self.data = data  # Legacy: full SerpAPI response stored inline
+        self.posts = posts or []  # Instagram posts/reels extracted from the response
+        self.links = links or []  # Other search results
+        self.counts = counts or {}  # Result counts (total, posts, reels, profiles...)
+        self.raw_id = raw_id  # Compressed raw response in instagram_raw_payloads
         self.sentiment_score = sentiment_score  # Sentiment score for the trend (optional)
         self.created_at = datetime.utcnow()  # Timestamp when the trend is created
+        self.fetched_at = fetched_at or self.created_at  # When the SerpAPI response was fetched
+        self.last_viewed_at = self.created_at  # Drives bulk refresh priority
         self.status = 'active'  # Default status is 'active'
         self.roi_potential = None  # You can calculate or define ROI potential later
 
     def to_dict(self):
         """Convert the InstagramTrend object to a dictionary format for storing in the database."""
-        return {
+        trend = {
             '_id': str(ObjectId()),  # Generate a new ObjectId for the document
             'hashtag': self.hashtag,
-            'data': self.data,
+            'posts': self.posts,
+            'links': self.links,
+            'counts': self.counts,
+            'raw_id': self.raw_id,
             'sentiment_score': self.sentiment_score,
             'created_at': self.created_at,
+            'fetched_at': self.fetched_at,
+            'last_viewed_at': self.last_viewed_at,
             'status': self.status,
             'roi_potential': self.roi_potential
         }
+        if self.data is not None:
+            trend['data'] = self.data
+        return trend
 
     @staticmethod
     def from_dict(data):
@@ -50,5 +71,10 @@ class InstagramTrend:
         return InstagramTrend(
             hashtag=data.get('hashtag'),
             data=data.get('data'),
-            sentiment_score=data.get('sentiment_score')
+            sentiment_score=data.get('sentiment_score'),
+            posts=data.get('posts'),
+            links=data.get('links'),
+            counts=data.get('counts'),
+            raw_id=data.get('raw_id'),
+            fetched_at=data.get('fetched_at')
         )
\ No newline at end of file
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from extensions import mongo
 from auth_middleware import admin_required
+from services.http_client import get_http_client
+from services.script_cache import get_script_cache
 
 bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -64,4 +66,16 @@ def get_analytics(current_user):
         'user_count': user_count,
         'content_count': content_count,
         'trend_count': trend_count
-    }), 200
\ No newline at end of file
+    }), 200
+
+@bp.route('/http-stats', methods=['GET'])
+@admin_required
+def get_http_stats(current_user):
+    # Per-host latency histograms and retry counts for outbound upstream calls
+    return jsonify(get_http_client().stats()), 200
+
+@bp.route('/script-cache-stats', methods=['GET'])
+@admin_required
+def get_script_cache_stats(current_user):
+    # Hit rates of the in-process and Mongo tiers of the generated script cache
+    return jsonify(get_script_cache().stats()), 200
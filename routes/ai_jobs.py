@@ -0,0 +1,67 @@
+import time
+import click
+from flask import Blueprint, jsonify, current_app
+from bson import ObjectId
+from auth_middleware import token_required, admin_required
+from services.ai_jobs import get_job, cancel_job, serialize_job, get_job_stats, start_job_pool
+
+bp = Blueprint('ai_jobs', __name__, url_prefix='/api/ai-jobs')
+
+
+def _owned_job(current_user, job_id):
+    if not ObjectId.is_valid(job_id):
+        return None, (jsonify({"error": "Invalid job id"}), 400)
+    job = get_job(ObjectId(job_id))
+    if not job:
+        return None, (jsonify({"error": "Job not found"}), 404)
+    # Jobs without an owner (queued before owners were required) are visible to admins only
+    if job.get('user_id') != str(current_user['_id']) and current_user['role'] != 'admin':
+        return None, (jsonify({"error": "Unauthorized"}), 403)
+    return job, None
+
+
+@bp.route('/stats', methods=['GET'])
+@admin_required
+def get_ai_job_stats(current_user):
+    """Job counts by status and this process's worker pool counters."""
+    return jsonify(get_job_stats()), 200
+
+
+@bp.route('/<job_id>', methods=['GET'])
+@token_required
+def get_ai_job(current_user, job_id):
+    """
+    Status of an AI job: queued, running, succeeded (with result), failed (with error)
+    or cancelled. Poll this after a 202 from an endpoint called with async=true.
+    """
+    job, error = _owned_job(current_user, job_id)
+    if error:
+        return error
+    job = serialize_job(job)
+    job.pop('payload', None)
+    return jsonify(job), 200
+
+
+@bp.route('/<job_id>/cancel', methods=['POST'])
+@token_required
+def cancel_ai_job(current_user, job_id):
+    """Cancel a job that has not started yet."""
+    job, error = _owned_job(current_user, job_id)
+    if error:
+        return error
+    if not cancel_job(job['_id']):
+        return jsonify({"error": f"Job is already {job['status']}"}), 409
+    return jsonify({"job_id": job_id, "status": "cancelled"}), 200
+
+
+@bp.cli.command('worker')
+@click.option('--workers', default=None, type=int, help='Worker threads (default: AI_JOBS_WORKERS, or 4 when unset)')
+def ai_jobs_worker_command(workers):
+    """Run AI job workers in a separate process: flask ai_jobs worker --workers 8"""
+    pool = start_job_pool(current_app._get_current_object(), workers or current_app.config['AI_JOBS_WORKERS'] or 4)
+    click.echo(f"AI job worker pool running with {pool.workers} workers")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
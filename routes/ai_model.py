@@ -1,20 +1,122 @@
 import openai
 import random
 import os
+import json
+import re
+from services.script_cache import get_script_cache, normalize_brief
+from services.model_client import get_model_client, stream_chat
+
+SCRIPT_MODEL = os.getenv("OPENAI_SCRIPT_MODEL", "gpt-4")
+BUNDLE_MODEL = os.getenv("OPENAI_BUNDLE_MODEL", SCRIPT_MODEL)
+SENTIMENTS = ("Positive", "Neutral", "Negative")
+CODE_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
 
 class AIFunctions:
     @staticmethod
-    def generate_script(content_theme, video_format, tone, target_audience, keywords):
-        openai.api_key = os.getenv("OPENAI_API_KEY")
+    def generate_script(content_theme, video_format, tone, target_audience, keywords, force=False, model=None):
+        """
+        Script for a brief, served from the script cache when an equivalent brief
+        (same fields, keywords in any order or case) was generated for the same model.
+        force=True always calls the model and replaces the cached script.
+        """
+        model = model or SCRIPT_MODEL
+        brief = normalize_brief(content_theme, video_format, tone, target_audience, keywords)
+        return get_script_cache().get_or_generate(
+            brief, model,
+            lambda: AIFunctions.complete_script(content_theme, video_format, tone, target_audience, keywords, model),
+            force=force
+        )
+
+    @staticmethod
+    def script_messages(content_theme, video_format, tone, target_audience, keywords):
         prompt = f"Generate a {tone} script for a {video_format} video on {content_theme}. Target audience: {target_audience}. Use keywords: {', '.join(keywords)}."
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
+        return [
+            {"role": "system", "content": "You are a content generation AI that writes engaging video scripts."},
+            {"role": "user", "content": prompt}
+        ]
+
+    @staticmethod
+    def complete_script(content_theme, video_format, tone, target_audience, keywords, model=None):
+        """Uncached script generation (one chat completion)."""
+        openai.api_key = os.getenv("OPENAI_API_KEY")
+        response = get_model_client().ChatCompletion.create(
+            model=model or SCRIPT_MODEL,
+            messages=AIFunctions.script_messages(content_theme, video_format, tone, target_audience, keywords)
+        )
+        return response['choices'][0]['message']['content']
+
+    @staticmethod
+    def stream_script(content_theme, video_format, tone, target_audience, keywords, model=None):
+        """
+        Uncached script generation as it is produced: yields text fragments from a
+        streaming chat completion. Closing the generator closes the upstream stream.
+        """
+        return stream_chat(
+            model or SCRIPT_MODEL,
+            AIFunctions.script_messages(content_theme, video_format, tone, target_audience, keywords)
+        )
+
+    @staticmethod
+    def generate_script_bundle(content_theme, video_format, tone, target_audience, keywords, video_style, model=None):
+        """
+        Script, sentiment and QC feedback from a single chat completion that returns
+        one JSON object, instead of three calls that each re-send the script.
+        Raises ValueError when the reply does not match the expected object.
+        """
+        openai.api_key = os.getenv("OPENAI_API_KEY")
+        prompt = (
+            f"Generate a {tone} script for a {video_format} video on {content_theme}. "
+            f"Target audience: {target_audience}. Use keywords: {', '.join(keywords)}.\n"
+            f"Then categorize the sentiment of your script as Positive, Neutral, or Negative, and review it, "
+            f"giving constructive feedback based on the {video_style} style.\n"
+            'Reply with only a JSON object: {"script": "<the script>", '
+            '"sentiment": "Positive|Neutral|Negative", "qc_feedback": "<the feedback>"}'
+        )
+        response = get_model_client().ChatCompletion.create(
+            model=model or BUNDLE_MODEL,
             messages=[
-                {"role": "system", "content": "You are a content generation AI that writes engaging video scripts."},
+                {"role": "system", "content": "You write engaging video scripts, analyze their sentiment and give QC feedback. You reply in JSON."},
                 {"role": "user", "content": prompt}
             ]
         )
-        return response['choices'][0]['message']['content']
+        return AIFunctions.parse_script_bundle(response['choices'][0]['message']['content'])
+
+    @staticmethod
+    def parse_script_bundle(text):
+        """Validate a combined reply: non-empty script, a known sentiment label and QC feedback text (or list of notes)."""
+        try:
+            bundle = json.loads(CODE_FENCE.sub('', str(text or '').strip()))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Reply is not JSON: {str(e)}")
+        if not isinstance(bundle, dict):
+            raise ValueError("Reply is not a JSON object")
+
+        script = bundle.get('script')
+        if not isinstance(script, str) or not script.strip():
+            raise ValueError("script must be a non-empty string")
+
+        sentiment = str(bundle.get('sentiment') or '').strip().capitalize()
+        if sentiment not in SENTIMENTS:
+            raise ValueError(f"sentiment must be one of {', '.join(SENTIMENTS)}")
+
+        qc_feedback = bundle.get('qc_feedback')
+        if isinstance(qc_feedback, list) and qc_feedback and all(isinstance(note, str) for note in qc_feedback):
+            qc_feedback = '\n'.join(f"- {note.strip()}" for note in qc_feedback)
+        if not isinstance(qc_feedback, str) or not qc_feedback.strip():
+            raise ValueError("qc_feedback must be a non-empty string or list of strings")
+
+        return {'script': script.strip(), 'sentiment': sentiment, 'qc_feedback': qc_feedback.strip()}
+
+    @staticmethod
+    def generate_image(prompt, size="1024x1024"):
+        """URL of one DALL·E image for prompt."""
+        openai.api_key = os.getenv("OPENAI_API_KEY")
+        response = get_model_client().Image.create(
+            prompt=prompt,
+            n=1,
+            size=size
+        )
+        return response["data"][0]["url"]
 
     @staticmethod
     def suggest_visual_style(content_theme, target_platform):
@@ -29,7 +131,7 @@ class AIFunctions:
     def analyze_sentiment(script):
         openai.api_key = os.getenv("OPENAI_API_KEY")
         prompt = f"Analyze the sentiment of the following script and categorize it as Positive, Neutral, or Negative: {script}"
-        response = openai.ChatCompletion.create(
+        response = get_model_client().ChatCompletion.create(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You analyze text sentiment."},
@@ -51,7 +153,7 @@ class AIFunctions:
     def generate_qc_feedback(script, video_style):
         openai.api_key = os.getenv("OPENAI_API_KEY")
         prompt = f"Review the following script and provide constructive feedback based on the {video_style} style: {script}"
-        response = openai.ChatCompletion.create(
+        response = get_model_client().ChatCompletion.create(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You provide QC feedback on video scripts."},
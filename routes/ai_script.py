@@ -1,5 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from bson import ObjectId
 from routes.ai_model import AIFunctions
+from services.script_stream import stream_script, request_cancel, get_streamed_script
+from services.ai_jobs import ai_task, submit_job, async_requested, job_accepted
+from auth_middleware import get_token_user
 from models.ai_response import AiResponse
 import os
 import openai
@@ -12,73 +16,58 @@ bp = Blueprint('ai_content', __name__, url_prefix='/api/openai')
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
 
-@bp.route("/generate-image", methods=["POST"])
-def generate_image():
-    """
-    API endpoint to generate an image using OpenAI's DALL·E model.
-    Request body should include:
-    - prompt (str): The text description for the image generation.
-    - user_id (str): The ID of the user making the request.
-    """
-    try:
-        data = request.json
-
-        if not data or 'prompt' not in data or 'user_id' not in data:
-            return jsonify({"error": "Prompt and user_id are required"}), 400
-
-        prompt = data['prompt']
-        user_id = data['user_id']  # Extract user_id from request body
-
-        response = openai.Image.create(
-            prompt=prompt,
-            n=1,
-            size="1024x1024"
-        )
+@ai_task('openai.generate_image')
+def create_image_response(prompt, user_id):
+    image_url = AIFunctions.generate_image(prompt)
+    ai_response = AiResponse(image_url, prompt, user_id)  # Pass user_id
+    mongo.db.ai_responses.insert_one(ai_response.to_dict())
+    return {
+        "prompt": prompt,
+        "image_url": image_url
+    }
 
-        image_url = response["data"][0]["url"]
-        ai_response = AiResponse(image_url, prompt, user_id)  # Pass user_id
-        mongo.db.ai_responses.insert_one(ai_response.to_dict())
 
-        response_data = jsonify({
-            "prompt": prompt,
-            "image_url": image_url
-        })
+@ai_task('openai.generate_qc_feedback')
+def create_qc_feedback_response(script, video_style):
+    return {
+        "script": script,
+        "video_style": video_style,
+        "qc_feedback": AIFunctions.generate_qc_feedback(script, video_style)
+    }
 
-        response_data.headers.add("Access-Control-Allow-Origin", "*")  # Allow CORS for all origins
 
-        return response_data, 200
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+@bp.route("/generate-image", methods=["POST"])
+def generate_image():
     """
     API endpoint to generate an image using OpenAI's DALL·E model.
     Request body should include:
     - prompt (str): The text description for the image generation.
-    - user_id (str): The ID of the user making the request.
+    - user_id (str): The ID of the user making the request (async requests use the token's user).
     """
     try:
         data = request.json
 
-        if not data or 'prompt' not in data or 'user_id' not in data:
+        if not data or 'prompt' not in data or ('user_id' not in data and not async_requested(data)):
             return jsonify({"error": "Prompt and user_id are required"}), 400
 
         prompt = data['prompt']
-        user_id = data['user_id']  # Extract user_id from request body
 
-        response = openai.Image.create(
-            prompt=prompt,
-            n=1,
-            size="1024x1024"
-        )
+        if async_requested(data):
+            # Jobs belong to the token's user, so queuing one needs authentication
+            current_user, error = get_token_user()
+            if error:
+                return error
+            user_id = str(current_user['_id'])
+            try:
+                job_id = submit_job('openai.generate_image', {'prompt': prompt, 'user_id': user_id},
+                                    user_id=user_id, webhook_url=data.get('webhook_url'))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            return job_accepted(job_id)
 
-        image_url = response["data"][0]["url"]
-        ai_response = AiResponse(image_url, prompt, user_id)  # Pass user_id
-        mongo.db.ai_responses.insert_one(ai_response.to_dict())
+        user_id = data['user_id']  # Extract user_id from request body
 
-        response_data = jsonify({
-            "prompt": prompt,
-            "image_url": image_url
-        })
+        response_data = jsonify(create_image_response(prompt, user_id))
 
         response_data.headers.add("Access-Control-Allow-Origin", "*")  # Allow CORS for all origins
 
@@ -147,6 +136,7 @@ def generate_script():
     - tone (str)
     - target_audience (str)
     - keywords (list of str)
+    - regenerate (bool, optional): bypass the script cache and generate a new script
     """
     try:
         data = request.json
@@ -162,7 +152,8 @@ def generate_script():
             data['video_format'], 
             data['tone'], 
             data['target_audience'], 
-            data['keywords']
+            data['keywords'],
+            force=bool(data.get('regenerate', False))
         )
         
         return jsonify({
@@ -172,6 +163,57 @@ def generate_script():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@bp.route("/generate-script/stream", methods=["POST"])
+def generate_script_stream():
+    """
+    Streaming variant of /generate-script: tokens are sent as server-sent events
+    as the model produces them (start, token..., then done, cancelled or error).
+    Same request body as /generate-script, plus optional user_id. The finished
+    script is saved and can be fetched from /generated-scripts/<id>.
+    """
+    data = request.json
+
+    # Validate required fields
+    required_fields = ['content_theme', 'video_format', 'tone', 'target_audience', 'keywords']
+    for field in required_fields:
+        if not data or field not in data:
+            return jsonify({"error": f"Missing required field: {field}"}), 400
+
+    stream = stream_script(
+        data['content_theme'],
+        data['video_format'],
+        data['tone'],
+        data['target_audience'],
+        data['keywords'],
+        user_id=data.get('user_id'),
+        force=bool(data.get('regenerate', False))
+    )
+    return Response(
+        stream_with_context(stream),
+        mimetype='text/event-stream',
+        # Proxies must pass events through as they arrive
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@bp.route("/generate-script/stream/<stream_id>/cancel", methods=["POST"])
+def cancel_generate_script_stream(stream_id):
+    """Stop a streaming generation; the partial script is saved as cancelled."""
+    if not ObjectId.is_valid(stream_id):
+        return jsonify({"error": "Invalid stream id"}), 400
+    if not request_cancel(ObjectId(stream_id)):
+        return jsonify({"error": "No streaming generation with this id"}), 404
+    return jsonify({"id": stream_id, "cancel_requested": True}), 202
+
+@bp.route("/generated-scripts/<stream_id>", methods=["GET"])
+def get_generated_script(stream_id):
+    """A streamed generation and its status (streaming, completed, cancelled or failed)."""
+    if not ObjectId.is_valid(stream_id):
+        return jsonify({"error": "Invalid stream id"}), 400
+    doc = get_streamed_script(ObjectId(stream_id))
+    if not doc:
+        return jsonify({"error": "Generated script not found"}), 404
+    return jsonify(doc), 200
+
 @bp.route("/suggest-visual-style", methods=["GET"])
 def suggest_visual_style():
     """
@@ -246,14 +288,20 @@ def generate_qc_feedback():
         
         script = data['script']
         video_style = data['video_style']
+
+        if async_requested(data):
+            # Jobs belong to the token's user, so queuing one needs authentication
+            current_user, error = get_token_user()
+            if error:
+                return error
+            try:
+                job_id = submit_job('openai.generate_qc_feedback', {'script': script, 'video_style': video_style},
+                                    user_id=str(current_user['_id']), webhook_url=data.get('webhook_url'))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            return job_accepted(job_id)
         
-        qc_feedback = AIFunctions.generate_qc_feedback(script, video_style)
-        
-        return jsonify({
-            "script": script,
-            "video_style": video_style,
-            "qc_feedback": qc_feedback
-        }), 200
+        return jsonify(create_qc_feedback_response(script, video_style)), 200
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -9,7 +9,7 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from bson.objectid import ObjectId 
 from flask_cors import cross_origin
-import requests
+from services.http_client import get_http_client
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 import random
@@ -263,7 +263,8 @@ def google_callback():
         "grant_type": "authorization_code",
     }
     token_headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    token_response = requests.post(token_url, data=token_data, headers=token_headers)
+    # Authorization codes are single-use, so the exchange is never retried
+    token_response = get_http_client().post(token_url, data=token_data, headers=token_headers)
 
     if token_response.status_code != 200:
         return jsonify({'message': 'Failed to fetch token'}), 400
@@ -349,7 +350,7 @@ def facebook_callback():
         "client_secret": client_secret,
         "code": code
     }
-    token_response = requests.get(token_url, params=token_params)
+    token_response = get_http_client().get(token_url, params=token_params, retries=0)
     token_data = token_response.json()
 
     if "access_token" not in token_data:
@@ -363,7 +364,7 @@ def facebook_callback():
         "fields": "id,name,email",
         "access_token": access_token
     }
-    user_info_response = requests.get(user_info_url, params=user_info_params)
+    user_info_response = get_http_client().get(user_info_url, params=user_info_params)
     user_info = user_info_response.json()
 
     if "email" not in user_info:
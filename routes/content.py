@@ -1,9 +1,11 @@
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from bson import ObjectId
 from extensions import mongo
 from models.content import Content
 from auth_middleware import token_required, admin_required
-from routes.ai_model import AIFunctions
+from services import content_service
+from services.ai_jobs import submit_job, async_requested, job_accepted
 
 bp = Blueprint('content', __name__, url_prefix='/api/content')
 
@@ -24,30 +26,49 @@ def get_content(current_user):
 @token_required
 def create_content(current_user):
     data = request.get_json()
-    generated_script = AIFunctions.generate_script(
-        content_theme=data['content_theme'],
-        video_format=data['video_format'],
-        tone=data['tone'],
-        target_audience=data['target_audience'],
-        keywords=data.get('keywords', [])
-    )
-    
-    content = Content(
-        title=data['title'],
-        content_theme=data['content_theme'],
-        target_audience=data['target_audience'],
-        video_format=data['video_format'],
-        tone=data['tone'],
-        platform=data['platform'],
-        keywords=data.get('keywords', []),
-        hashtags=data.get('hashtags', []),
-        user_id=str(current_user['_id']),
-        reference_files=data.get('reference_files', []),
+    if async_requested(data):
+        # Generate in the AI job workers; poll /api/ai-jobs/<job_id> or receive webhook_url
+        try:
+            job_id = submit_job('content.create', {'data': data, 'user_id': str(current_user['_id'])},
+                                user_id=str(current_user['_id']), webhook_url=data.get('webhook_url'))
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        return job_accepted(job_id)
+    return jsonify(content_service.create_content(data, str(current_user['_id']))), 201
+
+@bp.route('/batch', methods=['POST'])
+@token_required
+def create_content_batch(current_user):
+    """
+    Generate scripts for a list of briefs (same fields as POST /) concurrently and
+    insert all the Content documents with one insert_many.
+    Body: {"briefs": [...]}. Progress streams back as newline-delimited JSON: one
+    {"event": "item", "index", "status"} line per brief as it finishes, then
+    {"event": "done", "counts", "inserted": [{"index", "id"}]}.
+    """
+    data = request.get_json()
+    briefs = (data or {}).get('briefs')
+    if not isinstance(briefs, list) or not briefs:
+        return jsonify({'message': 'briefs must be a non-empty array'}), 400
+    max_briefs = current_app.config['CONTENT_BATCH_MAX_BRIEFS']
+    if len(briefs) > max_briefs:
+        return jsonify({'message': f'At most {max_briefs} briefs per batch'}), 400
+
+    events = content_service.generate_content_batch(briefs, str(current_user['_id']))
+
+    def stream():
+        try:
+            for event in events:
+                yield json.dumps(event, default=str) + '\n'
+        finally:
+            # On client disconnect this stops queued briefs and saves what was generated
+            events.close()
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
     )
-    content.generated_script = generated_script
-    
-    result = mongo.db.content.insert_one(content.to_dict())
-    return jsonify({'message': 'Content created', 'id': str(result.inserted_id), 'generated_script': generated_script}), 201
 
 @bp.route('/<content_id>', methods=['PUT'])
 @token_required
@@ -62,20 +83,12 @@ def update_content(current_user, content_id):
         if str(content['user_id']) != str(current_user['_id']) and current_user['role'] != 'admin':
             return jsonify({'message': 'Unauthorized'}), 403
         
-        # If script-related fields are updated, regenerate the script
-        if 'content_theme' in data or 'video_format' in data or 'tone' in data or 'target_audience' in data or 'keywords' in data:
-            data['generated_script'] = AIFunctions.generate_script(
-                content_theme=data.get('content_theme', content['content_theme']),
-                video_format=data.get('video_format', content['video_format']),
-                tone=data.get('tone', content['tone']),
-                target_audience=data.get('target_audience', content['target_audience']),
-                keywords=data.get('keywords', content.get('keywords', []))
-            )
-        
-        mongo.db.content.update_one(
-            {'_id': ObjectId(content_id)},
-            {'$set': data}
-        )
+        # Script-related changes regenerate the script, in the AI job workers when async is set
+        if async_requested(data):
+            job_id = submit_job('content.update', {'content_id': content_id, 'data': data},
+                                user_id=str(current_user['_id']), webhook_url=data.get('webhook_url'))
+            return job_accepted(job_id)
+        content_service.update_content(content_id, data, content)
         return jsonify({'message': 'Content updated successfully'}), 200
     except Exception as e:
         return jsonify({'message': 'Error updating content', 'error': str(e)}), 400
\ No newline at end of file
@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from extensions import mongo
-from models.media import Media
-from routes.ai_model import AIFunctions
+from services import media_service
+from services.media_service import server_timing
+from services.ai_jobs import submit_job, async_requested, job_accepted
+from auth_middleware import get_token_user
 from datetime import datetime
 
 bp = Blueprint('media', __name__, url_prefix='/api/media')
@@ -15,57 +17,23 @@ def objectid_to_str(o):
 @bp.route('/ai', methods=['POST'])
 def create_media_with_ai():
     data = request.get_json()
-    
-    # Get user input for content generation
-    content_theme = data.get('content_theme')
-    video_format = data.get('video_format')
-    tone = data.get('tone')
-    target_audience = data.get('target_audience')
-    keywords = data.get('keywords', [])
-    target_platform = data.get('target_platform')
-
-    # Step 1: Use AI to generate the script for the media
-    script = AIFunctions.generate_script(content_theme, video_format, tone, target_audience, keywords)
-
-    # Step 2: Use AI to suggest a visual style based on the platform
-    visual_style = AIFunctions.suggest_visual_style(content_theme, target_platform)
-
-    # Step 3: Use AI to analyze the sentiment of the generated script
-    sentiment = AIFunctions.analyze_sentiment(script)
-
-    # Step 4: Generate QC feedback using AI
-    qc_feedback = AIFunctions.generate_qc_feedback(script, visual_style)
-
-    # Step 5: Use AI to suggest the best posting time
-    posting_time = AIFunctions.suggest_posting_time(target_platform)
-
-    # Create media object with generated AI content
-    media = Media(
-        content_id=ObjectId(),  # Generate a new ObjectId
-        visual_style=visual_style,
-        target_platform=target_platform,
-        video_length=data.get('video_length'),  # Video length from user input
-        custom_assets=data.get('custom_assets', []),
-        animation_settings=data.get('animation_settings', {}),
-        audio_settings=data.get('audio_settings', {}),
-        qc_feedback=qc_feedback
-    )
-
-    media_dict = media.to_dict()
-    
-    # Insert media object into MongoDB
-    mongo.db.media.insert_one(media_dict)
-
-    # Return the media content along with AI-generated information
-    return jsonify({
-        "message": "Media created successfully",
-        "content_id": str(media.content_id),
-        "script": script,
-        "visual_style": visual_style,
-        "sentiment": sentiment,
-        "qc_feedback": qc_feedback,
-        "posting_time": posting_time
-    }), 201
+    if async_requested(data):
+        # Generate in the AI job workers; poll /api/ai-jobs/<job_id> or receive webhook_url.
+        # Jobs belong to the token's user, so queuing one needs authentication.
+        current_user, error = get_token_user()
+        if error:
+            return error
+        try:
+            job_id = submit_job('media.create', {'data': data}, user_id=str(current_user['_id']),
+                                webhook_url=data.get('webhook_url'))
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        return job_accepted(job_id)
+
+    body, timings = media_service.create_media_with_ai(data)
+    response = jsonify(body)
+    response.headers['Server-Timing'] = server_timing(timings)
+    return response, 201
 
 # Route to get all media
 @bp.route('/', methods=['GET'])
@@ -5,7 +5,7 @@ from bson.objectid import ObjectId
 import os
 from werkzeug.utils import secure_filename
 import base64
-import requests
+from services.http_client import get_http_client
 bp = Blueprint('profile', __name__, url_prefix='/api')
 
 # Configure upload folder
@@ -112,7 +112,7 @@ def delete_profile(user_id):
 def get_countries():
     try:
         # Fetch data from an external API
-        response = requests.get("https://restcountries.com/v3.1/all")
+        response = get_http_client().get("https://restcountries.com/v3.1/all", params={"fields": "name"})
         if response.status_code == 200:
             countries = [country["name"]["common"] for country in response.json()]
             return jsonify({"countries": countries}), 200  # Return JSON-serializable data
@@ -124,8 +124,8 @@ def get_countries():
 @bp.route("/cities/<country_name>", methods=["GET"])
 def get_cities(country_name):
     try:
-        url = f"https://nominatim.openstreetmap.org/search?country={country_name}&format=json"
-        response = requests.get(url)
+        url = "https://nominatim.openstreetmap.org/search"
+        response = get_http_client().get(url, params={"country": country_name, "format": "json"})
 
         if response.status_code == 200:
             data = response.json()
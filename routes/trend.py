@@ -1,43 +1,48 @@
-import requests
 import os
-from datetime import datetime
-from flask import Blueprint, request, jsonify, current_app
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from bson import ObjectId
-from models.trend import Trend, InstagramTrend
+from pymongo.errors import DuplicateKeyError
+from services.trend_service import TrendService
+from services.trend_harvester import get_snapshot, get_harvester_status, start_harvester
+from services.youtube_client import get_youtube_client
+from services.http_client import get_http_client, HttpError, HttpTimeout
+from services.trend_export import export_stream, DEFAULT_BATCH_SIZE
+from services.trend_velocity import record_snapshots, rank_by_velocity
+from services.trend_scoring import rank_documents, rank_stored_trends, backfill_score_inputs
+from services.trend_dedup import collapse_clusters, backfill_clusters
+from services.trend_stats import STATS, build_stats_match, compute_stats
+from services.trend_search import (
+    search_trends, search_instagram, backfill_search_terms, MAX_QUERY_LENGTH, MAX_OFFSET
+)
+from services.instagram_service import (
+    attach_raw_payload, attach_raw_payloads, release_raw_payload, instagram_id_filter,
+    find_instagram_page, fetch_instagram_summary, get_or_create_instagram_trend,
+    get_fetch_stats, mark_viewed
+)
+from services.instagram_refresh import plan_refresh, start_refresh, get_refresh_status
+from utils.cache import TTLCache
+from utils.pagination import parse_limit, parse_fields, parse_date, date_range_filter
+from utils.helpers import in_app_context, clean_hashtag
+from utils.parsing import parse_views, parse_thumbnail
 from extensions import mongo
-from auth_middleware import token_required
+from auth_middleware import token_required, admin_required
 import re
-from bson.json_util import dumps
 from flask_cors import cross_origin
-import ast
-import googleapiclient.discovery
 from typing import List, Dict
 import json
+import sys
+import time
+import threading
+import click
+from concurrent.futures import ThreadPoolExecutor, wait
 
 bp = Blueprint('trend', __name__, url_prefix='/api/trends')
 # bp = Blueprint('instagram_trend', __name__, url_prefix='/api/instagram-trends')
 
 def clean_views_count(views_text):
     """Convert various view count formats to integer."""
-    if isinstance(views_text, (int, float)):
-        return int(views_text)
-    
-    if not isinstance(views_text, str):
-        return 0
-        
-    views_text = views_text.upper().replace('VIEWS', '').strip()
-    try:
-        if 'K' in views_text:
-            return int(float(views_text.replace('K', '')) * 1000)
-        elif 'M' in views_text:
-            return int(float(views_text.replace('M', '')) * 1000000)
-        elif 'B' in views_text:
-            return int(float(views_text.replace('B', '')) * 1000000000)
-        else:
-            number = ''.join(filter(str.isdigit, views_text))
-            return int(number) if number else 0
-    except (ValueError, TypeError):
-        return 0
+    return parse_views(views_text)
 
 def validate_video_data(video):
     """Validate and clean individual video data."""
@@ -51,13 +56,6 @@ def validate_video_data(video):
         channel_data = video.get('channel', {})
         if not isinstance(channel_data, dict):
             channel_data = {}
-        def parse_thumbnail(thumbnail):
-            if isinstance(thumbnail, str):  
-                try:
-                    return ast.literal_eval(thumbnail)  # Convert string to dict safely
-                except (SyntaxError, ValueError):  
-                    return {"static": thumbnail, "rich": thumbnail}  # Fallback to simple URL
-            return thumbnail  # Already a dict, return as is
         return {
             "title": str(video.get('title', '')).strip(),
             "video_id": str(video.get('id', '')),
@@ -77,6 +75,124 @@ def validate_video_data(video):
         print(f"Error validating video data: {str(e)}")
         return None
     
+def normalize_category(category):
+    """Lower-case and collapse whitespace so equivalent categories share a cache entry."""
+    return " ".join(str(category or "gaming").lower().split())
+
+def build_search_params(category):
+    """SearchAPI query parameters for a category, without the api key."""
+    return {
+        "engine": "youtube",  # Changed to 'youtube' instead of 'youtube_trends'
+        "type": "video",      # Specify type as video
+        "q": f"trending {category}",  # Add search query
+        "sort_by": "date",    # Sort by date to get recent videos
+        "time": "month"       # Time range
+    }
+
+_trend_cache = None
+_stats_cache = None
+_cache_lock = threading.Lock()
+# Guards the "stored" flag that fetch results carry while they sit in the trend cache
+_stored_lock = threading.Lock()
+
+def get_trend_cache():
+    """Process-wide cache for SearchAPI trend results, sized from app config."""
+    global _trend_cache
+    if _trend_cache is None:
+        with _cache_lock:
+            if _trend_cache is None:
+                _trend_cache = TTLCache(
+                    ttl=current_app.config['TREND_CACHE_TTL'],
+                    stale_ttl=current_app.config['TREND_CACHE_STALE_TTL'],
+                    max_entries=current_app.config['TREND_CACHE_MAX_ENTRIES']
+                )
+    return _trend_cache
+
+def get_stats_cache():
+    """Short-TTL cache for the /stats aggregation results."""
+    global _stats_cache
+    if _stats_cache is None:
+        with _cache_lock:
+            if _stats_cache is None:
+                _stats_cache = TTLCache(
+                    ttl=current_app.config['TREND_STATS_CACHE_TTL'],
+                    stale_ttl=current_app.config['TREND_STATS_CACHE_TTL'],
+                    max_entries=current_app.config['TREND_CACHE_MAX_ENTRIES']
+                )
+    return _stats_cache
+
+def trend_cache_key(category):
+    return tuple(sorted(build_search_params(category).items()))
+
+def use_precomputed():
+    """Serve harvested data only, either app-wide or per request with ?source=precomputed."""
+    source = request.args.get('source')
+    if source:
+        return source == 'precomputed'
+    return current_app.config.get('TRENDS_PRECOMPUTED_ONLY', False)
+
+def wants_dedup():
+    """?dedup=true returns one representative per near-duplicate cluster."""
+    return request.args.get('dedup', 'false').lower() == 'true'
+
+def sort_by_score(trends):
+    """Order trends best-first when the request asks for ?sort=score."""
+    if request.args.get('sort') != 'score':
+        return trends
+    return rank_documents(trends, len(trends), current_app.config['TREND_SCORE_WEIGHTS'])
+
+def get_cached_trending_videos(category="gaming"):
+    """fetch_trending_videos behind a TTL + stale-while-revalidate cache."""
+    category = normalize_category(category)
+    key = trend_cache_key(category)
+    app = current_app._get_current_object()
+
+    def load():
+        # Background refreshes run outside the request, so push an app context
+        with app.app_context():
+            return fetch_trending_videos(category)
+
+    return get_trend_cache().get_or_load(key, load, cacheable=lambda result: result["success"])
+
+def claim_fetch(result):
+    """
+    True for the first caller to see this upstream fetch result, which then stores
+    it; cache hits serving the same result get False and read the stored trends.
+    The flag lives on the cached result, so it goes away with the cache entry.
+    """
+    with _stored_lock:
+        if result.get("stored"):
+            return False
+        result["stored"] = True
+        return True
+
+def release_fetch(result):
+    """Undo claim_fetch after the write failed, so the next request stores the fetch."""
+    with _stored_lock:
+        result["stored"] = False
+
+def store_fetch(result):
+    """
+    Trends for a successful fetch result: upserted when this fetch has not been
+    stored yet, otherwise read back. Returns (documents, inserted, updated).
+    """
+    new_trends = []
+    for item in result["data"]:
+        try:
+            new_trends.append(TrendService.build_trend(item))
+        except Exception as e:
+            print(f"Error processing trend item: {str(e)}")
+            continue
+
+    if not claim_fetch(result):
+        return TrendService.find_by_video_ids(item["video_id"] for item in result["data"]), 0, 0
+    try:
+        # One bulk upsert per fetch instead of an insert per video
+        return TrendService.upsert_trends(new_trends, fetched_at=result["fetched_at"])
+    except Exception:
+        release_fetch(result)
+        raise
+
 def fetch_trending_videos(category="gaming"):
     """Fetch latest trending YouTube videos with robust error handling."""
     # Get API configuration from environment variables with fallbacks
@@ -87,19 +203,13 @@ def fetch_trending_videos(category="gaming"):
     print(f"Using API URL: {api_url}")
     print(f"Category: {category}")
 
-    params = {
-        "engine": "youtube",  # Changed to 'youtube' instead of 'youtube_trends'
-        "api_key": api_key,
-        "type": "video",      # Specify type as video
-        "q": f"trending {category}",  # Add search query
-        "sort_by": "date",    # Sort by date to get recent videos
-        "time": "month"       # Time range
-    }
+    params = build_search_params(category)
+    params["api_key"] = api_key
 
     try:
         # Make the API request with debugging
         print(f"Making request to {api_url} with params: {params}")
-        response = requests.get(api_url, params=params, timeout=10)
+        response = get_http_client().get(api_url, params=params, timeout=10)
         
         # Debug response
         print(f"Response status code: {response.status_code}")
@@ -142,11 +252,11 @@ def fetch_trending_videos(category="gaming"):
         if not valid_videos:
             return {"success": False, "error": "No valid video data found in response"}
 
-        return {"success": True, "data": valid_videos}
+        return {"success": True, "data": valid_videos, "fetched_at": datetime.utcnow()}
 
-    except requests.exceptions.Timeout:
+    except HttpTimeout:
         return {"success": False, "error": "API request timed out"}
-    except requests.exceptions.RequestException as e:
+    except HttpError as e:
         return {"success": False, "error": f"API request failed: {str(e)}"}
     except ValueError as e:
         return {"success": False, "error": f"Invalid JSON response: {str(e)}"}
@@ -160,7 +270,23 @@ def get_trends(current_user):
     """Fetch and store YouTube trending videos with improved error handling."""
     try:
         category = request.args.get('category', 'gaming')
-        result = fetch_trending_videos(category)
+
+        if use_precomputed():
+            snapshot = get_snapshot('category', normalize_category(category))
+            if not snapshot or not snapshot.get('data'):
+                return jsonify({
+                    "success": False,
+                    "message": f"No precomputed trends for {category}"
+                }), 404
+            data = collapse_clusters(snapshot["data"]) if wants_dedup() else snapshot["data"]
+            return jsonify({
+                "success": True,
+                "data": sort_by_score(data),
+                "count": len(data),
+                "fetched_at": snapshot["fetched_at"]
+            }), 200
+
+        result = get_cached_trending_videos(category)
 
         if not result["success"]:
             return jsonify({
@@ -168,34 +294,10 @@ def get_trends(current_user):
                 "message": result["error"]
             }), 500
 
-        trends = []
-        for item in result["data"]:
-            try:
-                trend = Trend(
-                    title=item["title"],
-                    platform="YouTube",
-                    engagement_metrics={
-                        "views": item["views"],
-                        "published_time": item["published_time"],
-                        "channel": item["channel"]["title"],
-                        "channel_link": item["channel"]["link"],
-                        "length": item["length"],
-                        "thumbnail": item["thumbnail"],
-                        "video_link": item["link"],
-                        "video_id": item["video_id"],
-                        "is_short": item.get("is_short", False)
-                    },
-                    sentiment_score=None
-                )
-
-                result = mongo.db.trends.insert_one(trend.to_dict())
-                trend_data = trend.to_dict()
-                trend_data["_id"] = str(result.inserted_id)
-                trends.append(trend_data)
-
-            except Exception as e:
-                print(f"Error processing trend item: {str(e)}")
-                continue
+        # Cache hits serve trends already stored by the request that fetched them
+        trends, inserted, updated = store_fetch(result)
+        if wants_dedup():
+            trends = collapse_clusters(trends)
 
         if not trends:
             return jsonify({
@@ -205,8 +307,10 @@ def get_trends(current_user):
 
         return jsonify({
             "success": True,
-            "data": trends,
-            "count": len(trends)
+            "data": sort_by_score(trends),
+            "count": len(trends),
+            "inserted": inserted,
+            "updated": updated
         }), 200
 
     except Exception as e:
@@ -216,26 +320,343 @@ def get_trends(current_user):
         }), 500
     
 
+@bp.route('/cache/stats', methods=['GET'])
+@token_required
+def get_trend_cache_stats(current_user):
+    """Hit, miss and refresh counters for the trending videos cache."""
+    return jsonify({
+        "success": True,
+        "data": get_trend_cache().stats(),
+        "instagram_fetches": get_fetch_stats()
+    }), 200
+
+
+@bp.route('/stats/<kind>', methods=['GET'])
+@token_required
+def get_trend_stats(current_user, kind):
+    """
+    Small server-side summaries of stored trends.
+    kind: 'channels' (top channels by views), 'platforms' (views per platform),
+    'shorts' (short vs long split) or 'daily' (per-day buckets).
+    Optional query parameters:
+    - from, to: ISO 8601 bounds on created_at (default: the last `days` days)
+    - days: window when from is not given (default: 30, max: 365)
+    - platform: exact platform name
+    - limit: channels to return (default: 20, max: 100)
+    - dedup: 'true' to count only one trend per near-duplicate cluster
+    """
+    try:
+        if kind not in STATS:
+            return jsonify({
+                "success": False,
+                "error": f"Unknown stats kind: {kind}. Use one of: {', '.join(STATS)}"
+            }), 404
+        try:
+            date_from = parse_date(request.args.get('from'), 'from')
+            date_to = parse_date(request.args.get('to'), 'to')
+            days = min(max(int(request.args.get('days', 30)), 1), 365)
+            limit = parse_limit(request.args.get('limit'), default=20, maximum=100)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        platform = request.args.get('platform')
+        dedup = wants_dedup()
+
+        # Relative windows are keyed by `days`, so repeated dashboard loads share an entry
+        key = ('stats', kind, request.args.get('from') or f"days:{days}", request.args.get('to'),
+               platform, limit if kind == 'channels' else None, dedup)
+        app = current_app._get_current_object()
+
+        def load():
+            with app.app_context():
+                end = date_to or datetime.utcnow()
+                start = date_from or end - timedelta(days=days)
+                return {
+                    "data": compute_stats(kind, build_stats_match(start, end, platform, dedup), limit),
+                    "from": start,
+                    "to": end,
+                    "generated_at": datetime.utcnow()
+                }
+
+        result = get_stats_cache().get_or_load(key, load)
+        return jsonify({"success": True, "kind": kind, **result}), 200
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@bp.route('/harvester/status', methods=['GET'])
+@token_required
+def get_harvester_status_route(current_user):
+    """Per-job timings and last-success timestamps for the background harvester."""
+    try:
+        return jsonify({"success": True, "data": get_harvester_status()}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 @bp.route('/get_trends', methods=['GET'])
 @token_required
 def fetch_db_trends(current_user):
+    """
+    Stored trends, newest first, one page at a time.
+    Optional query parameters:
+    - limit: page size (default: 50, max: 200)
+    - cursor: next_cursor from the previous page
+    - platform: exact platform name (e.g. 'YouTube')
+    - is_short: 'true' or 'false'
+    - from, to: ISO 8601 bounds on created_at
+    - fields: comma-separated projection (e.g. 'title,engagement_metrics.views')
+    - sort: 'score' to return the top `limit` trends by weighted score
+    - dedup: 'true' to return only the first-seen trend of each near-duplicate cluster
+    """
     try:
-        # Fetch all documents from the 'trends' collection
-        trends = mongo.db.trends.find()
-        
-        # Convert the cursor to a list and then to JSON format
-        trends_list = list(trends)
-        return jsonify({"success": True, "data": dumps(trends_list)}), 200
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            projection = parse_fields(request.args.get('fields'), required=('_id', 'created_at'))
+            date_from = parse_date(request.args.get('from'), 'from')
+            date_to = parse_date(request.args.get('to'), 'to')
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        query = {}
+        platform = request.args.get('platform')
+        if platform:
+            query['platform'] = platform
+        is_short = request.args.get('is_short')
+        if is_short is not None:
+            query['engagement_metrics.is_short'] = is_short.lower() == 'true'
+        query.update(date_range_filter(date_from, date_to))
+        if wants_dedup():
+            # Trends stored before clustering have no cluster_rep and count as representatives
+            query['cluster_rep'] = {'$ne': False}
+
+        if request.args.get('sort') == 'score':
+            # Ranked mode returns the top `limit` trends; there is no next page
+            max_candidates = current_app.config['TREND_SCORE_MAX_CANDIDATES']
+            trends, scored = rank_stored_trends(
+                query, limit,
+                projection=projection,
+                weights=current_app.config['TREND_SCORE_WEIGHTS'],
+                max_candidates=max_candidates
+            )
+            next_cursor = None
+            # Only the newest max_candidates matches are scored; say so when the cap was hit
+            ranking = {"scored": scored, "candidates_capped": scored >= max_candidates}
+        else:
+            ranking = {}
+            try:
+                trends, next_cursor = TrendService.find_page(
+                    query, limit, cursor=request.args.get('cursor'), projection=projection
+                )
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)}), 400
+
+        return jsonify({
+            "success": True,
+            "data": trends,
+            "count": len(trends),
+            "next_cursor": next_cursor,
+            **ranking
+        }), 200
 
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 
-@bp.route('/<trend_id>', methods=['PUT'])
+@bp.route('/search', methods=['GET'])
+@token_required
+def search_stored_trends(current_user):
+    """
+    Search stored trends by title and channel, and Instagram trends by hashtag.
+    Query parameters:
+    - q: search text (required)
+    - type: 'trends', 'instagram' or 'all' (default)
+    - prefix: 'true' for autocomplete (the last word matches as a prefix)
+    - limit: results per type (default: 20, max: 100)
+    - offset: next_offset from the previous page
+    """
+    try:
+        q = (request.args.get('q') or '').strip()
+        if not q:
+            return jsonify({"success": False, "error": "q is required"}), 400
+        if len(q) > MAX_QUERY_LENGTH:
+            return jsonify({"success": False, "error": f"q must be at most {MAX_QUERY_LENGTH} characters"}), 400
+        search_type = request.args.get('type', 'all')
+        if search_type not in ('trends', 'instagram', 'all'):
+            return jsonify({"success": False, "error": "type must be 'trends', 'instagram' or 'all'"}), 400
+        try:
+            limit = parse_limit(request.args.get('limit'), default=20, maximum=100)
+            offset = int(request.args.get('offset', 0))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        if offset < 0 or offset > MAX_OFFSET:
+            return jsonify({"success": False, "error": f"offset must be between 0 and {MAX_OFFSET}"}), 400
+        prefix = request.args.get('prefix', 'false').lower() == 'true'
+
+        results = {"success": True, "query": q}
+        if search_type in ('trends', 'all'):
+            trends, next_offset = search_trends(q, limit, offset, prefix=prefix)
+            results["trends"] = {"data": trends, "count": len(trends), "next_offset": next_offset}
+        if search_type in ('instagram', 'all'):
+            hashtags, next_offset = search_instagram(q, limit, offset)
+            results["instagram"] = {"data": hashtags, "count": len(hashtags), "next_offset": next_offset}
+        return jsonify(results), 200
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@bp.route('/velocity', methods=['GET'])
+@token_required
+def get_trend_velocity(current_user):
+    """
+    Videos ranked by views gained per hour.
+    Optional query parameters:
+    - window_hours: look-back window (default: 24, max: 720)
+    - limit: number of videos (default: 50, max: 200)
+    - min_points: snapshots a video needs to be ranked (default: 2)
+    """
+    try:
+        window_hours = min(max(request.args.get('window_hours', 24, type=float), 1), 720)
+        limit = parse_limit(request.args.get('limit'))
+        min_points = max(request.args.get('min_points', 2, type=int), 2)
+
+        ranked = rank_by_velocity(window_hours=window_hours, limit=limit, min_points=min_points)
+        return jsonify({
+            "success": True,
+            "data": ranked,
+            "count": len(ranked),
+            "window_hours": window_hours
+        }), 200
+
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@bp.route('/export', methods=['GET'])
+@token_required
+def export_trends(current_user):
+    """
+    Stream a collection as newline-delimited JSON.
+    Optional query parameters:
+    - collection: 'trends' (default) or 'instagram_trends'
+    - batch_size: Mongo cursor batch size (default: 1000, max: 10000)
+    - after_id: resume after this _id (documents are exported in _id order)
+    - compress: 'zstd' to compress the stream
+    - from, to: ISO 8601 bounds on created_at
+    - platform, is_short: trends filters
+    - hashtag, status: instagram_trends filters
+    """
+    collection = request.args.get('collection', 'trends')
+    compress = request.args.get('compress')
+    try:
+        stream = export_stream(
+            collection,
+            request.args,
+            batch_size=request.args.get('batch_size', DEFAULT_BATCH_SIZE, type=int),
+            compress=compress
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    filename = f"{collection}.ndjson" + (".zst" if compress == 'zstd' else "")
+    return Response(
+        stream_with_context(stream),
+        mimetype='application/zstd' if compress == 'zstd' else 'application/x-ndjson',
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@bp.cli.command('export')
+@click.option('--collection', default='trends', type=click.Choice(['trends', 'instagram_trends']))
+@click.option('--output', '-o', default='-', help="File to write, '-' for stdout")
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, type=int)
+@click.option('--after-id', default=None, help='Resume after this _id')
+@click.option('--compress', default=None, type=click.Choice(['zstd']))
+@click.option('--from', 'date_from', default=None, help='ISO 8601 lower bound on created_at')
+@click.option('--to', 'date_to', default=None, help='ISO 8601 upper bound on created_at')
+@click.option('--platform', default=None)
+@click.option('--is-short', 'is_short', default=None, type=click.Choice(['true', 'false']), help='trends only')
+@click.option('--hashtag', default=None)
+@click.option('--status', default=None, help='instagram_trends only')
+def export_trends_command(collection, output, batch_size, after_id, compress, date_from, date_to, platform, is_short,
+                          hashtag, status):
+    """Export trends as NDJSON: flask trend export -o trends.ndjson.zst --compress zstd"""
+    # Same keys as the GET /export query string, so both go through build_export_query
+    filters = {
+        'after_id': after_id,
+        'from': date_from,
+        'to': date_to,
+        'platform': platform,
+        'is_short': is_short,
+        'hashtag': hashtag,
+        'status': status
+    }
+    try:
+        stream = export_stream(collection, filters, batch_size=batch_size, compress=compress)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    out = sys.stdout.buffer if output == '-' else open(output, 'wb')
+    try:
+        for chunk in stream:
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+
+@bp.cli.command('harvest')
+def harvest_command():
+    """Run the trend harvester in a dedicated process: flask trend harvest"""
+    start_harvester(current_app._get_current_object())
+    click.echo("Trend harvester running")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+
+
+@bp.cli.command('dedup')
+@click.option('--batch-size', default=1000, type=int)
+def dedup_trends_command(batch_size):
+    """Assign near-duplicate clusters to trends stored before clustering: flask trend dedup"""
+    updated = backfill_clusters(batch_size=batch_size, threshold=current_app.config['TREND_DEDUP_THRESHOLD'])
+    click.echo(f"Assigned clusters to {updated} trends")
+
+
+@bp.cli.command('merge-duplicates')
+@click.option('--batch-size', default=1000, type=int)
+def merge_duplicates_command(batch_size):
+    """Keep the earliest trend per video_id so the unique index can be built: flask trend merge-duplicates"""
+    deleted = TrendService.merge_duplicates(batch_size=batch_size)
+    click.echo(f"Removed {deleted} duplicate trends")
+
+
+@bp.cli.command('score-index')
+@click.option('--batch-size', default=1000, type=int)
+def score_index_command(batch_size):
+    """Store numeric length/publish time on trends saved before scoring read them: flask trend score-index"""
+    updated = backfill_score_inputs(batch_size=batch_size)
+    click.echo(f"Stored scoring inputs on {updated} trends")
+
+
+@bp.cli.command('search-index')
+@click.option('--batch-size', default=1000, type=int)
+def search_index_command(batch_size):
+    """Store search terms on trends saved before search existed: flask trend search-index"""
+    updated = backfill_search_terms(batch_size=batch_size)
+    click.echo(f"Indexed {updated} trends for search")
+
+
+@bp.route('/<trend_id>', methods=['PUT', 'PATCH'])
 @token_required
 def update_trend(current_user, trend_id):
-    """Update an existing trend."""
+    """Update an existing trend; only the fields sent are written."""
     try:
         if not ObjectId.is_valid(trend_id):
             return jsonify({
@@ -251,81 +672,116 @@ def update_trend(current_user, trend_id):
                 "message": "No update data provided"
             }), 400
 
-        # Find the existing trend
-        existing_trend = mongo.db.trends.find_one({'_id': ObjectId(trend_id)})
-        if not existing_trend:
+        try:
+            updated_trend = TrendService.update_trend(ObjectId(trend_id), data)
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "message": str(e)
+            }), 400
+        except DuplicateKeyError:
+            return jsonify({
+                "success": False,
+                "message": "Another trend already has this video_id"
+            }), 409
+
+        if not updated_trend:
             return jsonify({
                 "success": False,
                 "message": "Trend not found"
             }), 404
 
-        # Validate and prepare update data
-        update_data = {}
-        
-        # Update title if provided
-        if 'title' in data:
-            update_data['title'] = str(data['title']).strip()
-
-        # Update platform if provided
-        if 'platform' in data:
-            update_data['platform'] = str(data['platform']).strip()
-
-        # Update engagement metrics if provided
-        if 'engagement_metrics' in data:
-            metrics = data['engagement_metrics']
-            if not isinstance(metrics, dict):
-                return jsonify({
-                    "success": False,
-                    "message": "Invalid engagement metrics format"
-                }), 400
-
-            # Validate and clean engagement metrics
-            cleaned_metrics = {
-                "views": clean_views_count(metrics.get('views', existing_trend['engagement_metrics']['views'])),
-                "published_time": str(metrics.get('published_time', existing_trend['engagement_metrics']['published_time'])),
-                "channel": str(metrics.get('channel', existing_trend['engagement_metrics']['channel'])),
-                "channel_link": str(metrics.get('channel_link', existing_trend['engagement_metrics']['channel_link'])),
-                "length": str(metrics.get('length', existing_trend['engagement_metrics']['length'])),
-                "thumbnail": str(metrics.get('thumbnail', existing_trend['engagement_metrics']['thumbnail'])),
-                "video_link": str(metrics.get('video_link', existing_trend['engagement_metrics']['video_link'])),
-                "video_id": str(metrics.get('video_id', existing_trend['engagement_metrics']['video_id'])),
-                "is_short": bool(metrics.get('is_short', existing_trend['engagement_metrics']['is_short']))
-            }
-            update_data['engagement_metrics'] = cleaned_metrics
+        updated_trend['_id'] = str(updated_trend['_id'])
+
+        return jsonify({
+            "success": True,
+            "message": "Trend updated successfully",
+            "data": updated_trend
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Error updating trend: {str(e)}"
+        }), 500
 
-        # Update sentiment score if provided
-        if 'sentiment_score' in data:
-            update_data['sentiment_score'] = data['sentiment_score']
 
-        # Add updated_at timestamp
-        update_data['updated_at'] = datetime.utcnow()
+@bp.route('/bulk', methods=['PATCH'])
+@token_required
+def bulk_update_trends(current_user):
+    """
+    Apply many trend edits in one bulk write.
+    Body: {"updates": [{"id": "...", "title": ..., "engagement_metrics": {...}}, ...], "ordered": false}
+    Each update carries the same fields as PUT /<trend_id>. Results come back per item,
+    in request order; with ordered=true the write stops at the first failure.
+    """
+    try:
+        data = request.get_json()
+        if not data or 'updates' not in data:
+            return jsonify({
+                "success": False,
+                "message": "No updates provided"
+            }), 400
 
-        # Perform the update
-        result = mongo.db.trends.update_one(
-            {'_id': ObjectId(trend_id)},
-            {'$set': update_data}
-        )
+        updates = data['updates']
+        if not isinstance(updates, list) or not updates:
+            return jsonify({
+                "success": False,
+                "message": "updates must be a non-empty array"
+            }), 400
 
-        if result.modified_count == 0:
+        max_updates = current_app.config['TREND_BULK_MAX_UPDATES']
+        if len(updates) > max_updates:
             return jsonify({
                 "success": False,
-                "message": "No changes made to the trend"
+                "message": f"At most {max_updates} updates per request"
             }), 400
 
-        # Get the updated trend
-        updated_trend = mongo.db.trends.find_one({'_id': ObjectId(trend_id)})
-        updated_trend['_id'] = str(updated_trend['_id'])
+        ordered = str(data.get('ordered', False)).lower() == 'true'
+
+        # Malformed items are reported in place; the rest go to the bulk write
+        results = [None] * len(updates)
+        edits, positions = [], []
+        for index, item in enumerate(updates):
+            trend_id = item.get('id') if isinstance(item, dict) else None
+            if not isinstance(trend_id, str) or not ObjectId.is_valid(trend_id):
+                results[index] = {"id": trend_id, "status": "invalid", "error": "Invalid trend ID format"}
+                if ordered:
+                    break
+                continue
+            edits.append((ObjectId(trend_id), {key: value for key, value in item.items() if key != 'id'}))
+            positions.append(index)
+
+        for index, (trend_id, _), result in zip(positions, edits, TrendService.bulk_update_trends(edits, ordered)):
+            results[index] = dict(result, id=str(trend_id))
+
+        if ordered:
+            # Nothing after the first failure is applied, whether the id check or the write caught it
+            first_failure = next(
+                (index for index, result in enumerate(results) if result is not None and result['status'] != 'updated'),
+                None
+            )
+            if first_failure is not None:
+                for later in range(first_failure + 1, len(updates)):
+                    later_id = updates[later].get('id') if isinstance(updates[later], dict) else None
+                    results[later] = {"id": later_id, "status": "skipped"}
+
+        counts = {}
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
 
         return jsonify({
-            "success": True,
-            "message": "Trend updated successfully",
-            "data": updated_trend
+            "success": counts.get('updated', 0) == len(results),
+            "message": f"Updated {counts.get('updated', 0)} of {len(results)} trends",
+            "ordered": ordered,
+            "counts": counts,
+            "results": results
         }), 200
 
     except Exception as e:
         return jsonify({
             "success": False,
-            "message": f"Error updating trend: {str(e)}"
+            "message": f"Error updating trends: {str(e)}"
         }), 500
 
 
@@ -427,12 +883,8 @@ class SocialMediaTrends:
         self.youtube_api_key = youtube_api_key
 
     def init_youtube(self):
-        """Initialize YouTube API client"""
-        os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
-        return googleapiclient.discovery.build(
-            "youtube", "v3", 
-            developerKey=self.youtube_api_key
-        )
+        """Return the shared YouTube API client (built once per worker thread)"""
+        return get_youtube_client(self.youtube_api_key)
 
     def get_youtube_trending_videos(self, region_code: str = "IN", max_results: int = 50) -> List[Dict]:
         """Fetch trending YouTube videos"""
@@ -450,6 +902,7 @@ class SocialMediaTrends:
             for item in response.get("items", []):
                 video_data = {
                     "title": item["snippet"]["title"],
+                    "video_id": item["id"],
                     "video_url": f"https://www.youtube.com/watch?v={item['id']}",
                     "views": int(item["statistics"].get("viewCount", 0)),
                     "likes": int(item["statistics"].get("likeCount", 0)),
@@ -459,6 +912,7 @@ class SocialMediaTrends:
                 }
                 trending_videos.append(video_data)
 
+            record_snapshots(trending_videos)
             return trending_videos
 
         except Exception as e:
@@ -485,6 +939,7 @@ def get_trending_videos():
     Optional query parameters:
     - region: Country code (default: 'IN')
     - max_results: Number of results (default: 50, max: 50)
+    - source: 'precomputed' to serve only harvested data
     """
     # Get query parameters with defaults
     region = request.args.get('region', 'IN')
@@ -492,6 +947,21 @@ def get_trending_videos():
     max_results = min(max_results, 50)  # Ensure max 50 results
 
     try:
+        if use_precomputed():
+            snapshot = get_snapshot('region', region.upper())
+            if not snapshot or not snapshot.get('data'):
+                return jsonify({
+                    "error": f"No precomputed trending videos for {region}",
+                    "message": "Failed to fetch trending videos"
+                }), 404
+            trending_videos = snapshot["data"][:max_results]
+            return jsonify({
+                "trending_videos": trending_videos,
+                "timestamp": snapshot["fetched_at"].strftime("%Y-%m-%d %H:%M:%S"),
+                "region": region,
+                "total_videos": len(trending_videos)
+            }), 200
+
         # Fetch trending videos
         trending_videos = tracker.get_youtube_trending_videos(
             region_code=region, 
@@ -514,9 +984,173 @@ def get_trending_videos():
             "message": "Failed to fetch trending videos"
         }), 500
 
+BATCH_MAX_KEYS = 25
+
+_batch_executor = None
+
+def get_batch_executor():
+    """Bounded pool shared by batch requests so upstream concurrency stays capped."""
+    global _batch_executor
+    if _batch_executor is None:
+        _batch_executor = ThreadPoolExecutor(
+            max_workers=current_app.config['TREND_BATCH_MAX_WORKERS'],
+            thread_name_prefix='trend-batch'
+        )
+    return _batch_executor
+
+@bp.route('/batch', methods=['POST'])
+@token_required
+def get_trends_batch(current_user):
+    """
+    Fetch several categories and/or regions concurrently.
+    Request body:
+    - categories: list of SearchAPI categories
+    - regions: list of YouTube region codes
+    - max_results: results per region (default: 50, max: 50)
+    - source: 'precomputed' to serve only harvested data
+    """
+    try:
+        data = request.get_json() or {}
+        categories = data.get('categories', [])
+        regions = data.get('regions', [])
+        if not isinstance(categories, list) or not isinstance(regions, list):
+            return jsonify({
+                "success": False,
+                "message": "categories and regions must be arrays"
+            }), 400
+
+        categories = list(dict.fromkeys(normalize_category(c) for c in categories if c))
+        regions = list(dict.fromkeys(str(r).strip().upper() for r in regions if r))
+        if not categories and not regions:
+            return jsonify({
+                "success": False,
+                "message": "Provide at least one category or region"
+            }), 400
+        if len(categories) + len(regions) > BATCH_MAX_KEYS:
+            return jsonify({
+                "success": False,
+                "message": f"At most {BATCH_MAX_KEYS} categories and regions per request"
+            }), 400
+
+        try:
+            max_results = parse_limit(data.get('max_results'), default=50, maximum=50)
+        except ValueError:
+            return jsonify({
+                "success": False,
+                "message": "max_results must be an integer"
+            }), 400
+        source = data.get('source') or request.args.get('source')
+        precomputed = source == 'precomputed' if source else current_app.config.get('TRENDS_PRECOMPUTED_ONLY', False)
+
+        results = {"categories": {}, "regions": {}}
+
+        if precomputed:
+            snapshot_ids = [f"category:{c}" for c in categories] + [f"region:{r}" for r in regions]
+            snapshots = {
+                doc['_id']: doc
+                for doc in mongo.db.trend_snapshots.find({'_id': {'$in': snapshot_ids}})
+            }
+            for kind, keys, group in (('category', categories, 'categories'), ('region', regions, 'regions')):
+                for key in keys:
+                    snapshot = snapshots.get(f"{kind}:{key}")
+                    if snapshot and snapshot.get('data'):
+                        items = snapshot['data'] if kind == 'category' else snapshot['data'][:max_results]
+                        results[group][key] = {"success": True, "data": items, "fetched_at": snapshot['fetched_at']}
+                    else:
+                        results[group][key] = {"success": False, "error": "No precomputed data"}
+            return jsonify({"success": True, "data": results}), 200
+
+        # Fan out every upstream call on the shared pool; wall time ~ slowest call
+        app = current_app._get_current_object()
+        executor = get_batch_executor()
+        futures = {}
+        for category in categories:
+            future = executor.submit(in_app_context, app, get_cached_trending_videos, category)
+            futures[future] = ('categories', category)
+        for region in regions:
+            future = executor.submit(
+                in_app_context, app, tracker.get_youtube_trending_videos,
+                region_code=region, max_results=max_results
+            )
+            futures[future] = ('regions', region)
+
+        done, not_done = wait(futures, timeout=current_app.config['TREND_BATCH_TIMEOUT'])
+        for future in not_done:
+            group, key = futures[future]
+            results[group][key] = {"success": False, "error": "Upstream request timed out"}
+
+        fetched = {}
+        for future in done:
+            group, key = futures[future]
+            try:
+                value = future.result()
+            except Exception as e:
+                results[group][key] = {"success": False, "error": str(e)}
+                continue
+            if group == 'regions':
+                if value:
+                    results[group][key] = {"success": True, "data": value}
+                else:
+                    results[group][key] = {"success": False, "error": f"No trending videos for {key}"}
+            elif value["success"]:
+                fetched[key] = value
+            else:
+                results[group][key] = {"success": False, "error": value["error"]}
+
+        # Persist every new upstream fetch with a single bulk upsert; categories
+        # served from the cache were stored by the request that fetched them
+        inserted = updated = 0
+        claimed = {category: value for category, value in fetched.items() if claim_fetch(value)}
+        by_video = {}
+        if claimed:
+            new_trends = [
+                TrendService.build_trend(item)
+                for value in claimed.values() for item in value["data"]
+            ]
+            try:
+                documents, inserted, updated = TrendService.upsert_trends(new_trends)
+            except Exception:
+                for value in claimed.values():
+                    release_fetch(value)
+                raise
+            by_video.update((doc['engagement_metrics']['video_id'], doc) for doc in documents)
+            # Views snapshots carry the time each category was fetched, not the time of this request
+            for value in claimed.values():
+                record_snapshots(
+                    (by_video[item["video_id"]]['engagement_metrics'] for item in value["data"]
+                     if item["video_id"] in by_video),
+                    ts=value["fetched_at"]
+                )
+        cached_ids = [
+            item["video_id"]
+            for category, value in fetched.items() if category not in claimed
+            for item in value["data"]
+        ]
+        if cached_ids:
+            by_video.update(
+                (doc['engagement_metrics']['video_id'], doc)
+                for doc in TrendService.find_by_video_ids(cached_ids)
+            )
+        for category, value in fetched.items():
+            trends = [by_video[item["video_id"]] for item in value["data"] if item["video_id"] in by_video]
+            results["categories"][category] = {"success": True, "data": trends, "count": len(trends)}
+
+        return jsonify({
+            "success": True,
+            "data": results,
+            "inserted": inserted,
+            "updated": updated
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Server error: {str(e)}"
+        }), 500
+
 ### For Instagram Hastags Trending #############
 
-def fetch_instagram_data_from_serpapi(query):
+def fetch_instagram_data_from_serpapi(query, timeout=None):
     try:
         SERPAPI_API_URL = current_app.config['SERPAPI_API_URL']
         SERPAPI_KEY = current_app.config['SERPAPI_KEY']
@@ -528,7 +1162,10 @@ def fetch_instagram_data_from_serpapi(query):
             'api_key': SERPAPI_KEY
         }
         
-        response = requests.get(SERPAPI_API_URL, params=params)
+        response = get_http_client().get(
+            SERPAPI_API_URL, params=params,
+            timeout=timeout or current_app.config['INSTAGRAM_FETCH_TIMEOUT']
+        )
         response.raise_for_status()
 
         data = response.json()
@@ -537,13 +1174,16 @@ def fetch_instagram_data_from_serpapi(query):
             return None
         
         return data
-    except requests.exceptions.RequestException as e:
+    except HttpError as e:
         current_app.logger.error(f"SerpAPI request failed: {str(e)}")
         return None
     except Exception as e:
         current_app.logger.error(f"Unexpected error in fetch_instagram_data_from_serpapi: {str(e)}")
         return None
 
+def fetch_instagram_hashtag(hashtag, timeout=None):
+    return fetch_instagram_data_from_serpapi(f"instagram {hashtag} trending", timeout=timeout)
+
 @bp.route('/ig', methods=['POST'])
 @token_required
 def create_instagram_trend(current_user):
@@ -555,23 +1195,24 @@ def create_instagram_trend(current_user):
         if not hashtag:
             return jsonify({"error": "Hashtag is required"}), 400
 
-        # Sanitize hashtag
-        hashtag = hashtag.strip().lower().replace('#', '')
+        hashtag = clean_hashtag(hashtag)
         
-        data = fetch_instagram_data_from_serpapi(f"instagram {hashtag} trending")
-        if not data:
+        # Concurrent and repeated requests for a hashtag share one fetch and one document
+        trend, created = get_or_create_instagram_trend(
+            hashtag, fetch_instagram_hashtag, current_app.config['INSTAGRAM_REUSE_SECONDS']
+        )
+        if not trend:
             return jsonify({"error": "Failed to fetch data from SerpApi"}), 500
 
-        instagram_trend = InstagramTrend(hashtag=hashtag, data=data)
-        result = mongo.db.instagram_trends.insert_one(instagram_trend.to_dict())
-        
-        # Add _id to the response
-        response_data = instagram_trend.to_dict()
-        response_data['_id'] = str(result.inserted_id)
-        
+        if not created:
+            return jsonify({
+                "message": "Instagram trend fetched recently or by a concurrent request; returning the latest one",
+                "trend": trend
+            }), 200
+
         return jsonify({
             "message": "Instagram trend created successfully", 
-            "trend": response_data
+            "trend": trend
         }), 201
 
     except Exception as e:
@@ -580,12 +1221,57 @@ def create_instagram_trend(current_user):
 
 @bp.route('/ig', methods=['GET'])   
 def get_instagram_trends():
+    """
+    Stored Instagram trends, newest first, one page at a time.
+    Optional query parameters:
+    - limit: page size (default: 50, max: 200)
+    - cursor: next_cursor from the previous page
+    - hashtag: hashtag prefix (e.g. 'food' matches 'food' and 'foodie')
+    - status: exact status (e.g. 'active')
+    - from, to: ISO 8601 bounds on created_at
+    - fields: comma-separated projection (e.g. 'hashtag,counts')
+    - include: 'data' to also return the raw SerpAPI response
+    """
     try:
-        trends = list(mongo.db.instagram_trends.find())
-        # Convert ObjectId to string for JSON serialization
-        for trend in trends:
-            trend['_id'] = str(trend['_id'])
-        return jsonify(trends), 200
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            projection = parse_fields(request.args.get('fields'), required=('_id', 'created_at'))
+            date_from = parse_date(request.args.get('from'), 'from')
+            date_to = parse_date(request.args.get('to'), 'to')
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        include_data = request.args.get('include') == 'data'
+        if projection is None:
+            projection = None if include_data else {"data": 0}
+        elif include_data:
+            projection.update({"data": 1, "raw_id": 1})
+
+        query = {}
+        hashtag = clean_hashtag(request.args.get('hashtag'))
+        if hashtag:
+            # Anchored prefix regex so the hashtag index is used
+            query['hashtag'] = {'$regex': f"^{re.escape(hashtag)}"}
+        status = request.args.get('status')
+        if status:
+            query['status'] = status
+        query.update(date_range_filter(date_from, date_to))
+
+        try:
+            trends, next_cursor = find_instagram_page(
+                query, limit, cursor=request.args.get('cursor'), projection=projection
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if include_data:
+            attach_raw_payloads(trends)
+
+        return jsonify({
+            "data": trends,
+            "count": len(trends),
+            "next_cursor": next_cursor
+        }), 200
     except Exception as e:
         current_app.logger.error(f"Error in get_instagram_trends: {str(e)}")
         return jsonify({"error": "An unexpected error occurred"}), 500
@@ -596,10 +1282,17 @@ def get_instagram_trend(id):
         if not ObjectId.is_valid(id):
             return jsonify({"error": "Invalid ID format"}), 400
 
-        trend = mongo.db.instagram_trends.find_one({"_id": ObjectId(id)})
+        # ?include=data returns the raw SerpAPI response as well
+        include_data = request.args.get('include') == 'data'
+        trend = mongo.db.instagram_trends.find_one(
+            instagram_id_filter(id), None if include_data else {"data": 0}
+        )
         if not trend:
             return jsonify({"error": "Trend not found"}), 404
-            
+
+        if include_data:
+            attach_raw_payload(trend)
+        mark_viewed(trend['_id'])
         trend['_id'] = str(trend['_id'])
         return jsonify(trend), 200
     except Exception as e:
@@ -616,7 +1309,7 @@ def update_instagram_trend(current_user, id):
         if not request.is_json:
             return jsonify({"error": "Request must be JSON"}), 400
 
-        trend = mongo.db.instagram_trends.find_one({"_id": ObjectId(id)})
+        trend = mongo.db.instagram_trends.find_one(instagram_id_filter(id), {"raw_id": 1})
         if not trend:
             return jsonify({"error": "Trend not found"}), 404
 
@@ -624,22 +1317,25 @@ def update_instagram_trend(current_user, id):
         if not hashtag:
             return jsonify({"error": "Hashtag not provided"}), 400
 
-        # Sanitize hashtag
-        hashtag = hashtag.strip().lower().replace('#', '')
+        hashtag = clean_hashtag(hashtag)
         
-        data = fetch_instagram_data_from_serpapi(f"instagram {hashtag} trending")
-        if not data:
-            return jsonify({"error": "Failed to fetch data from SerpApi"}), 500
-
-        update_result = mongo.db.instagram_trends.update_one(
-            {"_id": ObjectId(id)},
-            {"$set": {"hashtag": hashtag, "data": data}}
+        summary = fetch_instagram_summary(
+            hashtag, fetch_instagram_hashtag, current_app.config['INSTAGRAM_REUSE_SECONDS']
         )
+        if not summary:
+            return jsonify({"error": "Failed to fetch data from SerpApi"}), 500
 
-        if update_result.modified_count == 0:
-            return jsonify({"error": "No changes made"}), 400
+        # The summary is unchanged when this trend is itself the recent fetch being reused
+        if summary['raw_id'] != trend.get('raw_id'):
+            update_result = mongo.db.instagram_trends.update_one(
+                {"_id": trend['_id']},
+                {"$set": {"hashtag": hashtag, **summary}, "$unset": {"data": ""}}
+            )
+            if update_result.modified_count == 0:
+                return jsonify({"error": "No changes made"}), 400
+            release_raw_payload(trend.get('raw_id'))
 
-        updated_trend = mongo.db.instagram_trends.find_one({"_id": ObjectId(id)})
+        updated_trend = mongo.db.instagram_trends.find_one({"_id": trend['_id']})
         updated_trend['_id'] = str(updated_trend['_id'])
         
         return jsonify({
@@ -658,12 +1354,57 @@ def delete_instagram_trend(current_user, id):
         if not ObjectId.is_valid(id):
             return jsonify({"error": "Invalid ID format"}), 400
 
-        result = mongo.db.instagram_trends.delete_one({"_id": ObjectId(id)})
-        if result.deleted_count == 0:
+        trend = mongo.db.instagram_trends.find_one_and_delete(instagram_id_filter(id), {"raw_id": 1})
+        if not trend:
             return jsonify({"error": "Trend not found"}), 404
-            
+        release_raw_payload(trend.get('raw_id'))
+
         return jsonify({"message": "Instagram trend deleted successfully"}), 200
     except Exception as e:
         current_app.logger.error(f"Error in delete_instagram_trend: {str(e)}")
         return jsonify({"error": "An unexpected error occurred"}), 500
 
+@bp.route('/ig/refresh', methods=['POST'])
+@admin_required
+def refresh_instagram_trends(current_user):
+    """
+    Refresh tracked hashtags in the background under the SerpAPI rate limit.
+    Optional JSON body:
+    - hashtags: list of hashtags (default: every hashtag with an active trend)
+    - force: true to also refresh hashtags fetched within INSTAGRAM_REUSE_SECONDS
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        hashtags = data.get('hashtags')
+        if hashtags is not None and not isinstance(hashtags, list):
+            return jsonify({"error": "hashtags must be an array"}), 400
+        if hashtags:
+            hashtags = list(dict.fromkeys(h for h in map(clean_hashtag, hashtags) if h))
+
+        app = current_app._get_current_object()
+        plan = plan_refresh(app, hashtags, bool(data.get('force')))
+        selected, searches_left, skipped = plan
+        if not selected:
+            return jsonify({
+                "message": "No hashtags need refreshing",
+                "searches_left": searches_left,
+                "skipped_quota": skipped
+            }), 200
+        if not start_refresh(app, plan):
+            return jsonify({"error": "A refresh is already running"}), 409
+
+        return jsonify({
+            "message": "Instagram refresh started",
+            "selected": len(selected),
+            "searches_left": searches_left,
+            "skipped_quota": skipped
+        }), 202
+    except Exception as e:
+        current_app.logger.error(f"Error in refresh_instagram_trends: {str(e)}")
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@bp.route('/ig/refresh/status', methods=['GET'])
+@token_required
+def get_instagram_refresh_status(current_user):
+    """Progress and result of the last bulk refresh run."""
+    return jsonify(get_refresh_status()), 200
@@ -0,0 +1,339 @@
+import ipaddress
+import random
+import socket
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+from flask import current_app, request, jsonify
+from bson.errors import InvalidId
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import PyMongoError
+from extensions import mongo
+from services.http_client import get_http_client
+from utils.indexes import SetupOnce, create_indexes
+
+# One document per job; workers in any process claim queued jobs from here
+COLLECTION = 'ai_jobs'
+STATUSES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+
+TASKS = {}
+
+# Errors caused by the job's own input (missing document, bad payload); retrying cannot fix them
+PERMANENT_ERRORS = (ValueError, TypeError, LookupError, InvalidId)
+
+JOB_INDEXES = [
+    ([('status', ASCENDING), ('run_at', ASCENDING)], {'name': 'status_run_at'}),
+    ([('user_id', ASCENDING), ('created_at', ASCENDING)], {'name': 'user_id_created_at'}),
+    ([('expires_at', ASCENDING)], {'name': 'expires_at', 'expireAfterSeconds': 0}),
+]
+
+_pool = None
+_pool_lock = threading.Lock()
+_indexes = SetupOnce()
+
+
+def ai_task(name):
+    """Register a function as a job task; it is called as fn(**payload) and returns a JSON-serializable result."""
+    def register(fn):
+        TASKS[name] = fn
+        return fn
+    return register
+
+
+def ensure_job_indexes():
+    _indexes.run(lambda: create_indexes(mongo.db[COLLECTION], JOB_INDEXES))
+
+
+def check_webhook_url(url):
+    """
+    Raise ValueError unless url is an https URL whose host resolves only to public
+    addresses, so a job webhook cannot be pointed at internal services.
+    """
+    parts = urlsplit(str(url))
+    if parts.scheme != 'https' or not parts.hostname:
+        raise ValueError("webhook_url must be an https URL")
+    try:
+        port = parts.port or 443
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, port, proto=socket.IPPROTO_TCP)}
+    except (ValueError, OSError):
+        raise ValueError("webhook_url host could not be resolved")
+    for address in addresses:
+        address = ipaddress.ip_address(address.split('%')[0])
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        # is_global excludes private, loopback, link-local, shared and reserved ranges
+        if not address.is_global or address.is_multicast:
+            raise ValueError("webhook_url must not resolve to a private, loopback or link-local address")
+
+
+def serialize_job(job):
+    job = dict(job)
+    job['_id'] = str(job['_id'])
+    for field in ('created_at', 'run_at', 'started_at', 'finished_at', 'lease_until', 'expires_at'):
+        if isinstance(job.get(field), datetime):
+            job[field] = job[field].isoformat()
+    return job
+
+
+def submit_job(task, payload, user_id=None, webhook_url=None):
+    """
+    Queue a task and return its job id; the result is read back with get_job.
+    Raises ValueError for an unknown task or a webhook_url that check_webhook_url rejects.
+    """
+    if task not in TASKS:
+        raise ValueError(f"Unknown task: {task}")
+    if webhook_url:
+        check_webhook_url(webhook_url)
+    ensure_job_indexes()
+    now = datetime.utcnow()
+    job_id = mongo.db[COLLECTION].insert_one({
+        'task': task,
+        'payload': payload,
+        'user_id': user_id,
+        'webhook_url': webhook_url,
+        'status': 'queued',
+        'attempts': 0,
+        'max_attempts': current_app.config['AI_JOBS_MAX_ATTEMPTS'],
+        'created_at': now,
+        'run_at': now
+    }).inserted_id
+    pool = get_job_pool()
+    if pool is not None:
+        pool.wake()
+    return job_id
+
+
+def get_job(job_id):
+    return mongo.db[COLLECTION].find_one({'_id': job_id})
+
+
+def cancel_job(job_id):
+    """Cancel a job that has not started; True when it was still queued."""
+    result = mongo.db[COLLECTION].update_one(
+        {'_id': job_id, 'status': 'queued'},
+        {'$set': {'status': 'cancelled', 'finished_at': datetime.utcnow()}}
+    )
+    return result.modified_count > 0
+
+
+class JobWorkerPool:
+    """
+    Fixed number of worker threads that claim jobs from the ai_jobs collection.
+    A claim is a lease, renewed while the job runs: a job whose worker died is
+    picked up again once the lease expires. Failed attempts are retried with
+    jittered exponential backoff, except PERMANENT_ERRORS, which fail the job at once.
+    """
+
+    def __init__(self, app, workers=4, poll_seconds=1.0, lease_seconds=300,
+                 backoff_base=2.0, backoff_max=60.0, result_ttl=7 * 86400):
+        self.app = app
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.result_ttl = result_ttl
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stats = {'claimed': 0, 'succeeded': 0, 'failed': 0, 'retried': 0, 'webhook_errors': 0}
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'ai-job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def wake(self):
+        self._wakeup.set()
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['workers'] = self.workers
+        stats['alive'] = sum(thread.is_alive() for thread in self._threads)
+        return stats
+
+    def claim(self):
+        """Atomically take the next due job (or one with an expired lease)."""
+        now = datetime.utcnow()
+        return mongo.db[COLLECTION].find_one_and_update(
+            {'$or': [
+                {'status': 'queued', 'run_at': {'$lte': now}},
+                {'status': 'running', 'lease_until': {'$lt': now}}
+            ]},
+            {
+                '$set': {
+                    'status': 'running',
+                    'started_at': now,
+                    'lease_until': now + timedelta(seconds=self.lease_seconds)
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('run_at', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _run(self):
+        with self.app.app_context():
+            ensure_job_indexes()
+            while not self._stop.is_set():
+                try:
+                    job = self.claim()
+                except PyMongoError as e:
+                    self.app.logger.error(f"AI job claim failed: {str(e)}")
+                    job = None
+                if job is None:
+                    self._wakeup.wait(self.poll_seconds)
+                    self._wakeup.clear()
+                    continue
+                self._count('claimed')
+                self.execute(job)
+
+    def execute(self, job):
+        if job['attempts'] > job.get('max_attempts', 1):
+            # Reclaimed after its worker died during the last attempt
+            self._finish(job, {'status': 'failed', 'error': job.get('error') or 'Worker lease expired'})
+            self._count('failed')
+            return
+        task = TASKS.get(job['task'])
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), daemon=True)
+        heartbeat.start()
+        try:
+            if task is None:
+                raise ValueError(f"Unknown task: {job['task']}")
+            result = task(**job['payload'])
+        except Exception as e:
+            self._fail(job, str(e), retry=not isinstance(e, PERMANENT_ERRORS))
+            return
+        finally:
+            done.set()
+        self._finish(job, {'status': 'succeeded', 'result': result, 'error': None})
+        self._count('succeeded')
+
+    def _heartbeat(self, job, done):
+        """Extend the lease of a running job every third of the lease, so long jobs are not reclaimed."""
+        with self.app.app_context():
+            while not done.wait(self.lease_seconds / 3):
+                try:
+                    # attempts pins the lease to this claim; a reclaimed job is left alone
+                    mongo.db[COLLECTION].update_one(
+                        {'_id': job['_id'], 'status': 'running', 'attempts': job['attempts']},
+                        {'$set': {'lease_until': datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+                    )
+                except PyMongoError as e:
+                    self.app.logger.warning(f"AI job {job['_id']} lease renewal failed: {str(e)}")
+
+    def _fail(self, job, error, retry=True):
+        if retry and job['attempts'] < job.get('max_attempts', 1):
+            # Full jitter keeps retries of a burst of failed jobs from landing together
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** job['attempts'])))
+            mongo.db[COLLECTION].update_one({'_id': job['_id'], 'status': 'running'}, {'$set': {
+                'status': 'queued',
+                'error': error,
+                'run_at': datetime.utcnow() + timedelta(seconds=delay)
+            }, '$unset': {'lease_until': ''}})
+            self._count('retried')
+            return
+        self.app.logger.error(f"AI job {job['_id']} ({job['task']}) failed: {error}")
+        self._finish(job, {'status': 'failed', 'error': error})
+        self._count('failed')
+
+    def _finish(self, job, update):
+        now = datetime.utcnow()
+        update.update(finished_at=now, expires_at=now + timedelta(seconds=self.result_ttl))
+        job = mongo.db[COLLECTION].find_one_and_update(
+            {'_id': job['_id'], 'status': 'running'},
+            {'$set': update, '$unset': {'lease_until': ''}},
+            return_document=ReturnDocument.AFTER
+        )
+        if job and job.get('webhook_url'):
+            self._notify(job)
+
+    def _notify(self, job):
+        body = {key: job.get(key) for key in ('task', 'status', 'result', 'error', 'attempts')}
+        body['job_id'] = str(job['_id'])
+        try:
+            # Checked again at send time: the host may resolve differently than at submit
+            check_webhook_url(job['webhook_url'])
+            response = get_http_client().post(job['webhook_url'], json=body, retries=2, follow_redirects=False)
+            status = response.status_code
+        except Exception as e:
+            self.app.logger.warning(f"AI job {job['_id']} webhook failed: {str(e)}")
+            status = None
+        if status is None or status >= 400:
+            self._count('webhook_errors')
+        mongo.db[COLLECTION].update_one({'_id': job['_id']}, {'$set': {'webhook_status': status}})
+
+
+def get_job_pool():
+    """This process's worker pool, or None when jobs run elsewhere (flask ai_jobs worker)."""
+    return _pool
+
+
+def init_job_pool(app):
+    """
+    Run AI job workers inside the web process when AI_JOBS_WORKERS > 0. The pool
+    starts with the first request, so CLI commands and the reloader's parent
+    process never start workers.
+    """
+    if app.config['AI_JOBS_WORKERS'] <= 0:
+        return
+
+    @app.before_request
+    def start_ai_job_pool():
+        if _pool is None:
+            start_job_pool(app)
+
+
+def start_job_pool(app, workers=None):
+    """Start the in-process worker pool (once per process)."""
+    global _pool
+    workers = app.config['AI_JOBS_WORKERS'] if workers is None else workers
+    with _pool_lock:
+        if _pool is None and workers > 0:
+            _pool = JobWorkerPool(
+                app,
+                workers=workers,
+                poll_seconds=app.config['AI_JOBS_POLL_SECONDS'],
+                lease_seconds=app.config['AI_JOBS_LEASE_SECONDS'],
+                backoff_base=app.config['AI_JOBS_BACKOFF_BASE'],
+                backoff_max=app.config['AI_JOBS_BACKOFF_MAX'],
+                result_ttl=app.config['AI_JOBS_RESULT_TTL']
+            ).start()
+    return _pool
+
+
+def async_requested(data):
+    """True when the request asks for a job instead of waiting: ?async=true or "async": true in the body."""
+    value = request.args.get('async', (data or {}).get('async', False))
+    return str(value).lower() == 'true'
+
+
+def job_accepted(job_id):
+    """202 response for a queued job, pointing at its status endpoint."""
+    return jsonify({
+        'job_id': str(job_id),
+        'status': 'queued',
+        'status_url': f"/api/ai-jobs/{job_id}"
+    }), 202
+
+
+def get_job_stats():
+    counts = {status: 0 for status in STATUSES}
+    for row in mongo.db[COLLECTION].aggregate([{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]):
+        counts[row['_id']] = row['count']
+    return {'jobs': counts, 'pool': _pool.stats() if _pool is not None else None}
@@ -0,0 +1,219 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from bson import ObjectId
+from flask import current_app
+from extensions import mongo
+from models.content import Content
+from routes.ai_model import AIFunctions
+from services.ai_jobs import ai_task
+from services.media_service import run_media_pipeline, combined_requested
+from services.model_client import is_rate_limited, retry_after
+from utils.rate_limit import AdaptiveConcurrency
+
+SCRIPT_FIELDS = ('content_theme', 'video_format', 'tone', 'target_audience', 'keywords')
+REQUIRED_FIELDS = ('title', 'content_theme', 'video_format', 'tone', 'target_audience', 'platform')
+
+_model_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def build_content(data, user_id):
+    """Generate the script for a brief; returns (Content document, response body) without inserting."""
+    generated = None
+    if combined_requested(data):
+        # Script, sentiment and QC feedback from one model call (separate calls if the reply is invalid)
+        generated, _ = run_media_pipeline(
+            data['content_theme'], data['video_format'], data['tone'], data['target_audience'],
+            data.get('keywords', []), data['platform'],
+            force=bool(data.get('regenerate', False)), combined=True
+        )
+        generated_script = generated['script']
+    else:
+        generated_script = AIFunctions.generate_script(
+            content_theme=data['content_theme'],
+            video_format=data['video_format'],
+            tone=data['tone'],
+            target_audience=data['target_audience'],
+            keywords=data.get('keywords', []),
+            force=bool(data.get('regenerate', False))
+        )
+
+    content = Content(
+        title=data['title'],
+        content_theme=data['content_theme'],
+        target_audience=data['target_audience'],
+        video_format=data['video_format'],
+        tone=data['tone'],
+        platform=data['platform'],
+        keywords=data.get('keywords', []),
+        hashtags=data.get('hashtags', []),
+        user_id=user_id,
+        reference_files=data.get('reference_files', []),
+    )
+    content.generated_script = generated_script
+    content_dict = content.to_dict()
+    response = {'generated_script': generated_script}
+    if generated:
+        content_dict['sentiment'] = generated['sentiment']
+        content_dict['qc_feedback'] = generated['qc_feedback']
+        response.update(sentiment=generated['sentiment'], qc_feedback=generated['qc_feedback'],
+                        generation_mode=generated['mode'])
+
+    return content_dict, response
+
+
+@ai_task('content.create')
+def create_content(data, user_id):
+    """Generate the script for a brief and insert the Content; returns the response body."""
+    content_dict, response = build_content(data, user_id)
+    result = mongo.db.content.insert_one(content_dict)
+    return dict(response, message='Content created', id=str(result.inserted_id))
+
+
+@ai_task('content.update')
+def update_content(content_id, data, content=None):
+    """
+    Apply an edit to a Content, regenerating the script when a script field changed
+    (or regenerate is set, which also bypasses the script cache).
+    """
+    if content is None:
+        content = mongo.db.content.find_one({'_id': ObjectId(content_id)})
+        if not content:
+            raise ValueError('Content not found')
+    data = dict(data)
+    regenerate = bool(data.pop('regenerate', False))
+    data.pop('async', None)
+    data.pop('webhook_url', None)
+    if regenerate or any(field in data for field in SCRIPT_FIELDS):
+        data['generated_script'] = AIFunctions.generate_script(
+            content_theme=data.get('content_theme', content['content_theme']),
+            video_format=data.get('video_format', content['video_format']),
+            tone=data.get('tone', content['tone']),
+            target_audience=data.get('target_audience', content['target_audience']),
+            keywords=data.get('keywords', content.get('keywords', [])),
+            force=regenerate
+        )
+
+    mongo.db.content.update_one(
+        {'_id': ObjectId(content_id)},
+        {'$set': data}
+    )
+    return {'message': 'Content updated successfully', 'id': str(content_id),
+            'generated_script': data.get('generated_script')}
+
+
+def get_model_limiter():
+    """Process-wide adaptive limit on concurrent batch model calls, shared by all batch requests."""
+    global _model_limiter
+    if _model_limiter is None:
+        with _limiter_lock:
+            if _model_limiter is None:
+                _model_limiter = AdaptiveConcurrency(current_app.config['CONTENT_BATCH_CONCURRENCY'])
+    return _model_limiter
+
+
+def validate_brief(brief):
+    """Error message for a brief that cannot be generated, or None."""
+    if not isinstance(brief, dict):
+        return 'Brief must be an object'
+    missing = [field for field in REQUIRED_FIELDS if not brief.get(field)]
+    if missing:
+        return f"Missing required fields: {', '.join(missing)}"
+    return None
+
+
+def _build_with_backoff(app, limiter, brief, user_id, max_retries, backoff_base, backoff_max):
+    """build_content under the shared limiter, retrying rate-limited calls with jittered backoff."""
+    with app.app_context():
+        attempt = 0
+        while True:
+            attempt += 1
+            limiter.acquire()
+            try:
+                content_dict, response = build_content(brief, user_id)
+            except Exception as e:
+                limited = is_rate_limited(e)
+                limiter.release(rate_limited=limited)
+                if not limited or attempt > max_retries:
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(backoff_max, backoff_base * (2 ** attempt)))
+                time.sleep(min(delay, backoff_max))
+                continue
+            limiter.release()
+            return content_dict, response, attempt
+
+
+def generate_content_batch(briefs, user_id):
+    """
+    Generate scripts for many briefs and insert the resulting Content documents
+    with a single insert_many. Yields one progress event per brief as it finishes
+    ({"event": "item", "index", "status": generated | invalid | failed, ...}) and
+    a final {"event": "done"} with the inserted ids in brief order.
+    Scripts already generated are still inserted if the client goes away early.
+    """
+    app = current_app._get_current_object()
+    config = app.config
+    limiter = get_model_limiter()
+    executor = ThreadPoolExecutor(max_workers=config['CONTENT_BATCH_CONCURRENCY'], thread_name_prefix='content-batch')
+    started = time.perf_counter()
+    generated = {}
+    inserted = False
+    counts = {'generated': 0, 'invalid': 0, 'failed': 0}
+
+    def insert_generated():
+        if not generated:
+            return []
+        indexes = sorted(generated)
+        result = mongo.db.content.insert_many([generated[index] for index in indexes])
+        return [{'index': index, 'id': str(_id)} for index, _id in zip(indexes, result.inserted_ids)]
+
+    futures = {}
+    try:
+        for index, brief in enumerate(briefs):
+            error = validate_brief(brief)
+            if error:
+                counts['invalid'] += 1
+                yield {'event': 'item', 'index': index, 'status': 'invalid', 'error': error}
+                continue
+            future = executor.submit(
+                _build_with_backoff, app, limiter, brief, user_id,
+                config['CONTENT_BATCH_MAX_RETRIES'], config['CONTENT_BATCH_BACKOFF_BASE'], config['CONTENT_BATCH_BACKOFF_MAX']
+            )
+            futures[future] = index
+
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                content_dict, response, attempts = future.result()
+            except Exception as e:
+                counts['failed'] += 1
+                yield {'event': 'item', 'index': index, 'status': 'failed', 'error': str(e)}
+                continue
+            generated[index] = content_dict
+            counts['generated'] += 1
+            yield dict(response, event='item', index=index, status='generated', attempts=attempts)
+
+        ids = insert_generated()
+        inserted = True
+        yield {
+            'event': 'done',
+            'counts': counts,
+            'inserted': ids,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+            'limiter': limiter.stats()
+        }
+    finally:
+        # Client disconnected (or an error): stop queued briefs, keep the paid-for scripts
+        executor.shutdown(wait=False, cancel_futures=True)
+        if not inserted:
+            for future, index in futures.items():
+                if index not in generated and future.done() and not future.cancelled() and future.exception() is None:
+                    generated[index] = future.result()[0]
+            try:
+                insert_generated()
+            except Exception as e:
+                app.logger.error(f"Could not save generated batch content: {str(e)}")
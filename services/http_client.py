@@ -0,0 +1,209 @@
+import bisect
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import httpx
+from flask import current_app, has_app_context
+
+# Callers catch these instead of importing httpx themselves
+HttpError = httpx.HTTPError
+HttpTimeout = httpx.TimeoutException
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+RETRY_STATUSES = {429, 502, 503, 504}
+# Upper bounds (ms) of the per-host latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class _HostStats:
+    __slots__ = ('buckets', 'count', 'sum_ms', 'errors', 'retries', 'statuses')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.errors = 0
+        self.retries = 0
+        self.statuses = {}
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (None for +Inf)."""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS + (None,), self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def to_dict(self):
+        return {
+            'requests': self.count,
+            'errors': self.errors,
+            'retries': self.retries,
+            'mean_ms': round(self.sum_ms / self.count, 1) if self.count else 0.0,
+            'p50_ms': self.percentile(0.5) if self.count else 0,
+            'p95_ms': self.percentile(0.95) if self.count else 0,
+            'p99_ms': self.percentile(0.99) if self.count else 0,
+            'statuses': dict(self.statuses),
+            # Per-bucket (not cumulative) counts; le None is the +Inf bucket
+            'histogram_ms': [
+                {'le': bound, 'count': count}
+                for bound, count in zip(LATENCY_BUCKETS_MS + (None,), self.buckets)
+            ]
+        }
+
+
+class HttpClient:
+    """
+    Process-wide outbound HTTP client: keep-alive pools per host (HTTP/2 when
+    available), default connect/read timeouts, jittered retries for idempotent
+    calls and per-host latency histograms.
+    """
+
+    def __init__(self, connect_timeout=5.0, read_timeout=15.0, max_connections=100,
+                 max_keepalive=20, keepalive_expiry=30.0, http2=True, retries=2,
+                 backoff_base=0.25, backoff_max=4.0, user_agent=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+        options = {
+            'timeout': httpx.Timeout(read_timeout, connect=connect_timeout),
+            'limits': httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry
+            ),
+            'headers': {'User-Agent': user_agent} if user_agent else None,
+            'follow_redirects': True
+        }
+        try:
+            self._client = httpx.Client(http2=http2, **options)
+            self.http2 = http2
+        except ImportError:
+            # h2 not installed: keep-alive over HTTP/1.1 still avoids per-call handshakes
+            self._client = httpx.Client(**options)
+            self.http2 = False
+
+    def _record(self, host, elapsed_ms, status=None, error=False, retry=False):
+        with self._stats_lock:
+            stats = self._stats.get(host)
+            if stats is None:
+                stats = self._stats[host] = _HostStats()
+            stats.count += 1
+            stats.sum_ms += elapsed_ms
+            stats.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            if status is not None:
+                stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if error:
+                stats.errors += 1
+            if retry:
+                stats.retries += 1
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        # Full jitter keeps many workers from retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method, url, timeout=None, retries=None, **kwargs):
+        """
+        Send a request and return the httpx.Response.
+        timeout: read timeout in seconds for this call (connect timeout stays the default).
+        retries: attempts after the first; idempotent methods default to the client setting,
+        other methods are only retried when the connection could not be opened.
+        """
+        method = method.upper()
+        host = urlsplit(url).netloc
+        if timeout is not None:
+            kwargs['timeout'] = httpx.Timeout(timeout, connect=min(self.connect_timeout, timeout))
+        if retries is None:
+            retries = self.retries if method in IDEMPOTENT_METHODS else 0
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                # A failed connect never reached the server, so it is safe to retry any method
+                retryable = attempt < retries or (
+                    attempt < self.retries and isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                )
+                self._record(host, elapsed_ms, error=True, retry=retryable)
+                if not retryable:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            retryable = response.status_code in RETRY_STATUSES and attempt < retries
+            self._record(host, elapsed_ms, status=response.status_code,
+                         error=response.status_code >= 500, retry=retryable)
+            if not retryable:
+                return response
+            delay = self._backoff(attempt, response)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        with self._stats_lock:
+            hosts = {host: stats.to_dict() for host, stats in self._stats.items()}
+        return {'http2': self.http2, 'hosts': hosts}
+
+    def close(self):
+        self._client.close()
+
+
+def _config():
+    if has_app_context():
+        return current_app.config
+    from config.config import Config
+    return {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+
+
+def build_http_client(config):
+    return HttpClient(
+        connect_timeout=config['HTTP_CONNECT_TIMEOUT'],
+        read_timeout=config['HTTP_READ_TIMEOUT'],
+        max_connections=config['HTTP_MAX_CONNECTIONS'],
+        max_keepalive=config['HTTP_MAX_KEEPALIVE'],
+        keepalive_expiry=config['HTTP_KEEPALIVE_EXPIRY'],
+        http2=config['HTTP_HTTP2'],
+        retries=config['HTTP_RETRIES'],
+        backoff_base=config['HTTP_BACKOFF_BASE'],
+        backoff_max=config['HTTP_BACKOFF_MAX'],
+        user_agent=config['HTTP_USER_AGENT']
+    )
+
+
+def get_http_client():
+    """The shared client, built from config on first use (and again after a fork)."""
+    global _client
+    client = _client
+    if client is None or client[0] != os.getpid():
+        with _client_lock:
+            if _client is None or _client[0] != os.getpid():
+                _client = (os.getpid(), build_http_client(_config()))
+            client = _client
+    return client[1]
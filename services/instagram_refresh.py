@@ -0,0 +1,197 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pymongo import UpdateMany
+from pymongo.errors import BulkWriteError
+from extensions import mongo
+from services.http_client import get_http_client
+from services.instagram_service import fetch_instagram_summary, release_raw_payloads
+from utils.rate_limit import TokenBucket
+
+_bucket = None
+_run_lock = threading.Lock()
+_status = {'running': False, 'runs': 0}
+
+
+def get_serpapi_bucket(config):
+    """Process-wide limiter for bulk SerpAPI calls, sized from config on first use."""
+    global _bucket
+    if _bucket is None:
+        _bucket = TokenBucket(
+            config['INSTAGRAM_REFRESH_RATE_PER_SECOND'],
+            config['INSTAGRAM_REFRESH_BURST']
+        )
+    return _bucket
+
+
+def get_serpapi_searches_left(config):
+    """Searches left on the SerpAPI plan, or None when the account API is unavailable."""
+    try:
+        response = get_http_client().get(
+            config['SERPAPI_ACCOUNT_URL'],
+            params={'api_key': config['SERPAPI_KEY']},
+            timeout=config['INSTAGRAM_FETCH_TIMEOUT']
+        )
+        response.raise_for_status()
+        account = response.json()
+        left = account.get('total_searches_left', account.get('plan_searches_left'))
+        return int(left) if left is not None else None
+    except Exception as e:
+        print(f"Could not read SerpAPI account quota: {str(e)}")
+        return None
+
+
+def select_hashtags(hashtags=None, min_age_seconds=0, limit=None):
+    """
+    Hashtags to refresh, most recently viewed first, then stalest first.
+    Without an explicit list every hashtag with an active trend is considered.
+    Returns [{'hashtag', 'raw_ids', 'last_viewed_at', 'fetched_at'}].
+    """
+    match = {'hashtag': {'$in': hashtags}} if hashtags else {'status': 'active'}
+    pipeline = [
+        {'$match': match},
+        {'$group': {
+            '_id': '$hashtag',
+            'last_viewed_at': {'$max': '$last_viewed_at'},
+            'fetched_at': {'$max': {'$ifNull': ['$fetched_at', '$created_at']}},
+            'raw_ids': {'$addToSet': '$raw_id'}
+        }}
+    ]
+    if min_age_seconds > 0:
+        cutoff = datetime.utcnow() - timedelta(seconds=min_age_seconds)
+        pipeline.append({'$match': {'$or': [{'fetched_at': None}, {'fetched_at': {'$lt': cutoff}}]}})
+    # Missing last_viewed_at sorts lowest, so never-viewed hashtags go last
+    pipeline.append({'$sort': {'last_viewed_at': -1, 'fetched_at': 1, '_id': 1}})
+    if limit:
+        pipeline.append({'$limit': int(limit)})
+
+    return [{
+        'hashtag': group['_id'],
+        'raw_ids': [raw_id for raw_id in group['raw_ids'] if raw_id],
+        'last_viewed_at': group.get('last_viewed_at'),
+        'fetched_at': group.get('fetched_at')
+    } for group in mongo.db.instagram_trends.aggregate(pipeline) if group['_id']]
+
+
+def _refresh_one(app, bucket, hashtag, fetch, timeout):
+    with app.app_context():
+        if not bucket.acquire(timeout=app.config['INSTAGRAM_REFRESH_MAX_WAIT_SECONDS']):
+            return None, "Rate limit wait exceeded"
+        summary = fetch_instagram_summary(hashtag, lambda h: fetch(h, timeout=timeout))
+        if not summary:
+            return None, "Failed to fetch data from SerpApi"
+        return summary, None
+
+
+def refresh_hashtags(app, selected):
+    """
+    Refresh the selected hashtags concurrently under the SerpAPI rate limit and
+    write every result back with one bulk_write. Returns the run summary.
+    """
+    from routes.trend import fetch_instagram_hashtag
+
+    config = app.config
+    bucket = get_serpapi_bucket(config)
+    timeout = config['INSTAGRAM_FETCH_TIMEOUT']
+    started = time.monotonic()
+    operations, stale_raw_ids, errors = [], [], {}
+
+    with ThreadPoolExecutor(max_workers=config['INSTAGRAM_REFRESH_MAX_WORKERS']) as executor:
+        futures = {
+            executor.submit(_refresh_one, app, bucket, item['hashtag'], fetch_instagram_hashtag, timeout): item
+            for item in selected
+        }
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                summary, error = future.result()
+            except Exception as e:
+                summary, error = None, str(e)
+            if error:
+                errors[item['hashtag']] = error
+                continue
+            operations.append(UpdateMany(
+                {'hashtag': item['hashtag']},
+                {'$set': summary, '$unset': {'data': ''}}
+            ))
+            stale_raw_ids.extend(r for r in item['raw_ids'] if r != summary['raw_id'])
+
+    modified = 0
+    if operations:
+        with app.app_context():
+            try:
+                modified = mongo.db.instagram_trends.bulk_write(operations, ordered=False).modified_count
+            except BulkWriteError as e:
+                modified = e.details.get('nModified', 0)
+                app.logger.error(f"Instagram bulk refresh write errors: {e.details.get('writeErrors', [])[:5]}")
+            release_raw_payloads(stale_raw_ids)
+
+    return {
+        'selected': len(selected),
+        'refreshed': len(operations),
+        'failed': len(errors),
+        'modified': modified,
+        'errors': dict(list(errors.items())[:50]),
+        'duration_ms': int((time.monotonic() - started) * 1000)
+    }
+
+
+def plan_refresh(app, hashtags=None, force=False):
+    """Pick hashtags for a run, capped by the remaining SerpAPI quota minus the reserve."""
+    config = app.config
+    with app.app_context():
+        min_age = 0 if force else config['INSTAGRAM_REUSE_SECONDS']
+        selected = select_hashtags(hashtags, min_age, config['INSTAGRAM_REFRESH_MAX_HASHTAGS'])
+        searches_left = get_serpapi_searches_left(config) if selected else None
+    skipped = 0
+    if searches_left is not None:
+        allowed = max(0, searches_left - config['INSTAGRAM_REFRESH_QUOTA_RESERVE'])
+        skipped = max(0, len(selected) - allowed)
+        selected = selected[:allowed]
+    return selected, searches_left, skipped
+
+
+def _run(app, plan):
+    # Caller holds _run_lock
+    try:
+        selected, searches_left, skipped = plan
+        _status.update({'running': True, 'started_at': datetime.utcnow(), 'last_error': None})
+        result = refresh_hashtags(app, selected)
+        result['skipped_quota'] = skipped
+        result['searches_left'] = searches_left
+        _status['last_result'] = result
+    except Exception as e:
+        _status['last_error'] = str(e)
+        app.logger.error(f"Instagram bulk refresh failed: {str(e)}")
+    finally:
+        _status['running'] = False
+        _status['runs'] += 1
+        _status['finished_at'] = datetime.utcnow()
+        _run_lock.release()
+
+
+def run_refresh(app, hashtags=None, force=False):
+    """One blocking bulk refresh run (scheduled job); skipped if another run is active."""
+    if not _run_lock.acquire(blocking=False):
+        return False
+    try:
+        plan = plan_refresh(app, hashtags, force)
+    except Exception as e:
+        _run_lock.release()
+        app.logger.error(f"Instagram bulk refresh planning failed: {str(e)}")
+        return False
+    _run(app, plan)
+    return True
+
+
+def start_refresh(app, plan):
+    """Run a plan from plan_refresh in a background thread; False if a run is already active."""
+    if not _run_lock.acquire(blocking=False):
+        return False
+    threading.Thread(target=_run, args=(app, plan), daemon=True).start()
+    return True
+
+
+def get_refresh_status():
+    return dict(_status)
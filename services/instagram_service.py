@@ -0,0 +1,277 @@
+import json
+import re
+from datetime import datetime, timedelta
+from bson import Binary, ObjectId
+import zstandard
+from pymongo import ASCENDING, DESCENDING
+from extensions import mongo
+from models.trend import InstagramTrend
+from utils.indexes import SetupOnce, create_indexes
+from utils.pagination import encode_cursor, keyset_filter
+from utils.singleflight import SingleFlight
+
+# Raw SerpAPI responses, zstd-compressed and only read when a client asks for them
+RAW_COLLECTION = 'instagram_raw_payloads'
+
+MAX_POSTS = 50
+MAX_LINKS = 20
+MAX_SNIPPET = 300
+
+POST_LINK = re.compile(r'instagram\.com/(?:[\w.]+/)?(p|reel|reels|tv)/([\w-]+)', re.IGNORECASE)
+PROFILE_LINK = re.compile(r'instagram\.com/([\w.]+)/?(?:\?.*)?$', re.IGNORECASE)
+NOT_PROFILES = {'explore', 'p', 'reel', 'reels', 'tv', 'stories', 'accounts', 'popular'}
+
+INSTAGRAM_INDEXES = [
+    ([('hashtag', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)], {'name': 'hashtag_created_at_id'}),
+    ([('created_at', DESCENDING), ('_id', DESCENDING)], {'name': 'created_at_id'}),
+    ([('raw_id', ASCENDING)], {'name': 'raw_id', 'sparse': True}),
+]
+
+_compressor = zstandard.ZstdCompressor(level=10)
+_decompressor = zstandard.ZstdDecompressor()
+
+_indexes = SetupOnce()
+
+# Concurrent requests for the same hashtag share one SerpAPI call
+_flights = SingleFlight()
+
+SUMMARY_FIELDS = ('posts', 'links', 'counts', 'raw_id', 'fetched_at')
+
+
+def instagram_id_filter(trend_id):
+    """Match a trend by id whether it was stored as a string or an ObjectId."""
+    ids = [trend_id]
+    if ObjectId.is_valid(trend_id):
+        ids.append(ObjectId(trend_id))
+    return {'_id': {'$in': ids}}
+
+
+def _total_results(data):
+    total = (data.get('search_information') or {}).get('total_results')
+    if isinstance(total, (int, float)):
+        return int(total)
+    if isinstance(total, str):
+        digits = ''.join(ch for ch in total if ch.isdigit())
+        return int(digits) if digits else 0
+    return 0
+
+
+def extract_instagram_summary(data):
+    """
+    Reduce a SerpAPI Google response to the compact fields stored on the trend:
+    posts (Instagram posts/reels), links (other results) and counts.
+    """
+    posts, links = [], []
+    profiles = set()
+    organic = data.get('organic_results') or []
+
+    for result in organic:
+        if not isinstance(result, dict):
+            continue
+        link = str(result.get('link') or '')
+        title = str(result.get('title') or '')
+        snippet = str(result.get('snippet') or '')[:MAX_SNIPPET]
+        post = POST_LINK.search(link)
+        if post:
+            if len(posts) < MAX_POSTS:
+                posts.append({
+                    'position': result.get('position'),
+                    'type': 'reel' if post.group(1).lower().startswith('reel') else 'post',
+                    'shortcode': post.group(2),
+                    'title': title,
+                    'link': link,
+                    'snippet': snippet,
+                    'date': result.get('date')
+                })
+            continue
+        profile = PROFILE_LINK.search(link)
+        if profile and profile.group(1).lower() not in NOT_PROFILES:
+            profiles.add(profile.group(1).lower())
+        if len(links) < MAX_LINKS:
+            links.append({
+                'position': result.get('position'),
+                'title': title,
+                'link': link,
+                'source': result.get('source') or result.get('displayed_link'),
+                'snippet': snippet
+            })
+
+    counts = {
+        'total_results': _total_results(data),
+        'organic_results': len(organic),
+        'posts': sum(1 for p in posts if p['type'] == 'post'),
+        'reels': sum(1 for p in posts if p['type'] == 'reel'),
+        'profiles': len(profiles),
+        'related_searches': len(data.get('related_searches') or [])
+    }
+    return {'posts': posts, 'links': links, 'counts': counts}
+
+
+def archive_raw_payload(hashtag, data):
+    """Store the full response compressed in the side collection; returns its id as a string."""
+    raw = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    compressed = _compressor.compress(raw)
+    result = mongo.db[RAW_COLLECTION].insert_one({
+        'hashtag': hashtag,
+        'payload': Binary(compressed),
+        'encoding': 'zstd+json',
+        'size': len(raw),
+        'compressed_size': len(compressed),
+        'created_at': datetime.utcnow()
+    })
+    return str(result.inserted_id)
+
+
+def load_raw_payloads(raw_ids):
+    """Decompress several archived responses with one query; returns {raw_id: data}."""
+    ids = [ObjectId(raw_id) for raw_id in raw_ids if raw_id and ObjectId.is_valid(raw_id)]
+    if not ids:
+        return {}
+    return {
+        str(doc['_id']): json.loads(_decompressor.decompress(doc['payload']))
+        for doc in mongo.db[RAW_COLLECTION].find({'_id': {'$in': ids}}, {'payload': 1})
+    }
+
+
+def load_raw_payload(raw_id):
+    """Decompress an archived SerpAPI response, or None if it is missing."""
+    return load_raw_payloads([raw_id]).get(raw_id)
+
+
+def release_raw_payloads(raw_ids):
+    """Delete archived responses once no trend references them (reused fetches share one)."""
+    raw_ids = list({raw_id for raw_id in raw_ids if raw_id and ObjectId.is_valid(raw_id)})
+    if not raw_ids:
+        return 0
+    ensure_instagram_indexes()
+    referenced = set(mongo.db.instagram_trends.distinct('raw_id', {'raw_id': {'$in': raw_ids}}))
+    unused = [ObjectId(raw_id) for raw_id in raw_ids if raw_id not in referenced]
+    if not unused:
+        return 0
+    return mongo.db[RAW_COLLECTION].delete_many({'_id': {'$in': unused}}).deleted_count
+
+
+def release_raw_payload(raw_id):
+    release_raw_payloads([raw_id])
+
+
+def attach_raw_payload(trend):
+    """Fill trend['data'] from the archive for clients that asked for the raw response."""
+    if trend.get('data') is None and trend.get('raw_id'):
+        trend['data'] = load_raw_payload(trend['raw_id'])
+    return trend
+
+
+def attach_raw_payloads(trends):
+    """attach_raw_payload for a whole page, loading the archive in one query."""
+    missing = [t['raw_id'] for t in trends if t.get('data') is None and t.get('raw_id')]
+    payloads = load_raw_payloads(missing)
+    for trend in trends:
+        if trend.get('data') is None and trend.get('raw_id'):
+            trend['data'] = payloads.get(trend['raw_id'])
+    return trends
+
+
+def ensure_instagram_indexes():
+    """Create the indexes the Instagram trend listing relies on (once per process)."""
+    _indexes.run(lambda: create_indexes(mongo.db.instagram_trends, INSTAGRAM_INDEXES))
+
+
+def find_instagram_page(query, limit, cursor=None, projection=None):
+    """
+    One page of Instagram trends ordered by (created_at, _id) descending.
+    Returns (documents, next_cursor); next_cursor is None on the last page.
+    """
+    ensure_instagram_indexes()
+    if cursor:
+        query = {'$and': [query, keyset_filter('created_at', cursor)]} if query else keyset_filter('created_at', cursor)
+
+    documents = list(
+        mongo.db.instagram_trends.find(query, projection)
+        .sort([('created_at', DESCENDING), ('_id', DESCENDING)])
+        .limit(limit + 1)
+    )
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        next_cursor = encode_cursor(last.get('created_at'), last['_id'])
+
+    for doc in documents:
+        doc['_id'] = str(doc['_id'])
+    return documents, next_cursor
+
+
+def find_recent_instagram_trend(hashtag, max_age_seconds):
+    """Latest trend for hashtag if its response was fetched within max_age_seconds."""
+    if max_age_seconds <= 0:
+        return None
+    ensure_instagram_indexes()
+    trend = mongo.db.instagram_trends.find_one(
+        {'hashtag': hashtag, 'raw_id': {'$ne': None}},
+        {'data': 0},
+        sort=[('created_at', DESCENDING), ('_id', DESCENDING)]
+    )
+    if not trend:
+        return None
+    fetched_at = trend.get('fetched_at') or trend.get('created_at')
+    if not isinstance(fetched_at, datetime) or datetime.utcnow() - fetched_at > timedelta(seconds=max_age_seconds):
+        return None
+    trend['_id'] = str(trend['_id'])
+    return trend
+
+
+def fetch_instagram_summary(hashtag, fetch, max_age_seconds=0):
+    """
+    Compact summary (posts, links, counts, raw_id, fetched_at) for a sanitized hashtag.
+    Reuses a response fetched within max_age_seconds; otherwise calls fetch(hashtag)
+    once for all concurrent callers. Returns None when the upstream fetch fails.
+    """
+    def load():
+        recent = find_recent_instagram_trend(hashtag, max_age_seconds)
+        if recent:
+            return {field: recent.get(field) for field in SUMMARY_FIELDS}
+        data = fetch(hashtag)
+        if not data:
+            return None
+        summary = extract_instagram_summary(data)
+        summary['raw_id'] = archive_raw_payload(hashtag, data)
+        summary['fetched_at'] = datetime.utcnow()
+        return summary
+
+    return _flights.do(('fetch', hashtag), load)
+
+
+def get_or_create_instagram_trend(hashtag, fetch, max_age_seconds=0):
+    """
+    Create a trend for hashtag, or return the latest one when it was fetched
+    within max_age_seconds. Concurrent creates for the same hashtag share one
+    document. Returns (trend, created); trend is None when the fetch fails, and
+    created is True only for the caller whose call inserted the document.
+    """
+    def create():
+        recent = find_recent_instagram_trend(hashtag, max_age_seconds)
+        if recent:
+            return recent, False
+        summary = fetch_instagram_summary(hashtag, fetch)
+        if not summary:
+            return None, False
+        trend = InstagramTrend(hashtag=hashtag, **summary).to_dict()
+        mongo.db.instagram_trends.insert_one(trend)
+        return trend, True
+
+    (trend, created), shared = _flights.do_shared(('create', hashtag), create)
+    return trend, created and not shared
+
+
+def get_fetch_stats():
+    return _flights.stats()
+
+
+def mark_viewed(trend_id, min_interval_seconds=60):
+    """Record that a trend was viewed; at most one write per trend per interval."""
+    now = datetime.utcnow()
+    mongo.db.instagram_trends.update_one(
+        {'_id': trend_id, 'last_viewed_at': {'$not': {'$gte': now - timedelta(seconds=min_interval_seconds)}}},
+        {'$set': {'last_viewed_at': now}}
+    )
@@ -0,0 +1,159 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from flask import current_app
+from extensions import mongo
+from models.media import Media
+from routes.ai_model import AIFunctions, BUNDLE_MODEL
+from services.ai_jobs import ai_task
+from services.script_cache import get_script_cache, normalize_brief
+from utils.helpers import in_app_context
+
+_ai_executor = None
+
+
+def get_ai_executor():
+    """Pool for model calls made alongside the request thread, so total OpenAI concurrency stays capped."""
+    global _ai_executor
+    if _ai_executor is None:
+        _ai_executor = ThreadPoolExecutor(
+            max_workers=current_app.config['AI_PIPELINE_MAX_WORKERS'],
+            thread_name_prefix='ai-pipeline'
+        )
+    return _ai_executor
+
+
+def _timed(timings, stage, func, *args, **kwargs):
+    started = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        timings[stage] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def run_media_pipeline(content_theme, video_format, tone, target_audience, keywords, target_platform,
+                       force=False, combined=False):
+    """
+    Generate the AI parts of a media item as a small dependency graph:
+
+        script ──┬── sentiment
+                 └── qc_feedback (also needs visual_style)
+        visual_style, posting_time: local, computed while the script is generated
+
+    Sentiment runs on the pool while QC runs on the calling thread, so the two
+    model calls that only need the script overlap.
+    combined=True asks for script, sentiment and QC feedback in one JSON reply
+    and falls back to the graph above when that reply does not validate. Its
+    script goes through the script cache too: a cached script (unless force)
+    skips the combined call, and a new one is stored.
+    Returns (results, timings) where timings maps stage -> milliseconds and
+    results['mode'] is 'combined' or 'separate'.
+    """
+    timings = {}
+    started = time.perf_counter()
+
+    if combined:
+        brief = normalize_brief(content_theme, video_format, tone, target_audience, keywords)
+        cache = get_script_cache()
+        # With the script already cached, the separate calls below only need sentiment and QC
+        if force or cache.get(brief, BUNDLE_MODEL) is None:
+            visual_style = _timed(timings, 'visual_style', AIFunctions.suggest_visual_style, content_theme, target_platform)
+            posting_time = _timed(timings, 'posting_time', AIFunctions.suggest_posting_time, target_platform)
+            try:
+                bundle = _timed(
+                    timings, 'combined', AIFunctions.generate_script_bundle,
+                    content_theme, video_format, tone, target_audience, keywords, visual_style
+                )
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                # Invalid JSON, a reply missing fields, or an unexpected response shape
+                current_app.logger.warning(f"Combined generation reply rejected, falling back to separate calls: {str(e)}")
+            else:
+                cache.put(brief, BUNDLE_MODEL, bundle['script'])
+                timings['total'] = round((time.perf_counter() - started) * 1000, 1)
+                return dict(bundle, visual_style=visual_style, posting_time=posting_time, mode='combined'), timings
+
+    app = current_app._get_current_object()
+    executor = get_ai_executor()
+
+    # Combined mode keeps its scripts under the bundle model, also when it falls back here
+    script_future = executor.submit(
+        in_app_context, app, _timed, timings, 'script', AIFunctions.generate_script,
+        content_theme, video_format, tone, target_audience, keywords, force=force,
+        model=BUNDLE_MODEL if combined else None
+    )
+    visual_style = _timed(timings, 'visual_style', AIFunctions.suggest_visual_style, content_theme, target_platform)
+    posting_time = _timed(timings, 'posting_time', AIFunctions.suggest_posting_time, target_platform)
+    script = script_future.result()
+
+    sentiment_future = executor.submit(_timed, timings, 'sentiment', AIFunctions.analyze_sentiment, script)
+    try:
+        qc_feedback = _timed(timings, 'qc_feedback', AIFunctions.generate_qc_feedback, script, visual_style)
+    finally:
+        # Wait even when QC failed so the pooled call never outlives the request
+        sentiment = sentiment_future.result()
+
+    timings['total'] = round((time.perf_counter() - started) * 1000, 1)
+    return {
+        'script': script,
+        'visual_style': visual_style,
+        'sentiment': sentiment,
+        'qc_feedback': qc_feedback,
+        'posting_time': posting_time,
+        'mode': 'separate'
+    }, timings
+
+
+def create_media_with_ai(data):
+    """Run the AI pipeline for a media brief and insert the Media; returns (response body, timings)."""
+    target_platform = data.get('target_platform')
+
+    # Script first; sentiment and QC feedback then run concurrently, and the local
+    # visual style / posting time suggestions overlap with the model calls.
+    # generation_mode=combined gets all three from one model call instead.
+    generated, timings = run_media_pipeline(
+        data.get('content_theme'), data.get('video_format'), data.get('tone'), data.get('target_audience'),
+        data.get('keywords', []), target_platform,
+        force=bool(data.get('regenerate', False)), combined=combined_requested(data)
+    )
+    current_app.logger.info(f"Media AI pipeline timings (ms): {timings}")
+
+    # Create media object with generated AI content
+    media = Media(
+        content_id=ObjectId(),  # Generate a new ObjectId
+        visual_style=generated['visual_style'],
+        target_platform=target_platform,
+        video_length=data.get('video_length'),  # Video length from user input
+        custom_assets=data.get('custom_assets', []),
+        animation_settings=data.get('animation_settings', {}),
+        audio_settings=data.get('audio_settings', {}),
+        qc_feedback=generated['qc_feedback']
+    )
+    mongo.db.media.insert_one(media.to_dict())
+
+    return {
+        "message": "Media created successfully",
+        "content_id": str(media.content_id),
+        "script": generated['script'],
+        "visual_style": generated['visual_style'],
+        "sentiment": generated['sentiment'],
+        "qc_feedback": generated['qc_feedback'],
+        "posting_time": generated['posting_time'],
+        "generation_mode": generated['mode']
+    }, timings
+
+
+@ai_task('media.create')
+def create_media_task(data):
+    body, timings = create_media_with_ai(data)
+    return dict(body, timings=timings)
+
+
+def combined_requested(data):
+    """True when the request (or AI_GENERATION_MODE by default) selects the single-call 'combined' mode."""
+    mode = data.get('generation_mode') or current_app.config['AI_GENERATION_MODE']
+    return str(mode).strip().lower() == 'combined'
+
+
+def server_timing(timings):
+    """Server-Timing header value, e.g. 'script;dur=812.4, sentiment;dur=640.2'."""
+    return ', '.join(f"{stage};dur={ms}" for stage, ms in timings.items())
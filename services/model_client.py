@@ -0,0 +1,123 @@
+import json
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+import openai
+
+STUB_IMAGE_URL = 'https://example.invalid/stub-image.png'
+
+_chat_client = None
+_chat_client_lock = threading.Lock()
+
+
+class StubRateLimitError(Exception):
+    http_status = 429
+
+
+class StubModelClient:
+    """
+    Offline stand-in for the openai module (AI_MODEL_CLIENT=stub): same
+    ChatCompletion.create / Image.create call shapes, deterministic replies,
+    optional latency (AI_STUB_LATENCY_SECONDS) to exercise timeouts and queues.
+    """
+
+    @staticmethod
+    def _sleep():
+        time.sleep(float(os.getenv('AI_STUB_LATENCY_SECONDS', 0)))
+        # AI_STUB_RATE_LIMIT_PROBABILITY makes a share of calls fail like an upstream 429
+        if random.random() < float(os.getenv('AI_STUB_RATE_LIMIT_PROBABILITY', 0)):
+            raise StubRateLimitError("Rate limit reached (stub)")
+
+    @staticmethod
+    def _reply(model, messages):
+        system = messages[0]['content'] if messages else ''
+        prompt = messages[-1]['content'] if messages else ''
+        if 'JSON' in system:
+            return json.dumps({
+                'script': f"[stub {model}] {prompt[:200]}",
+                'sentiment': 'Neutral',
+                'qc_feedback': 'Stub QC feedback.'
+            })
+        return f"[stub {model}] {prompt[:200]}"
+
+    class ChatCompletion:
+        @staticmethod
+        def create(model, messages, **kwargs):
+            StubModelClient._sleep()
+            content = StubModelClient._reply(model, messages)
+            return {'choices': [{'message': {'role': 'assistant', 'content': content}}]}
+
+    class chat:
+        class completions:
+            """openai>=1 client shape (client.chat.completions.create), used for streaming."""
+
+            @staticmethod
+            def create(model, messages, stream=False, **kwargs):
+                StubModelClient._sleep()
+                words = StubModelClient._reply(model, messages).split(' ')
+                return iter([
+                    SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(
+                        content=word if i == len(words) - 1 else word + ' '
+                    ))])
+                    for i, word in enumerate(words)
+                ])
+
+    class Image:
+        @staticmethod
+        def create(prompt, n=1, size='1024x1024', **kwargs):
+            StubModelClient._sleep()
+            return {'data': [{'url': STUB_IMAGE_URL} for _ in range(n)]}
+
+
+def is_rate_limited(error):
+    """True for a model API 429 (legacy openai.error.RateLimitError, openai>=1 RateLimitError or the stub)."""
+    status = getattr(error, 'http_status', None) or getattr(error, 'status_code', None)
+    return status == 429 or type(error).__name__ == 'RateLimitError'
+
+
+def retry_after(error):
+    """Seconds from a Retry-After header on a rate-limit error, or None."""
+    headers = getattr(error, 'headers', None) or getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        value = headers.get('Retry-After') or headers.get('retry-after')
+        return float(value) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def get_model_client():
+    """The openai module, or the offline stub when AI_MODEL_CLIENT=stub."""
+    if os.getenv('AI_MODEL_CLIENT', 'openai').lower() == 'stub':
+        return StubModelClient
+    return openai
+
+
+def get_chat_client():
+    """Process-wide openai>=1 client (openai.OpenAI), or the offline stub when AI_MODEL_CLIENT=stub."""
+    global _chat_client
+    if os.getenv('AI_MODEL_CLIENT', 'openai').lower() == 'stub':
+        return StubModelClient
+    if _chat_client is None:
+        with _chat_client_lock:
+            if _chat_client is None:
+                _chat_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    return _chat_client
+
+
+def stream_chat(model, messages):
+    """
+    Text fragments of a streaming chat completion, through the openai>=1 client
+    (the module-level ChatCompletion API cannot stream there). Closing the
+    generator closes the upstream stream.
+    """
+    stream = get_chat_client().chat.completions.create(model=model, messages=messages, stream=True)
+    try:
+        for chunk in stream:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                yield text
+    finally:
+        if hasattr(stream, 'close'):
+            stream.close()
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+from extensions import mongo
+from utils.cache import TTLCache
+from utils.indexes import SetupOnce, create_indexes
+from utils.singleflight import SingleFlight
+
+# Second tier: survives restarts and is shared by every worker process
+COLLECTION = 'script_cache'
+KEY_VERSION = 1  # bump when the prompt template changes so old scripts stop matching
+CACHE_INDEXES = [([('expires_at', ASCENDING)], {'name': 'expires_at', 'expireAfterSeconds': 0})]
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _normalize(value):
+    """Case-folded text with whitespace collapsed."""
+    return ' '.join(str(value or '').split()).casefold()
+
+
+def normalize_brief(content_theme, video_format, tone, target_audience, keywords):
+    """Canonical form of a script brief: keywords case-folded, de-duplicated and sorted."""
+    if isinstance(keywords, str):
+        keywords = keywords.split(',')
+    return {
+        'content_theme': _normalize(content_theme),
+        'video_format': _normalize(video_format),
+        'tone': _normalize(tone),
+        'target_audience': _normalize(target_audience),
+        'keywords': sorted({_normalize(k) for k in keywords or [] if _normalize(k)})
+    }
+
+
+def script_cache_key(brief, model):
+    """sha256 of the normalized brief and the model name."""
+    payload = json.dumps({'v': KEY_VERSION, 'model': model, 'brief': brief}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ScriptCache:
+    """
+    Two-tier cache for generated scripts: an in-process LRU with TTL in front of
+    a Mongo collection (expired by a TTL index). Identical briefs generated
+    concurrently share one model call.
+    """
+
+    def __init__(self, ttl=3600, max_entries=512, store_ttl=7 * 86400):
+        self.memory = TTLCache(ttl=ttl, stale_ttl=0, max_entries=max_entries)
+        self.store_ttl = store_ttl
+        self._flights = SingleFlight()
+        self._indexes = SetupOnce()
+        self._lock = threading.Lock()
+        self._stats = {'store_hits': 0, 'store_misses': 0, 'store_errors': 0, 'generated': 0, 'forced': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _ensure_indexes(self):
+        self._indexes.run(lambda: create_indexes(mongo.db[COLLECTION], CACHE_INDEXES))
+
+    def _read_store(self, key):
+        try:
+            # The TTL monitor only runs once a minute, so expired documents are filtered here too
+            doc = mongo.db[COLLECTION].find_one(
+                {'_id': key, 'expires_at': {'$gt': datetime.utcnow()}}, {'script': 1}
+            )
+        except PyMongoError as e:
+            print(f"Script cache read failed: {str(e)}")
+            self._count('store_errors')
+            return None
+        return doc['script'] if doc else None
+
+    def _write_store(self, key, brief, model, script):
+        now = datetime.utcnow()
+        try:
+            mongo.db[COLLECTION].replace_one({'_id': key}, {
+                'script': script,
+                'model': model,
+                'brief': brief,
+                'created_at': now,
+                'expires_at': now + timedelta(seconds=self.store_ttl)
+            }, upsert=True)
+        except PyMongoError as e:
+            print(f"Script cache write failed: {str(e)}")
+            self._count('store_errors')
+
+    def _generate(self, key, brief, model, generate):
+        script = generate()
+        self._count('generated')
+        if script:
+            self._write_store(key, brief, model, script)
+        return script
+
+    def _load(self, key, brief, model, generate):
+        script = self._read_counted(key)
+        if script is not None:
+            return script
+        return self._generate(key, brief, model, generate)
+
+    def get(self, brief, model):
+        """Cached script for (brief, model) from either tier, or None; never calls the model."""
+        self._ensure_indexes()
+        key = script_cache_key(brief, model)
+        return self.memory.get_or_load(key, lambda: self._read_counted(key), cacheable=bool)
+
+    def put(self, brief, model, script):
+        """Store a script generated outside get_or_generate (e.g. streamed) in both tiers."""
+        self._ensure_indexes()
+        key = script_cache_key(brief, model)
+        self._count('generated')
+        self._write_store(key, brief, model, script)
+        self.memory.set(key, script)
+
+    def _read_counted(self, key):
+        script = self._read_store(key)
+        self._count('store_hits' if script is not None else 'store_misses')
+        return script
+
+    def get_or_generate(self, brief, model, generate, force=False):
+        """
+        Return the cached script for (brief, model), calling generate() on a miss.
+        force=True skips both tiers, generates a new script and replaces the cached one.
+        """
+        self._ensure_indexes()
+        key = script_cache_key(brief, model)
+        if force:
+            self._count('forced')
+            script = self._flights.do(('force', key), lambda: self._generate(key, brief, model, generate))
+            if script:
+                self.memory.set(key, script)
+            return script
+        return self.memory.get_or_load(
+            key, lambda: self._flights.do(key, lambda: self._load(key, brief, model, generate)), cacheable=bool
+        )
+
+    def invalidate(self, brief=None, model=None):
+        """Drop one brief from both tiers, or the in-process tier entirely when brief is None."""
+        if brief is None:
+            self.memory.invalidate()
+            return
+        key = script_cache_key(brief, model)
+        self.memory.invalidate(key)
+        mongo.db[COLLECTION].delete_one({'_id': key})
+
+    def stats(self):
+        memory = self.memory.stats()
+        with self._lock:
+            store = dict(self._stats)
+        flights = self._flights.stats()
+        lookups = memory['hits'] + memory['misses']
+        store_lookups = store['store_hits'] + store['store_misses']
+        return {
+            'memory': memory,
+            'store': dict(store, hit_rate=round(store['store_hits'] / store_lookups, 4) if store_lookups else 0.0),
+            'lookups': lookups,
+            # Share of lookups answered without a model call of their own: either tier,
+            # or joining an identical brief already being generated
+            'hit_rate': round((memory['hits'] + store['store_hits'] + flights['shared']) / lookups, 4) if lookups else 0.0,
+            'forced': store['forced'],
+            'generated': store['generated'],
+            'flights': flights
+        }
+
+
+def get_script_cache():
+    """Process-wide script cache, sized from app config."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ScriptCache(
+                    ttl=current_app.config['SCRIPT_CACHE_TTL'],
+                    max_entries=current_app.config['SCRIPT_CACHE_MAX_ENTRIES'],
+                    store_ttl=current_app.config['SCRIPT_CACHE_STORE_TTL']
+                )
+    return _cache
@@ -0,0 +1,123 @@
+import json
+import time
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+from extensions import mongo
+from routes.ai_model import AIFunctions, SCRIPT_MODEL
+from services.script_cache import get_script_cache, normalize_brief
+from utils.indexes import SetupOnce, create_indexes
+
+# One document per streamed generation: lets clients fetch the finished script
+# after a dropped connection, and carries cancel requests across workers
+COLLECTION = 'generated_scripts'
+CANCEL_CHECK_SECONDS = 1.0
+
+STREAM_INDEXES = [
+    ([('user_id', ASCENDING), ('created_at', ASCENDING)], {'name': 'user_id_created_at'}),
+]
+
+_indexes = SetupOnce()
+
+
+def ensure_stream_indexes():
+    _indexes.run(lambda: create_indexes(mongo.db[COLLECTION], STREAM_INDEXES))
+
+
+def sse(event, data):
+    """One server-sent event; data is JSON so newlines in tokens survive framing."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _finish(stream_id, status, script, error=None):
+    update = {'status': status, 'script': script, 'completed_at': datetime.utcnow()}
+    if error:
+        update['error'] = error
+    try:
+        mongo.db[COLLECTION].update_one({'_id': stream_id}, {'$set': update})
+    except PyMongoError as e:
+        print(f"Could not save streamed script {stream_id}: {str(e)}")
+
+
+def _cancel_requested(stream_id):
+    return mongo.db[COLLECTION].find_one({'_id': stream_id, 'cancel_requested': True}, {'_id': 1}) is not None
+
+
+def stream_script(content_theme, video_format, tone, target_audience, keywords, user_id=None, force=False, model=None):
+    """
+    Generate a script as server-sent events:
+    start {id} -> token {text} ... -> done {id, length, cached} | cancelled {id} | error {id, error}.
+    A cached script (unless force) is sent as a single token event. The assembled
+    script is saved to generated_scripts and the script cache when generation completes;
+    a client disconnect or a cancel request stops the upstream completion and
+    saves the partial script as 'cancelled'.
+    """
+    ensure_stream_indexes()
+    model = model or SCRIPT_MODEL
+    brief = normalize_brief(content_theme, video_format, tone, target_audience, keywords)
+    cache = get_script_cache()
+    stream_id = ObjectId()
+    mongo.db[COLLECTION].insert_one({
+        '_id': stream_id,
+        'user_id': user_id,
+        'brief': brief,
+        'model': model,
+        'status': 'streaming',
+        'created_at': datetime.utcnow()
+    })
+    yield sse('start', {'id': str(stream_id)})
+
+    cached = None if force else cache.get(brief, model)
+    if cached:
+        _finish(stream_id, 'completed', cached)
+        yield sse('token', {'text': cached})
+        yield sse('done', {'id': str(stream_id), 'length': len(cached), 'cached': True})
+        return
+
+    parts = []
+    status, error = 'cancelled', None
+    tokens = AIFunctions.stream_script(content_theme, video_format, tone, target_audience, keywords, model)
+    next_check = time.monotonic() + CANCEL_CHECK_SECONDS
+    try:
+        for text in tokens:
+            parts.append(text)
+            yield sse('token', {'text': text})
+            if time.monotonic() >= next_check:
+                next_check = time.monotonic() + CANCEL_CHECK_SECONDS
+                if _cancel_requested(stream_id):
+                    break
+        else:
+            status = 'completed'
+    except Exception as e:
+        status, error = 'failed', str(e)
+    finally:
+        # Also runs on client disconnect (GeneratorExit), closing the upstream request
+        tokens.close()
+        script = ''.join(parts)
+        _finish(stream_id, status, script, error)
+        if status == 'completed' and script:
+            cache.put(brief, model, script)
+
+    if status == 'completed':
+        yield sse('done', {'id': str(stream_id), 'length': len(script), 'cached': False})
+    elif status == 'failed':
+        yield sse('error', {'id': str(stream_id), 'error': error})
+    else:
+        yield sse('cancelled', {'id': str(stream_id)})
+
+
+def request_cancel(stream_id):
+    """Ask the worker streaming stream_id to stop; False when it is unknown or already finished."""
+    result = mongo.db[COLLECTION].update_one(
+        {'_id': stream_id, 'status': 'streaming'},
+        {'$set': {'cancel_requested': True}}
+    )
+    return result.matched_count > 0
+
+
+def get_streamed_script(stream_id):
+    doc = mongo.db[COLLECTION].find_one({'_id': stream_id})
+    if doc:
+        doc['_id'] = str(doc['_id'])
+    return doc
@@ -0,0 +1,192 @@
+import hashlib
+import re
+import zlib
+from datetime import datetime
+import numpy as np
+from bson import Binary, ObjectId
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+from extensions import mongo
+from utils.indexes import SetupOnce, create_indexes
+
+# One document per video: MinHash signature, LSH band keys and assigned cluster.
+# Kept out of `trends` so reads never carry the binary signatures.
+SIGNATURE_COLLECTION = 'trend_signatures'
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS  # 4 rows per band: pairs above ~0.5 Jaccard become candidates
+SHINGLE_SIZE = 4
+DEFAULT_THRESHOLD = 0.7  # estimated Jaccard needed to join a cluster
+
+MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(1337)  # fixed seed: signatures must be stable across processes
+_PERM_A = _rng.randint(1, MERSENNE_PRIME, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_PERM_B = _rng.randint(0, MERSENNE_PRIME, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+
+HANDLES = re.compile(r'[#@]\w+', re.UNICODE)
+NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+
+SIGNATURE_INDEXES = [([('bands', ASCENDING)], {'name': 'bands'})]
+
+_indexes = SetupOnce()
+
+
+def normalize_title(title):
+    """Lowercase, drop #hashtags/@mentions, emoji and punctuation, collapse whitespace."""
+    text = HANDLES.sub(' ', str(title or '').lower())
+    return ' '.join(NON_WORD.sub(' ', text).split())
+
+
+def shingle_hashes(text):
+    """Distinct 32-bit hashes of the character shingles of a normalized title."""
+    if not text:
+        return np.empty(0, dtype=np.uint64)
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    return np.fromiter(
+        (zlib.crc32(s.encode('utf-8')) % MERSENNE_PRIME for s in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+
+
+def minhash(hashes):
+    """NUM_PERM-value MinHash signature; (a * x + b) mod p stays below 2**62, so uint64 never wraps."""
+    values = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % MERSENNE_PRIME
+    return values.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature):
+    """One signed 64-bit key per LSH band (band index mixed in so bands never collide)."""
+    rows = signature.reshape(BANDS, ROWS)
+    return [
+        int.from_bytes(
+            hashlib.blake2b(rows[band].tobytes(), digest_size=8, salt=band.to_bytes(2, 'little')).digest(),
+            'little', signed=True
+        )
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def ensure_signature_indexes():
+    _indexes.run(lambda: create_indexes(mongo.db[SIGNATURE_COLLECTION], SIGNATURE_INDEXES))
+
+
+def assign_clusters(items, threshold=DEFAULT_THRESHOLD):
+    """
+    Incrementally place trends into near-duplicate clusters.
+    items: iterable of (video_id, title). Videos seen before keep their cluster;
+    new ones join the most similar existing or same-batch video at or above
+    threshold, or start a cluster of their own (and become its representative).
+    Returns {video_id: (cluster_id, is_representative)}.
+    """
+    items = list(dict(items).items())
+    if not items:
+        return {}
+    ensure_signature_indexes()
+    collection = mongo.db[SIGNATURE_COLLECTION]
+
+    assigned = {
+        doc['_id']: (doc['cluster_id'], doc.get('representative', False))
+        for doc in collection.find({'_id': {'$in': [vid for vid, _ in items]}}, {'cluster_id': 1, 'representative': 1})
+    }
+    pending = []
+    for video_id, title in items:
+        if video_id in assigned:
+            continue
+        hashes = shingle_hashes(normalize_title(title))
+        if not len(hashes):
+            # Nothing comparable left (emoji-only title): its own cluster, not indexed
+            assigned[video_id] = (str(ObjectId()), True)
+            continue
+        signature = minhash(hashes)
+        pending.append((video_id, signature, band_keys(signature)))
+    if not pending:
+        return assigned
+
+    # All stored candidates sharing at least one band with the batch, in one query
+    all_keys = list({key for _, _, keys in pending for key in keys})
+    buckets = {}
+    for doc in collection.find({'bands': {'$in': all_keys}}, {'bands': 1, 'signature': 1, 'cluster_id': 1}):
+        candidate = (np.frombuffer(doc['signature'], dtype='<u4'), doc['cluster_id'])
+        for key in doc['bands']:
+            buckets.setdefault(key, []).append(candidate)
+
+    new_docs = []
+    now = datetime.utcnow()
+    for video_id, signature, keys in pending:
+        best_score, best_cluster = 0.0, None
+        for key in keys:
+            for other, cluster_id in buckets.get(key, ()):
+                score = similarity(signature, other)
+                if score > best_score:
+                    best_score, best_cluster = score, cluster_id
+        representative = best_cluster is None or best_score < threshold
+        cluster_id = str(ObjectId()) if representative else best_cluster
+        assigned[video_id] = (cluster_id, representative)
+        # Later items in the same batch can match this one
+        for key in keys:
+            buckets.setdefault(key, []).append((signature, cluster_id))
+        new_docs.append({
+            '_id': video_id,
+            'bands': keys,
+            'signature': Binary(signature.astype('<u4').tobytes()),
+            'cluster_id': cluster_id,
+            'representative': representative,
+            'created_at': now
+        })
+
+    try:
+        collection.insert_many(new_docs, ordered=False)
+    except BulkWriteError:
+        pass  # a concurrent ingest stored the same video first
+    return assigned
+
+
+def backfill_clusters(batch_size=1000, threshold=DEFAULT_THRESHOLD):
+    """Assign clusters to stored trends that predate deduplication; returns the count updated."""
+    updated = 0
+    last_id = None
+    while True:
+        # Matches trends stored before clustering and those stored with clustering disabled (null)
+        query = {'cluster_id': None, 'engagement_metrics.video_id': {'$type': 'string'}}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        batch = list(
+            mongo.db.trends.find(query, {'title': 1, 'engagement_metrics.video_id': 1})
+            .sort('_id', 1).limit(batch_size)
+        )
+        if not batch:
+            return updated
+        last_id = batch[-1]['_id']
+        clusters = assign_clusters(
+            ((doc['engagement_metrics']['video_id'], doc.get('title')) for doc in batch), threshold
+        )
+        operations = [
+            UpdateOne({'_id': doc['_id']}, {'$set': {
+                'cluster_id': clusters[doc['engagement_metrics']['video_id']][0],
+                'cluster_rep': clusters[doc['engagement_metrics']['video_id']][1]
+            }})
+            for doc in batch
+        ]
+        updated += mongo.db.trends.bulk_write(operations, ordered=False).modified_count
+
+
+def collapse_clusters(documents):
+    """
+    Keep one document per cluster_id, preserving order: the cluster's representative
+    (cluster_rep, the first video seen) when it is in the list, otherwise the first listed member.
+    """
+    keep = {}
+    for index, doc in enumerate(documents):
+        key = doc.get('cluster_id') or ('doc', index)
+        if key not in keep or (doc.get('cluster_rep') and not documents[keep[key]].get('cluster_rep')):
+            keep[key] = index
+    return [documents[i] for i in sorted(keep.values())]
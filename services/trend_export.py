@@ -0,0 +1,97 @@
+from bson import ObjectId
+from bson.json_util import dumps, RELAXED_JSON_OPTIONS
+from extensions import mongo
+from utils.pagination import parse_date, date_range_filter
+from utils.helpers import clean_hashtag
+
+# Collections that can be exported and the type of their _id (instagram_trends stores string ids)
+EXPORT_COLLECTIONS = {
+    'trends': ObjectId,
+    'instagram_trends': str
+}
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 10000
+CHUNK_SIZE = 64 * 1024
+
+
+def build_export_query(collection, filters):
+    """
+    Mongo filter for an export from request args / CLI options.
+    Supported keys: after_id, from, to, platform, is_short (trends), hashtag, status (instagram_trends).
+    """
+    if collection not in EXPORT_COLLECTIONS:
+        raise ValueError(f"Unknown collection: {collection}")
+
+    query = {}
+    after_id = filters.get('after_id')
+    if after_id:
+        if EXPORT_COLLECTIONS[collection] is ObjectId:
+            if not ObjectId.is_valid(after_id):
+                raise ValueError("after_id must be a valid ObjectId")
+            after_id = ObjectId(after_id)
+        query['_id'] = {'$gt': after_id}
+
+    date_from = parse_date(filters.get('from'), 'from')
+    date_to = parse_date(filters.get('to'), 'to')
+    query.update(date_range_filter(date_from, date_to))
+
+    if collection == 'trends':
+        if filters.get('platform'):
+            query['platform'] = filters['platform']
+        if filters.get('is_short') is not None:
+            query['engagement_metrics.is_short'] = str(filters['is_short']).lower() == 'true'
+    else:
+        if filters.get('hashtag'):
+            query['hashtag'] = clean_hashtag(filters['hashtag'])
+        if filters.get('status'):
+            query['status'] = filters['status']
+    return query
+
+
+def iter_ndjson(collection, query, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield the matching documents as newline-delimited relaxed extended JSON,
+    in _id order so an interrupted export can resume from the last _id seen.
+    Only one cursor batch is held in memory at a time.
+    """
+    batch_size = max(1, min(int(batch_size), MAX_BATCH_SIZE))
+    cursor = mongo.db[collection].find(query).sort('_id', 1).batch_size(batch_size)
+    try:
+        buffer = []
+        size = 0
+        for doc in cursor:
+            line = dumps(doc, json_options=RELAXED_JSON_OPTIONS) + '\n'
+            buffer.append(line)
+            size += len(line)
+            if size >= CHUNK_SIZE:
+                yield ''.join(buffer).encode('utf-8')
+                buffer = []
+                size = 0
+        if buffer:
+            yield ''.join(buffer).encode('utf-8')
+    finally:
+        cursor.close()
+
+
+def zstd_stream(chunks, level=3):
+    """Compress a byte stream chunk by chunk into a single zstd frame."""
+    import zstandard
+
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(collection, filters, batch_size=DEFAULT_BATCH_SIZE, compress=None):
+    """NDJSON export generator, optionally zstd-compressed."""
+    query = build_export_query(collection, filters)
+    chunks = iter_ndjson(collection, query, batch_size)
+    if compress == 'zstd':
+        return zstd_stream(chunks)
+    if compress:
+        raise ValueError(f"Unsupported compression: {compress}")
+    return chunks
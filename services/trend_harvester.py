@@ -0,0 +1,206 @@
+import random
+import threading
+import time
+from datetime import datetime
+from extensions import mongo
+
+# Precomputed results, one document per harvested key ("category:gaming", "region:IN")
+SNAPSHOT_COLLECTION = 'trend_snapshots'
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+_job_status = {}
+
+
+def snapshot_id(kind, key):
+    return f"{kind}:{key}"
+
+
+def get_snapshot(kind, key):
+    """Latest precomputed result for a category or region, or None."""
+    return mongo.db[SNAPSHOT_COLLECTION].find_one({'_id': snapshot_id(kind, key)})
+
+
+def save_snapshot(kind, key, data, duration_ms):
+    now = datetime.utcnow()
+    mongo.db[SNAPSHOT_COLLECTION].update_one(
+        {'_id': snapshot_id(kind, key)},
+        {'$set': {
+            'kind': kind,
+            'key': key,
+            'data': data,
+            'count': len(data),
+            'fetched_at': now,
+            'last_success_at': now,
+            'duration_ms': duration_ms,
+            'last_error': None
+        }},
+        upsert=True
+    )
+
+
+def save_failure(kind, key, error, duration_ms):
+    mongo.db[SNAPSHOT_COLLECTION].update_one(
+        {'_id': snapshot_id(kind, key)},
+        {'$set': {
+            'kind': kind,
+            'key': key,
+            'last_error': error,
+            'last_error_at': datetime.utcnow(),
+            'duration_ms': duration_ms
+        }},
+        upsert=True
+    )
+
+
+def _record(job_id, started, success, error=None, count=0):
+    duration_ms = int((time.monotonic() - started) * 1000)
+    status = _job_status.setdefault(job_id, {'runs': 0, 'failures': 0, 'last_success_at': None})
+    status['runs'] += 1
+    status['last_run_at'] = datetime.utcnow()
+    status['last_duration_ms'] = duration_ms
+    if success:
+        status['last_success_at'] = status['last_run_at']
+        status['last_count'] = count
+        status['last_error'] = None
+    else:
+        status['failures'] += 1
+        status['last_error'] = error
+    return duration_ms
+
+
+def harvest_category(app, category):
+    """Fetch one SearchAPI category, upsert its trends and store the snapshot."""
+    from routes.trend import fetch_trending_videos, normalize_category, get_trend_cache, trend_cache_key, store_fetch
+
+    category = normalize_category(category)
+    job_id = snapshot_id('category', category)
+    started = time.monotonic()
+    with app.app_context():
+        try:
+            result = fetch_trending_videos(category)
+            if not result["success"]:
+                duration_ms = _record(job_id, started, False, result["error"])
+                save_failure('category', category, result["error"], duration_ms)
+                return
+            # Warm the request cache too, so live mode benefits from the harvest
+            get_trend_cache().set(trend_cache_key(category), result)
+            documents, _, _ = store_fetch(result)
+            duration_ms = _record(job_id, started, True, count=len(documents))
+            save_snapshot('category', category, documents, duration_ms)
+        except Exception as e:
+            duration_ms = _record(job_id, started, False, str(e))
+            app.logger.error(f"Trend harvest failed for {job_id}: {str(e)}")
+            try:
+                save_failure('category', category, str(e), duration_ms)
+            except Exception:
+                pass
+
+
+def harvest_region(app, region):
+    """Fetch the YouTube most-popular chart for a region and store the snapshot."""
+    from routes.trend import tracker
+
+    region = region.upper()
+    job_id = snapshot_id('region', region)
+    started = time.monotonic()
+    with app.app_context():
+        try:
+            videos = tracker.get_youtube_trending_videos(region_code=region, max_results=50)
+            if not videos:
+                duration_ms = _record(job_id, started, False, "No videos returned")
+                save_failure('region', region, "No videos returned", duration_ms)
+                return
+            duration_ms = _record(job_id, started, True, count=len(videos))
+            save_snapshot('region', region, videos, duration_ms)
+        except Exception as e:
+            duration_ms = _record(job_id, started, False, str(e))
+            app.logger.error(f"Trend harvest failed for {job_id}: {str(e)}")
+
+
+def get_harvester_status():
+    """In-process job state merged with the persisted snapshot metadata."""
+    persisted = {}
+    for doc in mongo.db[SNAPSHOT_COLLECTION].find({}, {'data': 0}):
+        persisted[doc['_id']] = doc
+    jobs = {}
+    for job_id in set(persisted) | set(_job_status):
+        job = dict(persisted.get(job_id, {}))
+        job.pop('_id', None)
+        job['process'] = _job_status.get(job_id)
+        jobs[job_id] = job
+    return {
+        'running': _scheduler is not None and _scheduler.running,
+        'jobs': jobs
+    }
+
+
+def init_harvester(app):
+    """
+    Run the harvester inside the web process when HARVESTER_ENABLED is set. The
+    scheduler starts with the first request, so CLI commands and the reloader's
+    parent process never harvest. With several web workers, leave it off and run
+    `flask trend harvest` once instead.
+    """
+    if not app.config.get('HARVESTER_ENABLED'):
+        return
+
+    @app.before_request
+    def start_trend_harvester():
+        if _scheduler is None:
+            start_harvester(app)
+
+
+def start_harvester(app):
+    """Start the harvest scheduler (once per process)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            return _scheduler
+        _scheduler = _build_scheduler(app)
+        _scheduler.start()
+    return _scheduler
+
+
+def _build_scheduler(app):
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    interval = app.config['HARVESTER_INTERVAL_SECONDS']
+    jitter = app.config['HARVESTER_JITTER_SECONDS']
+    scheduler = BackgroundScheduler(daemon=True)
+
+    targets = [('category', harvest_category, c) for c in app.config['HARVESTER_CATEGORIES']]
+    targets += [('region', harvest_region, r) for r in app.config['HARVESTER_REGIONS']]
+    for kind, func, key in targets:
+        # Spread first runs and every interval so several instances don't hit the upstream together
+        first_run = datetime.now().timestamp() + random.uniform(0, jitter)
+        scheduler.add_job(
+            func,
+            trigger='interval',
+            seconds=interval,
+            jitter=jitter,
+            next_run_time=datetime.fromtimestamp(first_run),
+            args=[app, key],
+            id=snapshot_id(kind, key),
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+
+    refresh_interval = app.config.get('INSTAGRAM_REFRESH_INTERVAL_SECONDS', 0)
+    if refresh_interval > 0:
+        from services.instagram_refresh import run_refresh
+        scheduler.add_job(
+            run_refresh,
+            trigger='interval',
+            seconds=refresh_interval,
+            jitter=jitter,
+            args=[app],
+            id='instagram:refresh',
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+
+    app.logger.info(f"Trend harvester scheduled {len(targets)} jobs every {interval}s")
+    return scheduler
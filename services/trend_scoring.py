@@ -0,0 +1,251 @@
+import itertools
+import re
+from datetime import datetime, timedelta
+import numpy as np
+from pymongo import DESCENDING, UpdateOne
+from extensions import mongo
+from utils.parsing import parse_duration
+
+# Weights for each normalized [0, 1] feature; overridden by TREND_SCORE_WEIGHTS
+DEFAULT_WEIGHTS = {
+    'views': 0.35,          # log-scaled view count
+    'velocity': 0.25,       # log-scaled views per hour since publishing
+    'freshness': 0.2,       # exponential decay on published age
+    'channel_frequency': 0.1,  # how often the channel appears among the candidates
+    'is_short': 0.0,        # 1 for Shorts
+    'length': 0.1           # closeness to TARGET_LENGTH_SECONDS on a log scale
+}
+FRESHNESS_HALF_LIFE_HOURS = 72.0
+TARGET_LENGTH_SECONDS = 8 * 60
+
+AGE_PATTERN = re.compile(r'(\d+)\s*(second|minute|hour|day|week|month|year)s?\s+ago', re.IGNORECASE)
+AGE_UNIT_HOURS = {
+    'second': 1 / 3600, 'minute': 1 / 60, 'hour': 1, 'day': 24,
+    'week': 168, 'month': 730, 'year': 8760
+}
+
+
+def parse_age_hours(text):
+    """'3 days ago' / 'Streamed 2 hours ago' -> hours, NaN when unknown."""
+    match = AGE_PATTERN.search(text or '')
+    if not match:
+        return np.nan
+    return int(match.group(1)) * AGE_UNIT_HOURS[match.group(2).lower()]
+
+
+def score_inputs(metrics, observed_at):
+    """
+    Numeric scoring inputs for the display strings present in metrics, stored next
+    to them at ingest and on edits: length_seconds from length ('12:34') and
+    published_at from published_time ('3 days ago' as of observed_at, else None).
+    """
+    inputs = {}
+    if 'length' in metrics:
+        inputs['length_seconds'] = parse_duration(metrics['length'])
+    if 'published_time' in metrics:
+        age = parse_age_hours(metrics['published_time'])
+        inputs['published_at'] = None if np.isnan(age) else observed_at - timedelta(hours=float(age))
+    return inputs
+
+
+def _channel_frequency(channels, count):
+    """How often each row's channel appears among the rows (no string sort)."""
+    index = {}
+    codes = np.fromiter((index.setdefault(c, len(index)) for c in channels), dtype=np.int64, count=count)
+    return np.bincount(codes)[codes].astype(np.float64) if count else np.empty(0)
+
+
+def load_columns(documents, now=None):
+    """
+    Turn in-memory trend documents into the column arrays used for scoring.
+    Documents stored before length_seconds/published_at existed are parsed from
+    their display strings, with the first-seen time standing in for an unknown publish time.
+    """
+    now = now or datetime.utcnow()
+    count = len(documents)
+    views = np.zeros(count, dtype=np.float64)
+    is_short = np.zeros(count, dtype=np.float64)
+    length = np.zeros(count, dtype=np.float64)
+    age_hours = np.zeros(count, dtype=np.float64)
+    channels = []
+
+    for i, doc in enumerate(documents):
+        metrics = doc.get('engagement_metrics') or {}
+        if 'length_seconds' not in metrics or 'published_at' not in metrics:
+            metrics = {**score_inputs(metrics, doc.get('last_seen_at') or now), **metrics}
+        views[i] = metrics.get('views') or 0
+        is_short[i] = 1.0 if metrics.get('is_short') else 0.0
+        length[i] = metrics.get('length_seconds') or 0
+        published = metrics.get('published_at') or doc.get('created_at')
+        if isinstance(published, datetime):
+            age_hours[i] = (now - published).total_seconds() / 3600
+        channels.append(metrics.get('channel') or '')
+
+    return {
+        'views': views,
+        'age_hours': np.maximum(age_hours, 0.0),
+        'is_short': is_short,
+        'channel_frequency': _channel_frequency(channels, count),
+        'length_seconds': length
+    }
+
+
+def _stored_column_expressions(now):
+    """Per-trend $push expressions for load_stored_columns; channel is counted afterwards."""
+    published = {'$ifNull': ['$engagement_metrics.published_at', {'$ifNull': ['$created_at', now]}]}
+    return {
+        'views': {'$ifNull': ['$engagement_metrics.views', 0]},
+        'age_hours': {'$divide': [{'$subtract': [now, published]}, 3600 * 1000]},
+        'is_short': {'$cond': [{'$eq': ['$engagement_metrics.is_short', True]}, 1, 0]},
+        'length_seconds': {'$ifNull': ['$engagement_metrics.length_seconds', 0]},
+        'channel': {'$ifNull': ['$engagement_metrics.channel', '']}
+    }
+
+
+def load_stored_columns(query, max_candidates, now=None):
+    """
+    Read the scoring columns of the newest `max_candidates` trends matching query.
+    Mongo packs the numeric inputs stored at ingest into one array per column and
+    bucket (the second of created_at), so the client decodes about 60 documents
+    instead of one per trend and never parses strings. Returns (ids, columns).
+    """
+    now = now or datetime.utcnow()
+    expressions = _stored_column_expressions(now)
+    group = {'_id': {'$second': '$created_at'}, 'ids': {'$push': '$_id'}}
+    group.update({name: {'$push': expression} for name, expression in expressions.items()})
+    buckets = list(mongo.db.trends.aggregate([
+        {'$match': query},
+        {'$sort': {'created_at': DESCENDING, '_id': DESCENDING}},
+        {'$limit': max_candidates},
+        {'$group': group}
+    ], allowDiskUse=True))
+
+    count = sum(len(bucket['ids']) for bucket in buckets)
+    chain = itertools.chain.from_iterable
+
+    def column(name):
+        return np.fromiter(chain(bucket[name] for bucket in buckets), dtype=np.float64, count=count)
+
+    ids = list(chain(bucket['ids'] for bucket in buckets))
+    columns = {
+        'views': column('views'),
+        'age_hours': np.maximum(column('age_hours'), 0.0),
+        'is_short': column('is_short'),
+        'channel_frequency': _channel_frequency(chain(bucket['channel'] for bucket in buckets), count),
+        'length_seconds': column('length_seconds')
+    }
+    return ids, columns
+
+
+def _normalize(values):
+    peak = values.max() if len(values) else 0
+    return values / peak if peak > 0 else np.zeros_like(values)
+
+
+def score_columns(columns, weights=None):
+    """Weighted sum of normalized features; returns one float64 score per trend."""
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    views = columns['views']
+    age = columns['age_hours']
+    length = columns['length_seconds']
+
+    features = {
+        'views': _normalize(np.log1p(views)),
+        'velocity': _normalize(np.log1p(views / (age + 1.0))),
+        'freshness': np.exp2(-age / FRESHNESS_HALF_LIFE_HOURS),
+        'channel_frequency': _normalize(np.log1p(columns['channel_frequency'])),
+        'is_short': columns['is_short'],
+        'length': np.where(
+            length > 0,
+            np.exp(-np.square(np.log(np.maximum(length, 1.0) / TARGET_LENGTH_SECONDS)) / 2),
+            0.0
+        )
+    }
+
+    score = np.zeros(len(views), dtype=np.float64)
+    for name, weight in weights.items():
+        if weight and name in features:
+            score += weight * features[name]
+    return score
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first, without sorting everything."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def rank_documents(documents, limit, weights=None):
+    """Return the top `limit` documents with a 'score' field, best first."""
+    if not documents:
+        return []
+    scores = score_columns(load_columns(documents), weights)
+    ranked = []
+    for i in top_k(scores, limit):
+        doc = documents[i]
+        doc['score'] = round(float(scores[i]), 6)
+        ranked.append(doc)
+    return ranked
+
+
+def rank_stored_trends(query, limit, projection=None, weights=None, max_candidates=500000):
+    """
+    Score the newest `max_candidates` trends matching query and return
+    (ranked, scored): the top `limit` full documents and how many trends were
+    scored. Only the winners are fetched in full.
+    """
+    ids, columns = load_stored_columns(query, max_candidates)
+    if not ids:
+        return [], 0
+    scores = score_columns(columns, weights)
+    best = top_k(scores, limit)
+    winners = [ids[i] for i in best]
+    score_by_id = {ids[i]: float(scores[i]) for i in best}
+
+    documents = {doc['_id']: doc for doc in mongo.db.trends.find({'_id': {'$in': winners}}, projection)}
+    ranked = []
+    for _id in winners:
+        doc = documents.get(_id)
+        if doc is None:
+            continue
+        doc['_id'] = str(doc['_id'])
+        doc['score'] = round(score_by_id[_id], 6)
+        ranked.append(doc)
+    return ranked, len(ids)
+
+
+def backfill_score_inputs(batch_size=1000):
+    """Store length_seconds/published_at on trends saved before they existed; returns the count updated."""
+    updated = 0
+    last_id = None
+    while True:
+        query = {'engagement_metrics.length_seconds': {'$exists': False}}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        batch = list(
+            mongo.db.trends.find(query, {
+                'engagement_metrics.length': 1, 'engagement_metrics.published_time': 1,
+                'last_seen_at': 1, 'created_at': 1
+            }).sort('_id', 1).limit(batch_size)
+        )
+        if not batch:
+            return updated
+        last_id = batch[-1]['_id']
+        operations = []
+        for doc in batch:
+            metrics = doc.get('engagement_metrics') or {}
+            # published_time is relative to the fetch the trend was last seen in
+            inputs = score_inputs(
+                {'length': metrics.get('length'), 'published_time': metrics.get('published_time')},
+                doc.get('last_seen_at') or doc.get('created_at') or datetime.utcnow()
+            )
+            operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {
+                f'engagement_metrics.{field}': value for field, value in inputs.items()
+            }}))
+        updated += mongo.db.trends.bulk_write(operations, ordered=False).modified_count
@@ -0,0 +1,199 @@
+import re
+from pymongo import ASCENDING, DESCENDING, TEXT, UpdateOne
+from pymongo.errors import PyMongoError
+from extensions import mongo
+from services.instagram_service import ensure_instagram_indexes
+from utils.indexes import SetupOnce, create_indexes
+
+TOKEN = re.compile(r'[^\W_]{2,}', re.UNICODE)
+MAX_TERMS = 64
+MAX_QUERY_LENGTH = 100
+MAX_OFFSET = 1000
+
+# Compact result rows; full documents stay behind /get_trends and /ig/<id>
+TREND_FIELDS = {
+    'title': 1,
+    'platform': 1,
+    'created_at': 1,
+    'cluster_id': 1,
+    'engagement_metrics.video_id': 1,
+    'engagement_metrics.views': 1,
+    'engagement_metrics.channel': 1,
+    'engagement_metrics.link': 1,
+    'engagement_metrics.thumbnail': 1,
+    'engagement_metrics.is_short': 1
+}
+INSTAGRAM_FIELDS = {'hashtag': 1, 'counts': 1, 'status': 1, 'created_at': 1, 'fetched_at': 1}
+# Trends store the channel title as a string, so it is indexed directly
+TEXT_WEIGHTS = {'title': 10, 'engagement_metrics.channel': 5}
+
+SEARCH_INDEXES = [
+    ([(field, TEXT) for field in TEXT_WEIGHTS], {
+        'name': 'trend_text',
+        'weights': TEXT_WEIGHTS,
+        # Titles mix languages; match words exactly instead of English stemming
+        'default_language': 'none'
+    }),
+    ([('search_terms', ASCENDING)], {'name': 'search_terms'}),
+]
+
+_indexes = SetupOnce()
+
+
+def tokenize(text):
+    """Lowercase word tokens of at least two characters, in order, without repeats."""
+    return list(dict.fromkeys(TOKEN.findall(str(text or '').lower())))
+
+
+def search_terms(title, channel=None):
+    """Terms stored on a trend for prefix (autocomplete) matching."""
+    return tokenize(f"{title or ''} {channel or ''}")[:MAX_TERMS]
+
+
+def term_fields(title, channel=None):
+    """
+    search_terms plus the title and channel terms it is built from; edits of one
+    side recompute search_terms from the other side's stored terms (term_updates).
+    """
+    return {
+        'title_terms': tokenize(title),
+        'channel_terms': tokenize(channel),
+        'search_terms': search_terms(title, channel)
+    }
+
+
+def term_updates(title=None, channel=None):
+    """
+    Aggregation $set expressions refreshing term_fields after an edit of title
+    and/or channel (None = not edited), for a pipeline update. The edited side is
+    tokenized here and the other is read from the stored title_terms/channel_terms,
+    so the edit and its terms are written together. Matches search_terms order:
+    title terms, then channel terms not already present.
+    """
+    # Tokens are word characters only, so they never read as $field paths
+    title_terms = tokenize(title) if title is not None else {'$ifNull': ['$title_terms', []]}
+    channel_terms = tokenize(channel) if channel is not None else {'$ifNull': ['$channel_terms', []]}
+    return {
+        'title_terms': title_terms,
+        'channel_terms': channel_terms,
+        'search_terms': {'$slice': [{'$concatArrays': [title_terms, {'$filter': {
+            'input': channel_terms,
+            'as': 'term',
+            'cond': {'$not': {'$in': ['$$term', title_terms]}}
+        }}]}, MAX_TERMS]}
+    }
+
+
+def _drop_stale_text_index():
+    """Drop a trend_text index built over other fields, so it can be recreated with TEXT_WEIGHTS."""
+    existing = mongo.db.trends.index_information().get('trend_text')
+    if existing and dict(existing.get('weights') or {}) != TEXT_WEIGHTS:
+        mongo.db.trends.drop_index('trend_text')
+
+
+def ensure_search_indexes(replace_stale=False):
+    """
+    Text index for relevance search and a multikey index for prefix matching (once
+    per process). replace_stale rebuilds a trend_text index left over from an
+    older definition; flask trend search-index does this.
+    """
+    if replace_stale:
+        try:
+            _drop_stale_text_index()
+        except PyMongoError as e:
+            print(f"Could not drop stale search index trend_text: {str(e)}")
+        _indexes.reset()
+    _indexes.run(lambda: create_indexes(mongo.db.trends, SEARCH_INDEXES))
+
+
+def _page(cursor, offset, limit):
+    return _page_rows(list(cursor.skip(offset).limit(limit + 1)), offset, limit)
+
+
+def _page_rows(documents, offset, limit):
+    """Trim up to limit + 1 rows read from offset to one page; returns (documents, next_offset)."""
+    next_offset = offset + limit if len(documents) > limit and offset + limit <= MAX_OFFSET else None
+    documents = documents[:limit]
+    for doc in documents:
+        doc['_id'] = str(doc['_id'])
+    return documents, next_offset
+
+
+def search_trends(query, limit=20, offset=0, prefix=False):
+    """
+    Trends matching query on title and channel.
+    Full-word mode ranks by text score (title weighted over channel), then views;
+    prefix mode treats the last word as a prefix and ranks by views.
+    Returns (documents, next_offset).
+    """
+    ensure_search_indexes()
+    terms = tokenize(query)
+    if not terms:
+        return [], None
+
+    if prefix:
+        *complete, partial = terms
+        condition = [{'search_terms': {'$regex': f"^{re.escape(partial)}"}}]
+        if complete:
+            condition.append({'search_terms': {'$all': complete}})
+        cursor = mongo.db.trends.find({'$and': condition}, TREND_FIELDS).sort(
+            [('engagement_metrics.views', DESCENDING), ('_id', DESCENDING)]
+        )
+        return _page(cursor, offset, limit)
+
+    projection = dict(TREND_FIELDS, score={'$meta': 'textScore'})
+    cursor = mongo.db.trends.find({'$text': {'$search': ' '.join(terms)}}, projection).sort(
+        [('score', {'$meta': 'textScore'}), ('engagement_metrics.views', DESCENDING)]
+    )
+    return _page(cursor, offset, limit)
+
+
+def search_instagram(query, limit=20, offset=0):
+    """
+    Instagram hashtags starting with any query word (or the whole query run
+    together), one row per hashtag from its latest fetch. Shorter hashtags sort
+    first, so exact matches lead.
+    Returns (documents, next_offset).
+    """
+    ensure_instagram_indexes()
+    terms = tokenize(query)
+    if not terms:
+        return [], None
+    candidates = list(dict.fromkeys([''.join(terms)] + terms))
+    condition = {'$or': [{'hashtag': {'$regex': f"^{re.escape(term)}"}} for term in candidates]}
+    cursor = mongo.db.instagram_trends.aggregate([
+        {'$match': condition},
+        {'$sort': {'hashtag': ASCENDING, 'created_at': DESCENDING, '_id': DESCENDING}},
+        {'$group': {'_id': '$hashtag', 'latest': {'$first': '$$ROOT'}}},
+        {'$replaceRoot': {'newRoot': '$latest'}},
+        {'$sort': {'hashtag': ASCENDING}},
+        {'$skip': offset},
+        {'$limit': limit + 1},
+        {'$project': INSTAGRAM_FIELDS}
+    ])
+    return _page_rows(list(cursor), offset, limit)
+
+
+def backfill_search_terms(batch_size=1000):
+    """Store term_fields on trends saved before search (or its title/channel terms) existed; returns the count updated."""
+    ensure_search_indexes(replace_stale=True)
+    updated = 0
+    last_id = None
+    while True:
+        query = {'channel_terms': {'$exists': False}}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        batch = list(
+            mongo.db.trends.find(query, {'title': 1, 'engagement_metrics.channel': 1})
+            .sort('_id', 1).limit(batch_size)
+        )
+        if not batch:
+            return updated
+        last_id = batch[-1]['_id']
+        operations = [
+            UpdateOne({'_id': doc['_id']}, {'$set': term_fields(
+                doc.get('title'), (doc.get('engagement_metrics') or {}).get('channel')
+            )})
+            for doc in batch
+        ]
+        updated += mongo.db.trends.bulk_write(operations, ordered=False).modified_count
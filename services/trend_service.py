@@ -1,3 +1,346 @@
+from datetime import datetime
+from flask import current_app
+from pymongo import UpdateOne, ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError
+from extensions import mongo
+from models.trend import Trend
+from utils.indexes import SetupOnce, create_indexes
+from utils.pagination import encode_cursor, keyset_filter
+from services.trend_velocity import record_snapshots
+from services.trend_dedup import assign_clusters
+from services.trend_search import term_fields, term_updates
+from services.trend_scoring import score_inputs
+from utils.parsing import parse_views
+
+# Editable engagement_metrics fields and how each value is cleaned
+METRIC_CLEANERS = {
+    'views': parse_views,
+    'published_time': str,
+    'channel': str,
+    'channel_link': str,
+    'length': str,
+    'thumbnail': str,
+    'video_link': str,
+    'video_id': str,
+    'is_short': bool
+}
+
+# Fields that are only written the first time a video is seen, so curated
+# values (status, sentiment, roi) and the original created_at survive re-fetches.
+INSERT_ONLY_FIELDS = ('created_at', 'sentiment_score', 'status', 'roi_potential', 'cluster_id', 'cluster_rep')
+
+# The unique index fails while legacy duplicates exist (flask trend merge-duplicates removes
+# them and retries at once); upserts keep working without it until a later retry succeeds.
+TREND_INDEXES = [
+    ([('engagement_metrics.video_id', ASCENDING)], {
+        'name': 'uniq_video_id',
+        'unique': True,
+        'partialFilterExpression': {'engagement_metrics.video_id': {'$type': 'string'}}
+    }),
+    ([('created_at', DESCENDING), ('_id', DESCENDING)], {'name': 'created_at_id'}),
+    ([('platform', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)], {'name': 'platform_created_at_id'}),
+]
+
+_indexes = SetupOnce()
+
+
 class TrendService:
-    # Methods and attributes of TrendService
-    pass
+    @staticmethod
+    def ensure_indexes():
+        """Create the indexes trend ingestion and reads rely on (once per process)."""
+        _indexes.run(lambda: create_indexes(mongo.db.trends, TREND_INDEXES))
+
+    @staticmethod
+    def merge_duplicates(batch_size=1000):
+        """
+        Remove repeated trends for the same video_id so uniq_video_id can be built.
+        The trend with the earliest created_at (then _id) is kept, with its curated
+        fields; the others are deleted. Returns the number of trends deleted.
+        """
+        groups = mongo.db.trends.aggregate([
+            {'$match': {'engagement_metrics.video_id': {'$type': 'string'}}},
+            {'$sort': {'created_at': ASCENDING, '_id': ASCENDING}},
+            {'$group': {'_id': '$engagement_metrics.video_id', 'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+            {'$match': {'count': {'$gt': 1}}}
+        ], allowDiskUse=True)
+
+        deleted = 0
+        duplicate_ids = []
+        for group in groups:
+            duplicate_ids.extend(group['ids'][1:])
+            if len(duplicate_ids) >= batch_size:
+                deleted += mongo.db.trends.delete_many({'_id': {'$in': duplicate_ids}}).deleted_count
+                duplicate_ids = []
+        if duplicate_ids:
+            deleted += mongo.db.trends.delete_many({'_id': {'$in': duplicate_ids}}).deleted_count
+
+        _indexes.reset()
+        TrendService.ensure_indexes()
+        return deleted
+
+    @staticmethod
+    def find_page(query, limit, cursor=None, projection=None):
+        """
+        One page of trends ordered by (created_at, _id) descending.
+        Returns (documents, next_cursor); next_cursor is None on the last page.
+        """
+        TrendService.ensure_indexes()
+        if cursor:
+            query = {'$and': [query, keyset_filter('created_at', cursor)]} if query else keyset_filter('created_at', cursor)
+
+        # Fetch one extra document to know whether another page exists
+        documents = list(
+            mongo.db.trends.find(query, projection)
+            .sort([('created_at', DESCENDING), ('_id', DESCENDING)])
+            .limit(limit + 1)
+        )
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            last = documents[-1]
+            next_cursor = encode_cursor(last.get('created_at'), last['_id'])
+
+        for doc in documents:
+            doc['_id'] = str(doc['_id'])
+        return documents, next_cursor
+
+    @staticmethod
+    def find_by_video_ids(video_ids):
+        """Stored trends for video_ids, in the given order; videos not stored are skipped."""
+        video_ids = list(dict.fromkeys(video_ids))
+        stored = {
+            doc['engagement_metrics']['video_id']: doc
+            for doc in mongo.db.trends.find({'engagement_metrics.video_id': {'$in': video_ids}})
+        }
+        documents = []
+        for video_id in video_ids:
+            doc = stored.get(video_id)
+            if doc is not None:
+                doc['_id'] = str(doc['_id'])
+                documents.append(doc)
+        return documents
+
+    @staticmethod
+    def build_update(data):
+        """
+        Turn a partial trend edit into dotted $set paths, so only the fields sent
+        are written (engagement_metrics.views rather than the whole subdocument).
+        Raises ValueError when nothing editable was sent or a value is malformed.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Update must be an object")
+        update = {}
+        if 'title' in data:
+            update['title'] = str(data['title']).strip()
+        if 'platform' in data:
+            update['platform'] = str(data['platform']).strip()
+        if 'sentiment_score' in data:
+            update['sentiment_score'] = data['sentiment_score']
+        if 'engagement_metrics' in data:
+            metrics = data['engagement_metrics']
+            if not isinstance(metrics, dict):
+                raise ValueError("Invalid engagement metrics format")
+            cleaned = {field: clean(metrics[field]) for field, clean in METRIC_CLEANERS.items() if field in metrics}
+            # Edited length/published_time also refresh the numeric inputs scoring reads
+            cleaned.update(score_inputs(cleaned, datetime.utcnow()))
+            for field, value in cleaned.items():
+                update[f'engagement_metrics.{field}'] = value
+        if not update:
+            raise ValueError("No valid fields to update")
+        update['updated_at'] = datetime.utcnow()
+        return update
+
+    @staticmethod
+    def build_write(update):
+        """
+        Update document for build_update's fields. A title or channel edit becomes a
+        pipeline update that also refreshes the search terms in the same write.
+        """
+        if 'title' not in update and 'engagement_metrics.channel' not in update:
+            return {'$set': update}
+        return [
+            # Pipeline values are expressions, so edited values go in as literals
+            {'$set': {path: {'$literal': value} for path, value in update.items()}},
+            {'$set': term_updates(update.get('title'), update.get('engagement_metrics.channel'))}
+        ]
+
+    @staticmethod
+    def update_trend(trend_id, data, projection=None):
+        """
+        Apply a partial edit and return the updated document (None if not found)
+        in one find_one_and_update, search terms included.
+        """
+        update = TrendService.build_update(data)
+        return mongo.db.trends.find_one_and_update(
+            {'_id': trend_id},
+            TrendService.build_write(update),
+            projection=projection,
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    def bulk_update_trends(edits, ordered=False):
+        """
+        Apply many partial edits with one bulk_write.
+        edits: list of (ObjectId, data). Returns one result per edit, in order:
+        {'status': 'updated' | 'not_found' | 'invalid' | 'error' | 'skipped', 'error'?}.
+        With ordered=True the write stops at the first failure and later edits are 'skipped'.
+        """
+        results = [None] * len(edits)
+        if not edits:
+            return results
+        operations, op_index = [], []
+
+        existing = {
+            doc['_id'] for doc in
+            mongo.db.trends.find({'_id': {'$in': list({_id for _id, _ in edits})}}, {'_id': 1})
+        }
+        for index, (trend_id, data) in enumerate(edits):
+            if trend_id not in existing:
+                results[index] = {'status': 'not_found'}
+            else:
+                try:
+                    update = TrendService.build_update(data)
+                except ValueError as e:
+                    results[index] = {'status': 'invalid', 'error': str(e)}
+            if results[index] is not None:
+                if ordered:
+                    for later in range(index + 1, len(edits)):
+                        results[later] = {'status': 'skipped'}
+                    break
+                continue
+            operations.append(UpdateOne({'_id': trend_id}, TrendService.build_write(update)))
+            op_index.append(index)
+
+        failed_at = {}
+        if operations:
+            try:
+                mongo.db.trends.bulk_write(operations, ordered=ordered)
+            except BulkWriteError as e:
+                for error in e.details.get('writeErrors', []):
+                    failed_at[error['index']] = error.get('errmsg', 'Write failed')
+        stop = min(failed_at) if ordered and failed_at else None
+
+        for position, index in enumerate(op_index):
+            if position in failed_at:
+                results[index] = {'status': 'error', 'error': failed_at[position]}
+            elif stop is not None and position > stop:
+                results[index] = {'status': 'skipped'}
+            else:
+                results[index] = {'status': 'updated'}
+        return results
+
+    @staticmethod
+    def build_trend(item, platform="YouTube"):
+        """Build a Trend model from a validated SearchAPI video item."""
+        return Trend(
+            title=item["title"],
+            platform=platform,
+            engagement_metrics={
+                "views": item["views"],
+                "published_time": item["published_time"],
+                "channel": item["channel"]["title"],
+                "channel_link": item["channel"]["link"],
+                "length": item["length"],
+                "thumbnail": item["thumbnail"],
+                "video_link": item["link"],
+                "video_id": item["video_id"],
+                "is_short": item.get("is_short", False)
+            },
+            sentiment_score=None
+        )
+
+    @staticmethod
+    def upsert_trends(trends, fetched_at=None):
+        """
+        Upsert a list of Trend objects keyed on engagement_metrics.video_id
+        with a single unordered bulk_write. fetched_at is the time of the
+        upstream fetch they came from; when given, each video's views are also
+        recorded as a snapshot at that time.
+        Returns (documents, inserted_count, updated_count).
+        """
+        TrendService.ensure_indexes()
+
+        # Collapse repeats of the same video inside one upstream response
+        docs_by_video = {}
+        for trend in trends:
+            doc = trend.to_dict()
+            docs_by_video[doc['engagement_metrics']['video_id']] = doc
+        if not docs_by_video:
+            return [], 0, 0
+
+        now = datetime.utcnow()
+        video_ids = list(docs_by_video)
+
+        # Near-duplicate titles share a cluster_id; only new videos are hashed
+        if current_app.config.get('TREND_DEDUP_ENABLED', True):
+            try:
+                clusters = assign_clusters(
+                    ((vid, docs_by_video[vid]['title']) for vid in video_ids),
+                    current_app.config.get('TREND_DEDUP_THRESHOLD', 0.7)
+                )
+                for vid, (cluster_id, representative) in clusters.items():
+                    docs_by_video[vid]['cluster_id'] = cluster_id
+                    docs_by_video[vid]['cluster_rep'] = representative
+            except Exception as e:
+                print(f"Error assigning trend clusters: {str(e)}")
+
+        operations = []
+        for video_id in video_ids:
+            doc = docs_by_video[video_id]
+            doc['last_seen_at'] = now
+            doc['engagement_metrics'].update(score_inputs(doc['engagement_metrics'], fetched_at or now))
+            doc.update(term_fields(doc['title'], doc['engagement_metrics'].get('channel')))
+            set_fields = {k: v for k, v in doc.items() if k not in INSERT_ONLY_FIELDS}
+            insert_fields = {k: doc[k] for k in INSERT_ONLY_FIELDS}
+            operations.append(UpdateOne(
+                {'engagement_metrics.video_id': video_id},
+                {'$set': set_fields, '$setOnInsert': insert_fields},
+                upsert=True
+            ))
+
+        try:
+            result = mongo.db.trends.bulk_write(operations, ordered=False)
+            inserted = result.upserted_count
+            updated = result.matched_count
+            upserted_ids = result.upserted_ids
+        except BulkWriteError as e:
+            # A concurrent fetch may have inserted the same video first; the
+            # remaining operations were still applied because the write is unordered.
+            details = e.details
+            print(f"Bulk trend upsert reported {len(details.get('writeErrors', []))} errors")
+            inserted = details.get('nUpserted', 0)
+            updated = details.get('nMatched', 0)
+            upserted_ids = {u['index']: u['_id'] for u in details.get('upserted', [])}
+
+        for index, _id in upserted_ids.items():
+            docs_by_video[video_ids[index]]['_id'] = _id
+
+        # Every upstream fetch is also a views observation for velocity ranking
+        if fetched_at is not None:
+            record_snapshots(
+                (docs_by_video[vid]['engagement_metrics'] for vid in video_ids), ts=fetched_at
+            )
+
+        # Existing videos keep their original _id and created_at; read those back in one query
+        existing_ids = [vid for vid in video_ids if '_id' not in docs_by_video[vid]]
+        if existing_ids:
+            stored = mongo.db.trends.find(
+                {'engagement_metrics.video_id': {'$in': existing_ids}},
+                {'engagement_metrics.video_id': 1, 'created_at': 1, 'status': 1,
+                 'sentiment_score': 1, 'roi_potential': 1, 'cluster_id': 1, 'cluster_rep': 1}
+            )
+            for item in stored:
+                doc = docs_by_video[item['engagement_metrics']['video_id']]
+                doc['_id'] = item['_id']
+                for field in INSERT_ONLY_FIELDS:
+                    if field in item:
+                        doc[field] = item[field]
+
+        documents = []
+        for video_id in video_ids:
+            doc = docs_by_video[video_id]
+            if '_id' in doc:
+                doc['_id'] = str(doc['_id'])
+            documents.append(doc)
+        return documents, inserted, updated
@@ -0,0 +1,131 @@
+from pymongo import ASCENDING, DESCENDING
+from extensions import mongo
+from utils.indexes import SetupOnce, create_indexes
+from utils.pagination import date_range_filter
+
+# Trends store the channel title as a string (TrendService.build_trend keeps item["channel"]["title"])
+CHANNEL_KEY = '$engagement_metrics.channel'
+VIEWS = {'$ifNull': ['$engagement_metrics.views', 0]}
+
+# Every stats pipeline starts with a created_at range (optionally with platform),
+# and the platform/shorts/daily groups only read fields that are in these keys
+STATS_INDEXES = [
+    ([('created_at', DESCENDING), ('platform', ASCENDING), ('engagement_metrics.is_short', ASCENDING),
+      ('engagement_metrics.views', DESCENDING)], {'name': 'stats_created_at_platform_short_views'}),
+    ([('platform', ASCENDING), ('created_at', DESCENDING), ('engagement_metrics.is_short', ASCENDING),
+      ('engagement_metrics.views', DESCENDING)], {'name': 'stats_platform_created_at_short_views'}),
+]
+
+_indexes = SetupOnce()
+
+
+def ensure_stats_indexes():
+    """Indexes for the stats pipelines (once per process)."""
+    _indexes.run(lambda: create_indexes(mongo.db.trends, STATS_INDEXES))
+
+
+def build_stats_match(date_from, date_to, platform=None, dedup=False):
+    match = date_range_filter(date_from, date_to)
+    if platform:
+        match['platform'] = platform
+    if dedup:
+        match['cluster_rep'] = {'$ne': False}
+    return match
+
+
+def channel_stats(match, limit=20):
+    """Top channels by total views: trends, views, average views and shorts per channel."""
+    pipeline = [
+        {'$match': match},
+        {'$group': {
+            '_id': CHANNEL_KEY,
+            'trends': {'$sum': 1},
+            'views': {'$sum': VIEWS},
+            'shorts': {'$sum': {'$cond': ['$engagement_metrics.is_short', 1, 0]}},
+            'platforms': {'$addToSet': '$platform'}
+        }},
+        {'$match': {'_id': {'$nin': [None, '', 'Unknown']}}},
+        {'$sort': {'views': -1, 'trends': -1}},
+        {'$limit': limit}
+    ]
+    return [{
+        'channel': row['_id'],
+        'trends': row['trends'],
+        'views': row['views'],
+        'avg_views': round(row['views'] / row['trends'], 1) if row['trends'] else 0,
+        'shorts': row['shorts'],
+        'platforms': sorted(p for p in row['platforms'] if p)
+    } for row in mongo.db.trends.aggregate(pipeline)]
+
+
+def platform_stats(match):
+    """Trends and total/average views per platform."""
+    pipeline = [
+        {'$match': match},
+        {'$project': {'_id': 0, 'platform': 1, 'views': VIEWS}},
+        {'$group': {'_id': '$platform', 'trends': {'$sum': 1}, 'views': {'$sum': '$views'}, 'max_views': {'$max': '$views'}}},
+        {'$sort': {'views': -1}}
+    ]
+    return [{
+        'platform': row['_id'],
+        'trends': row['trends'],
+        'views': row['views'],
+        'avg_views': round(row['views'] / row['trends'], 1) if row['trends'] else 0,
+        'max_views': row['max_views']
+    } for row in mongo.db.trends.aggregate(pipeline)]
+
+
+def shorts_stats(match):
+    """Short vs long split of trend counts and views, with ratios."""
+    pipeline = [
+        {'$match': match},
+        {'$project': {'_id': 0, 'is_short': {'$eq': ['$engagement_metrics.is_short', True]}, 'views': VIEWS}},
+        {'$group': {'_id': '$is_short', 'trends': {'$sum': 1}, 'views': {'$sum': '$views'}}}
+    ]
+    groups = {row['_id']: row for row in mongo.db.trends.aggregate(pipeline)}
+    short = groups.get(True, {'trends': 0, 'views': 0})
+    long_form = groups.get(False, {'trends': 0, 'views': 0})
+    total_trends = short['trends'] + long_form['trends']
+    total_views = short['views'] + long_form['views']
+    return {
+        'short': {'trends': short['trends'], 'views': short['views']},
+        'long': {'trends': long_form['trends'], 'views': long_form['views']},
+        'short_trend_ratio': round(short['trends'] / total_trends, 4) if total_trends else 0.0,
+        'short_view_ratio': round(short['views'] / total_views, 4) if total_views else 0.0
+    }
+
+
+def daily_stats(match):
+    """Per-day (UTC) trend counts, views and shorts, oldest first."""
+    pipeline = [
+        {'$match': match},
+        {'$project': {
+            '_id': 0,
+            'day': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$created_at'}},
+            'views': VIEWS,
+            'is_short': {'$cond': [{'$eq': ['$engagement_metrics.is_short', True]}, 1, 0]}
+        }},
+        {'$group': {'_id': '$day', 'trends': {'$sum': 1}, 'views': {'$sum': '$views'}, 'shorts': {'$sum': '$is_short'}}},
+        {'$sort': {'_id': 1}}
+    ]
+    return [{
+        'day': row['_id'],
+        'trends': row['trends'],
+        'views': row['views'],
+        'shorts': row['shorts']
+    } for row in mongo.db.trends.aggregate(pipeline)]
+
+
+STATS = {
+    'channels': channel_stats,
+    'platforms': platform_stats,
+    'shorts': shorts_stats,
+    'daily': daily_stats
+}
+
+
+def compute_stats(kind, match, limit=20):
+    ensure_stats_indexes()
+    if kind == 'channels':
+        return channel_stats(match, limit)
+    return STATS[kind](match)
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+import numpy as np
+from pymongo.errors import CollectionInvalid
+from extensions import mongo
+from utils.indexes import SetupOnce
+
+SNAPSHOT_COLLECTION = 'trend_view_snapshots'
+SNAPSHOT_TTL_DAYS = 30
+
+_collection = SetupOnce()
+
+
+def _create_snapshot_collection():
+    try:
+        mongo.db.create_collection(
+            SNAPSHOT_COLLECTION,
+            timeseries={'timeField': 'ts', 'metaField': 'video_id', 'granularity': 'hours'},
+            expireAfterSeconds=SNAPSHOT_TTL_DAYS * 24 * 3600
+        )
+    except CollectionInvalid:
+        pass  # already exists
+    except Exception as e:
+        # Older servers without time-series support fall back to a regular collection
+        print(f"Could not create {SNAPSHOT_COLLECTION} time-series collection: {str(e)}")
+        return False
+    return True
+
+
+def ensure_snapshot_collection():
+    """Create the time-series collection for view snapshots (once per process)."""
+    _collection.run(_create_snapshot_collection)
+
+
+def record_snapshots(rows, ts=None):
+    """
+    Append one compact snapshot per video: (video_id, ts, views, likes, comments).
+    rows: iterable of dicts with video_id and views, likes/comments when the source has them.
+    """
+    ts = ts or datetime.utcnow()
+    documents = []
+    for row in rows:
+        if not row.get('video_id'):
+            continue
+        doc = {'video_id': row['video_id'], 'ts': ts, 'views': int(row.get('views') or 0)}
+        for field in ('likes', 'comments'):
+            if row.get(field) is not None:
+                doc[field] = int(row[field])
+        documents.append(doc)
+    if not documents:
+        return 0
+    try:
+        ensure_snapshot_collection()
+        mongo.db[SNAPSHOT_COLLECTION].insert_many(documents, ordered=False)
+    except Exception as e:
+        # Snapshots are best-effort; never fail the fetch that produced them
+        print(f"Error recording view snapshots: {str(e)}")
+        return 0
+    return len(documents)
+
+
+def compute_velocity(video_ids, timestamps, views, min_points=2):
+    """
+    Least-squares views-per-hour slope for every video at once.
+    video_ids, timestamps (hours, float) and views are parallel 1-D arrays.
+    Returns (unique_ids, slope, latest_views, samples) for videos with >= min_points samples.
+    """
+    unique_ids, codes = np.unique(video_ids, return_inverse=True)
+    count = len(unique_ids)
+    x = np.asarray(timestamps, dtype=np.float64)
+    y = np.asarray(views, dtype=np.float64)
+
+    n = np.bincount(codes, minlength=count).astype(np.float64)
+    sum_x = np.bincount(codes, weights=x, minlength=count)
+    sum_y = np.bincount(codes, weights=y, minlength=count)
+    sum_xy = np.bincount(codes, weights=x * y, minlength=count)
+    sum_xx = np.bincount(codes, weights=x * x, minlength=count)
+
+    denominator = n * sum_xx - sum_x * sum_x
+    valid = (n >= min_points) & (denominator > 1e-9)
+    slope = np.zeros(count)
+    slope[valid] = (n[valid] * sum_xy[valid] - sum_x[valid] * sum_y[valid]) / denominator[valid]
+
+    # Latest views per video: last element of each group after sorting by (code, time)
+    order = np.lexsort((x, codes))
+    group_ends = np.append(np.flatnonzero(np.diff(codes[order])), len(order) - 1)
+    latest_views = y[order[group_ends]]
+
+    return unique_ids[valid], slope[valid], latest_views[valid], n[valid].astype(np.int64)
+
+
+def rank_by_velocity(window_hours=24, limit=50, min_points=2):
+    """Top videos by views gained per hour over the last window_hours."""
+    since = datetime.utcnow() - timedelta(hours=window_hours)
+    cursor = mongo.db[SNAPSHOT_COLLECTION].find(
+        {'ts': {'$gte': since}},
+        {'_id': 0, 'video_id': 1, 'ts': 1, 'views': 1}
+    )
+
+    video_ids, timestamps, views = [], [], []
+    for doc in cursor:
+        video_ids.append(doc['video_id'])
+        timestamps.append((doc['ts'] - since).total_seconds() / 3600.0)
+        views.append(doc.get('views', 0))
+    if not video_ids:
+        return []
+
+    ids, slope, latest, samples = compute_velocity(
+        np.array(video_ids, dtype=object).astype(str), timestamps, views, min_points
+    )
+    if not len(ids):
+        return []
+
+    # Partial sort: only the top `limit` entries are ordered
+    k = min(limit, len(ids))
+    top = np.argpartition(-slope, k - 1)[:k]
+    top = top[np.argsort(-slope[top])]
+
+    ranked = [{
+        'video_id': str(ids[i]),
+        'views_per_hour': round(float(slope[i]), 2),
+        'views': int(latest[i]),
+        'samples': int(samples[i])
+    } for i in top]
+
+    # Attach titles/channels from the trends collection in one query
+    details = {
+        doc['engagement_metrics']['video_id']: doc
+        for doc in mongo.db.trends.find(
+            {'engagement_metrics.video_id': {'$in': [r['video_id'] for r in ranked]}},
+            {'title': 1, 'platform': 1, 'engagement_metrics.video_id': 1, 'engagement_metrics.channel': 1}
+        )
+    }
+    for row in ranked:
+        doc = details.get(row['video_id'])
+        if doc:
+            row['trend_id'] = str(doc['_id'])
+            row['title'] = doc.get('title')
+            row['platform'] = doc.get('platform')
+            row['channel'] = doc['engagement_metrics'].get('channel')
+    return ranked
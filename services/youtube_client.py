@@ -0,0 +1,50 @@
+import os
+import threading
+import httplib2
+import googleapiclient.discovery
+from googleapiclient.discovery_cache import get_static_doc
+
+# Parsed once per process; the document ships with google-api-python-client,
+# so building a client never needs a network round-trip.
+_discovery_doc = None
+_doc_lock = threading.Lock()
+
+# httplib2.Http is not thread-safe, so each worker thread keeps its own client
+# (and with it its own keep-alive connection to www.googleapis.com).
+_local = threading.local()
+
+HTTP_TIMEOUT = 10
+
+
+def get_discovery_document():
+    """Return the bundled YouTube v3 discovery document."""
+    global _discovery_doc
+    if _discovery_doc is None:
+        with _doc_lock:
+            if _discovery_doc is None:
+                doc = get_static_doc("youtube", "v3")
+                if doc is None:
+                    raise RuntimeError("Bundled YouTube v3 discovery document not found")
+                _discovery_doc = doc
+    return _discovery_doc
+
+
+def build_youtube_client(api_key):
+    """Build a new YouTube Data API client from the bundled discovery document."""
+    os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
+    return googleapiclient.discovery.build_from_document(
+        get_discovery_document(),
+        developerKey=api_key,
+        http=httplib2.Http(timeout=HTTP_TIMEOUT)
+    )
+
+
+def get_youtube_client(api_key):
+    """Reusable YouTube client for the current thread, built on first use."""
+    clients = getattr(_local, 'clients', None)
+    if clients is None:
+        clients = _local.clients = {}
+    client = clients.get(api_key)
+    if client is None:
+        client = clients[api_key] = build_youtube_client(api_key)
+    return client
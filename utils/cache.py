@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from utils.singleflight import SingleFlight
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a TTL and a stale-while-revalidate window.
+
+    - age < ttl: served from cache (hit)
+    - ttl <= age < ttl + stale_ttl: stale value served, one background refresh started
+    - otherwise: loaded synchronously (miss); concurrent misses for a key share one load
+    """
+
+    def __init__(self, ttl=300, stale_ttl=600, max_entries=256):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._refreshing = set()
+        self._loads = SingleFlight()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'evictions': 0
+        }
+
+    def get_or_load(self, key, loader, cacheable=None):
+        """
+        Return the cached value for key, calling loader() when needed.
+        cacheable(value) decides whether a loaded value is stored (default: always).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[1]
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['stale_hits'] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(
+                            target=self._refresh, args=(key, loader, cacheable), daemon=True
+                        ).start()
+                    return entry[1]
+            self._stats['misses'] += 1
+
+        def load():
+            # A load that finished between our miss and this call already stored the value
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                    return entry[1]
+            value = loader()
+            if cacheable is None or cacheable(value):
+                self.set(key, value)
+            return value
+
+        return self._loads.do(key, load)
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+            stats['ttl'] = self.ttl
+            stats['stale_ttl'] = self.stale_ttl
+        stats['shared_loads'] = self._loads.stats()['shared']
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _refresh(self, key, loader, cacheable):
+        try:
+            value = loader()
+            if cacheable is None or cacheable(value):
+                self.set(key, value)
+            with self._lock:
+                self._stats['refreshes'] += 1
+        except Exception as e:
+            print(f"Cache refresh failed for {key}: {str(e)}")
+            with self._lock:
+                self._stats['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -0,0 +1,9 @@
+def in_app_context(app, func, *args, **kwargs):
+    """Call func inside an app context, for work submitted to a thread pool."""
+    with app.app_context():
+        return func(*args, **kwargs)
+
+
+def clean_hashtag(value):
+    """Hashtag as stored: trimmed, lowercase, without '#'."""
+    return str(value or '').strip().lower().replace('#', '')
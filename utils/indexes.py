@@ -0,0 +1,51 @@
+import threading
+import time
+from pymongo.errors import PyMongoError
+
+# After a failed index build, wait this long before trying again
+INDEX_RETRY_SECONDS = 600
+
+
+def create_indexes(collection, indexes):
+    """
+    Create each (keys, options) index on collection; options must include a name.
+    Failures are printed and do not stop the rest. Returns True when all were created.
+    """
+    ready = True
+    for keys, options in indexes:
+        try:
+            collection.create_index(keys, **options)
+        except PyMongoError as e:
+            print(f"Could not create {collection.name} index {options['name']}: {str(e)}")
+            ready = False
+    return ready
+
+
+class SetupOnce:
+    """
+    Run a setup step (index or collection creation) once per process.
+    A step that returns False is retried on a call after retry_seconds, not on every call.
+    """
+
+    def __init__(self, retry_seconds=INDEX_RETRY_SECONDS):
+        self.retry_seconds = retry_seconds
+        self._ready = False
+        self._failed_at = None
+        self._lock = threading.Lock()
+
+    def run(self, setup):
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_seconds:
+                return
+            self._ready = setup() is not False
+            self._failed_at = None if self._ready else time.monotonic()
+
+    def reset(self):
+        """Forget the last outcome so the next run() sets up again."""
+        with self._lock:
+            self._ready = False
+            self._failed_at = None
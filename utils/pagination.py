@@ -0,0 +1,98 @@
+import base64
+import json
+import re
+from datetime import datetime, timezone
+from bson import ObjectId
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a page size query parameter into [1, maximum]."""
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    return max(1, min(limit, maximum))
+
+
+def parse_date(value, name):
+    """
+    Parse an ISO date/datetime query parameter into a naive UTC datetime (how
+    Mongo timestamps are stored), or return None when absent. Values with an
+    offset are converted to UTC; values without one are taken as UTC.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def date_range_filter(date_from, date_to, field='created_at'):
+    """Filter for field within [date_from, date_to]; either bound may be None (empty filter when both are)."""
+    bounds = {}
+    if date_from:
+        bounds['$gte'] = date_from
+    if date_to:
+        bounds['$lte'] = date_to
+    return {field: bounds} if bounds else {}
+
+
+def parse_fields(value, required=('_id',)):
+    """Turn ?fields=a,b.c into a Mongo inclusion projection, or None for full documents."""
+    if not value:
+        return None
+    projection = {field: 1 for field in required}
+    for field in value.split(','):
+        field = field.strip()
+        if not field:
+            continue
+        if not FIELD_NAME.match(field):
+            raise ValueError(f"Invalid field name: {field}")
+        projection[field] = 1
+    return projection
+
+
+def encode_cursor(sort_value, _id):
+    """Opaque cursor for keyset pagination on (sort_value, _id)."""
+    if isinstance(sort_value, datetime):
+        payload = {'t': sort_value.isoformat()}
+    else:
+        payload = {'v': sort_value}
+    # Some collections use string _ids, so remember which type to restore
+    payload['id'] = str(_id)
+    payload['oid'] = isinstance(_id, ObjectId)
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; returns (sort_value, ObjectId-or-str)."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if 't' in payload:
+            sort_value = datetime.fromisoformat(payload['t'])
+        else:
+            sort_value = payload['v']
+        _id = ObjectId(payload['id']) if payload.get('oid') else payload['id']
+        return sort_value, _id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def keyset_filter(field, cursor, descending=True):
+    """Mongo filter selecting documents strictly after the cursor in (field, _id) order."""
+    sort_value, _id = decode_cursor(cursor)
+    op = '$lt' if descending else '$gt'
+    return {'$or': [
+        {field: {op: sort_value}},
+        {field: sort_value, '_id': {op: _id}}
+    ]}
@@ -0,0 +1,178 @@
+import json
+import re
+from functools import lru_cache
+import numpy as np
+
+# One pass over a view-count string: the first number (with any grouping or
+# decimal separators) and an optional word right after it ("K", "Mio.", "lakh", "views")
+VIEWS_PATTERN = re.compile(
+    r"(?P<number>\d(?:[\d\s'.,]*\d)?)\s*(?P<suffix>[^\W\d_]+)?\.?",
+    re.UNICODE
+)
+# The same match for many values joined with NUL, one match per value; values
+# without digits match with an empty number group
+VIEWS_RECORD_PATTERN = re.compile(
+    r"[^\d\x00]*(?:(\d(?:[\d\s'.,]*\d)?)\s*([^\W\d_]+)?)?[^\x00]*\x00",
+    re.UNICODE
+)
+
+VIEW_SUFFIXES = {
+    'k': 1_000, 'thousand': 1_000, 'tsd': 1_000, 'mil': 1_000, 'rb': 1_000, 'ribu': 1_000,
+    'm': 1_000_000, 'mn': 1_000_000, 'mln': 1_000_000, 'million': 1_000_000, 'mio': 1_000_000, 'juta': 1_000_000,
+    'b': 1_000_000_000, 'bn': 1_000_000_000, 'billion': 1_000_000_000, 'mrd': 1_000_000_000,
+    'lakh': 100_000, 'lac': 100_000, 'crore': 10_000_000, 'cr': 10_000_000,
+    '千': 1_000, '万': 10_000, '萬': 10_000, '億': 100_000_000, '亿': 100_000_000,
+    '천': 1_000, '만': 10_000, '억': 100_000_000,
+    'тыс': 1_000, 'млн': 1_000_000, 'млрд': 1_000_000_000
+}
+
+# "12:34", "1:02:03" or ISO 8601 "PT1H2M3S" as returned by the YouTube Data API
+DURATION_PATTERN = re.compile(
+    r'^\s*(?:(?:(?P<h>\d+):)?(?P<m>\d{1,2}):(?P<s>\d{2})'
+    r'|P(?:(?P<days>\d+)D)?T?(?:(?P<ih>\d+)H)?(?:(?P<im>\d+)M)?(?:(?P<is>\d+)S)?)\s*$'
+)
+
+GROUPING_CHARS = re.compile(r"[\s']")
+
+THUMBNAIL_PAIR = re.compile(r"""['"](\w+)['"]\s*:\s*['"]([^'"]*)['"]""")
+
+
+def _to_number(digits, has_multiplier):
+    """
+    Normalize '1,234' / '1.234.567' / '1 234' / '1,2' to a float.
+    With a K/M/B-style multiplier the last separator is a decimal point;
+    without one, a last group of exactly three digits is a thousands group.
+    """
+    if not digits.isdigit():
+        digits = GROUPING_CHARS.sub('', digits)
+    last = max(digits.rfind('.'), digits.rfind(','))
+    if last == -1:
+        return float(digits)
+    integer, fraction = digits[:last], digits[last + 1:]
+    integer = integer.replace('.', '').replace(',', '')
+    if not has_multiplier and len(fraction) == 3:
+        return float(integer + fraction)
+    return float(f"{integer or 0}.{fraction}")
+
+
+@lru_cache(maxsize=65536)
+def _parse_views_text(text):
+    match = VIEWS_PATTERN.search(text)
+    if not match:
+        return 0  # "No views", "", "LIVE"
+    suffix = (match.group('suffix') or '').lower()
+    multiplier = VIEW_SUFFIXES.get(suffix, 1)
+    try:
+        return int(_to_number(match.group('number'), multiplier != 1) * multiplier)
+    except ValueError:
+        return 0
+
+
+def parse_views(value):
+    """Convert '1.2K views', '1,234 views', '1,2 Mio.', '3 lakh', 'No views' or numbers to int."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not isinstance(value, str):
+        return 0
+    return _parse_views_text(value.strip())
+
+
+def _parse_column(values, parse):
+    # Columns repeat heavily ("1.2K views", "12:34"), so memoize per call on the raw value
+    cache = {}
+    lookup = cache.get
+    parsed = []
+    append = parsed.append
+    for value in values:
+        result = lookup(value) if type(value) is str else None
+        if result is None:
+            result = parse(value)
+            if type(value) is str:
+                cache[value] = result
+        append(result)
+    return np.array(parsed, dtype=np.int64)
+
+
+def parse_views_batch(values):
+    """
+    Parse a whole column of view counts into an int64 array. Distinct strings
+    are joined and matched with one findall; separators, multipliers and the
+    float conversion are then applied to whole columns.
+    Gives the same results as parse_views on each value.
+    """
+    try:
+        distinct = list(dict.fromkeys(values))
+    except TypeError:
+        return _parse_column(values, parse_views)  # unhashable values in the column
+    texts = [value for value in distinct if type(value) is str]
+    # NUL ends each record; one inside a value is read like any other punctuation
+    joined = '\x00'.join(text.strip().replace('\x00', '|') for text in texts) + '\x00'
+    rows = VIEWS_RECORD_PATTERN.findall(joined) if texts else []
+
+    multipliers = [VIEW_SUFFIXES.get(suffix.lower(), 1) if suffix else 1 for _, suffix in rows]
+    numbers = GROUPING_CHARS.sub('', '\x00'.join(number for number, _ in rows)).split('\x00')
+    # Split at the last separator, as _to_number does
+    parts = [number.replace(',', '.').rpartition('.') for number in numbers]
+    literals = [
+        (integer.replace('.', '') or '0') + ('.' if multiplier != 1 or len(fraction) != 3 else '') + fraction
+        if separator else number or '0'
+        for number, (integer, separator, fraction), multiplier in zip(numbers, parts, multipliers)
+    ]
+    counts = (
+        np.array(literals, dtype=str).astype(np.float64) * np.array(multipliers, dtype=np.float64)
+    ).astype(np.int64) if rows else np.empty(0, dtype=np.int64)
+
+    parsed = dict(zip(texts, counts.tolist()))
+    for value in distinct:
+        if type(value) is not str:
+            parsed[value] = parse_views(value)
+    return np.array([parsed[value] for value in values], dtype=np.int64)
+
+
+@lru_cache(maxsize=16384)
+def _parse_duration_text(text):
+    match = DURATION_PATTERN.match(text)
+    if not match or not any(match.groups()):
+        return 0
+    if match.group('s') is not None:
+        return int(match.group('h') or 0) * 3600 + int(match.group('m')) * 60 + int(match.group('s'))
+    return (int(match.group('days') or 0) * 86400 + int(match.group('ih') or 0) * 3600
+            + int(match.group('im') or 0) * 60 + int(match.group('is') or 0))
+
+
+def parse_duration(value):
+    """'12:34' / '1:02:03' / 'PT12M34S' -> seconds; 0 for live streams or unknown values."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not isinstance(value, str):
+        return 0
+    return _parse_duration_text(value.strip())
+
+
+def parse_duration_batch(values):
+    """Parse a whole column of durations into an int64 array of seconds."""
+    return _parse_column(values, parse_duration)
+
+
+def parse_thumbnail(thumbnail):
+    """
+    Normalize a SearchAPI thumbnail to a dict without evaluating Python literals.
+    Plain URLs are returned as {"static": url, "rich": url}; dict-like strings are
+    read as JSON, or by pulling out their 'key': 'value' pairs.
+    """
+    if isinstance(thumbnail, dict):
+        return thumbnail
+    if not isinstance(thumbnail, str):
+        return thumbnail
+    text = thumbnail.strip()
+    if not text.startswith('{'):
+        return {"static": text, "rich": text}
+    if '"' in text:
+        try:
+            parsed = json.loads(text)
+            if isinstance(parsed, dict):
+                return parsed
+        except ValueError:
+            pass
+    pairs = dict(THUMBNAIL_PAIR.findall(text))
+    return pairs or {"static": text, "rich": text}
@@ -0,0 +1,97 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills `rate` tokens per second up to `capacity`.
+    Each upstream call takes one token, so sustained throughput never exceeds `rate`
+    while short bursts of up to `capacity` calls go out immediately.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until tokens are available; False if timeout (seconds) runs out first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit that adapts to upstream rate limiting (AIMD): the limit is
+    halved whenever a call comes back rate limited and grows by one after
+    `increase_after` consecutive successes, up to `max_limit`.
+    """
+
+    def __init__(self, max_limit, min_limit=1, increase_after=5):
+        if max_limit < 1:
+            raise ValueError("max_limit must be at least 1")
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.increase_after = increase_after
+        self.limit = max_limit
+        self._in_flight = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+        self._stats = {'acquired': 0, 'rate_limited': 0, 'decreases': 0, 'increases': 0}
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+            self._stats['acquired'] += 1
+
+    def release(self, rate_limited=False):
+        with self._cond:
+            self._in_flight -= 1
+            if rate_limited:
+                self._stats['rate_limited'] += 1
+                self._successes = 0
+                if self.limit > self.min_limit:
+                    self.limit = max(self.min_limit, self.limit // 2)
+                    self._stats['decreases'] += 1
+            else:
+                self._successes += 1
+                if self._successes >= self.increase_after and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._successes = 0
+                    self._stats['increases'] += 1
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats, limit=self.limit, max_limit=self.max_limit, in_flight=self._in_flight)
@@ -1,8 +1,7 @@
-import os
 import json
 import requests
 from datetime import datetime
-import googleapiclient.discovery
+from services.youtube_client import get_youtube_client
 from typing import List, Dict
 
 class SocialMediaTrends:
@@ -10,12 +9,8 @@ class SocialMediaTrends:
         self.youtube_api_key = youtube_api_key
 
     def init_youtube(self):
-        """Initialize YouTube API client"""
-        os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
-        return googleapiclient.discovery.build(
-            "youtube", "v3", 
-            developerKey=self.youtube_api_key
-        )
+        """Return the shared YouTube API client (built once per worker thread)"""
+        return get_youtube_client(self.youtube_api_key)
 
     def get_youtube_trending_videos(self, region_code: str = "IN", max_results: int = 50) -> List[Dict]:
         """Fetch trending YouTube videos"""